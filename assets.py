@@ -0,0 +1,146 @@
+# durango_wildlands_clone/assets.py
+
+import os
+import pygame
+from collections import OrderedDict
+from config import ASSET_DIR, SPRITE_FILES, ATLAS_MAX_WIDTH, ATLAS_ZOOM_CACHE_ENTRIES
+
+class TextureAtlas:
+    """Many sprites packed into one surface, drawn by blitting an area of it.
+
+    Sprites are packed on shelves (rows), tallest first, ATLAS_MAX_WIDTH pixels wide.
+    `rects` maps each sprite name to its area of `surface`.
+    """
+
+    def __init__(self, images, alpha):
+        # Shelf packing: each row is as tall as its tallest (first) sprite
+        order = sorted(images, key=lambda name: images[name].get_height(), reverse=True)
+        width = max([ATLAS_MAX_WIDTH] + [images[name].get_width() for name in order])
+        self.rects = {}
+        x = y = shelf_height = 0
+        for name in order:
+            w, h = images[name].get_size()
+            if x + w > width:
+                x, y, shelf_height = 0, y + shelf_height, 0
+            self.rects[name] = pygame.Rect(x, y, w, h)
+            x += w
+            shelf_height = max(shelf_height, h)
+        used_width = max([1] + [rect.right for rect in self.rects.values()])
+        height = max(1, y + shelf_height)
+
+        self.surface = pygame.Surface((used_width, height), pygame.SRCALPHA if alpha else 0)
+        for name, rect in self.rects.items():
+            # BLEND_RGBA_MAX onto the zeroed atlas copies the pixels (alpha included) without blending
+            self.surface.blit(images[name], rect, special_flags=pygame.BLEND_RGBA_MAX if alpha else 0)
+        if pygame.display.get_surface() is not None:
+            # Once, to the display format, so every blit out of the atlas takes the fast path
+            self.surface = self.surface.convert_alpha() if alpha else self.surface.convert()
+        self._images = {}
+
+    def blit(self, target, name, position):
+        target.blit(self.surface, position, self.rects[name])
+
+    def image(self, name):
+        """A subsurface for one sprite (shares the atlas's pixels; blit it, never draw onto it)."""
+        image = self._images.get(name)
+        if image is None:
+            image = self._images[name] = self.surface.subsurface(self.rects[name])
+        return image
+
+
+class AssetManager:
+    """Sprite registry: lazily loaded images packed into one texture atlas per sheet.
+
+    Code that draws something declares a sprite once -- its sheet ('tiles', 'entities'),
+    its size in world pixels and a fallback that draws the flat-colour placeholder. A
+    sheet is loaded and packed the first time one of its sprites is drawn (or by
+    preload()): each sprite comes from its image in SPRITE_FILES, scaled to the declared
+    size, or from its fallback when it has no image. Packed atlases are cached per zoom
+    level (LRU), with every sprite pre-scaled, so drawing at any zoom is a plain blit.
+    """
+
+    def __init__(self, asset_dir=ASSET_DIR, files=SPRITE_FILES, zoom_cache_entries=ATLAS_ZOOM_CACHE_ENTRIES):
+        self.asset_dir = asset_dir
+        self.files = files
+        self.zoom_cache_entries = zoom_cache_entries
+        self._sprites = {} # sheet -> {name: (size, fallback)}
+        self._alpha = {} # sheet -> whether its sprites have transparency
+        self._base = {} # sheet -> {name: Surface at the declared size}
+        self._atlases = {} # sheet -> OrderedDict(zoom key -> TextureAtlas)
+        self.loads = 0 # Image files read so far
+
+    @staticmethod
+    def _zoom_key(zoom_level):
+        # Same rounding as ChunkCache, so both agree on what counts as one zoom level
+        return round(zoom_level, 3)
+
+    def declare(self, sheet, name, size, fallback, alpha=True):
+        """Registers a sprite. `size` is (width, height) in world pixels; `fallback()` returns a
+        Surface of that size to use when the sprite has no image. Redeclaring is a no-op."""
+        sprites = self._sprites.setdefault(sheet, {})
+        if name in sprites:
+            return
+        sprites[name] = (tuple(size), fallback)
+        self._alpha[sheet] = self._alpha.get(sheet, False) or alpha
+        # The sheet is repacked with the new sprite on next use
+        self._base.pop(sheet, None)
+        self._atlases.pop(sheet, None)
+
+    def _load(self, name, size, fallback):
+        path = self.files.get(name)
+        if path:
+            full_path = os.path.join(self.asset_dir, path)
+            try:
+                image = pygame.image.load(full_path)
+                self.loads += 1
+                if image.get_size() != size:
+                    image = pygame.transform.smoothscale(image.convert_alpha() if pygame.display.get_surface() else image, size)
+                return image
+            except (pygame.error, FileNotFoundError) as e:
+                print(f"Warning: Couldn't load sprite '{name}' from {full_path} ({e}). Using its placeholder.")
+        return fallback()
+
+    def _base_images(self, sheet):
+        images = self._base.get(sheet)
+        if images is None:
+            images = self._base[sheet] = {name: self._load(name, size, fallback)
+                                          for name, (size, fallback) in self._sprites[sheet].items()}
+        return images
+
+    def atlas(self, sheet, zoom_level=1.0):
+        """Returns the sheet's atlas with every sprite scaled by `zoom_level` (packed on first use)."""
+        key = self._zoom_key(zoom_level)
+        atlases = self._atlases.setdefault(sheet, OrderedDict())
+        atlas = atlases.get(key)
+        if atlas is not None:
+            atlases.move_to_end(key)
+            return atlas
+
+        images = self._base_images(sheet)
+        if key != 1.0:
+            # Same rounding the old per-frame scaling used: int(size * zoom), at least a pixel
+            images = {name: pygame.transform.scale(image, (max(1, int(image.get_width() * key)),
+                                                           max(1, int(image.get_height() * key))))
+                      for name, image in images.items()}
+        atlas = atlases[key] = TextureAtlas(images, self._alpha[sheet])
+        if len(atlases) > self.zoom_cache_entries:
+            atlases.popitem(last=False)
+        return atlas
+
+    def image(self, sheet, name, zoom_level=1.0):
+        """One sprite at a zoom level, as a subsurface of its atlas."""
+        return self.atlas(sheet, zoom_level).image(name)
+
+    def preload(self, sheets):
+        """Loads and packs the listed sheets at 1x now instead of on first draw."""
+        for sheet in sheets:
+            if sheet in self._sprites:
+                self.atlas(sheet)
+
+    def clear(self):
+        """Drops loaded images and packed atlases (declarations stay); e.g. after a display mode change."""
+        self._base.clear()
+        self._atlases.clear()
+
+
+assets = AssetManager() # Shared by everything that draws sprites
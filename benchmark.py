@@ -0,0 +1,608 @@
+# durango_wildlands_clone/benchmark.py
+
+"""Headless gameplay benchmarks.
+
+Boots Game on SDL's dummy video driver, drives it with scripted input and times
+each phase of the frame (handle_events, update, draw) per scenario.
+
+    python benchmark.py                                 # run everything, print a summary
+    python benchmark.py --output results.json           # also write the results as JSON
+    python benchmark.py --baseline baseline.json        # flag regressions against a stored run
+    python benchmark.py --compare new.json --baseline baseline.json   # compare two stored runs
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # Before pygame opens a display
+import pygame
+
+from config import TILE_SIZE, CREATURE_SPAWN_RADIUS_TILES, ZOOM_MIN, ZOOM_MAX, ZOOM_STEP, TILE_TYPE_GRASS, \
+                   PLAYER_SPEED, SIMULATION_TICK_RATE
+from game import Game, GameState
+from level.map import Map
+from level.pathfinding import _astar
+from level.flow_field import FlowField, DIRECTIONS
+from level.generator import get_generator
+from entities import EntityPool
+from level.tile import COLLIDABLE_LOOKUP
+from player import Player
+from spatial_hash import SpatialHash
+
+RESULTS_FORMAT = 1
+DEFAULT_FRAMES = 300
+DEFAULT_MAP_SIZES = (100, 512, 2048) # Square map sizes (tiles) for the save/load scenario
+DEFAULT_THRESHOLD = 0.15 # Relative slowdown that counts as a regression
+MIN_REGRESSION_MS = 0.05 # ...as long as it is also at least this large (filters timer noise)
+PERCENTILES = (50, 95, 99)
+SAVE_LOAD_RUNS = 5 # Save/load round trips per map size
+CREATURE_BENCH_COUNT = 10000
+SPATIAL_HASH_COUNTS = (100, 1000, 10000, 50000) # Box counts for the spatial_hash scaling scenario
+NAIVE_PAIRS_MAX_COUNT = 1000 # Pairwise colliderect baseline only up to this many boxes (it is O(n^2))
+PATH_BENCH_SIZES = (100, 512) # Square fixed maps for the pathfinding scenario
+PATH_BENCH_QUERIES = 40 # Random start/goal pairs per map size
+FLOW_BENCH_SIZES = (100, 1000) # Square fixed maps for the flow_field scenario
+FLOW_BENCH_FULL_MAP_MAX = 256 # Also time a field over the whole map up to this size
+FLOW_BENCH_GOALS = 5 # Cold fields per map size
+FLOW_BENCH_STEPS = 60 # Goal moves (one tile each) for the incremental phase
+FLOW_BENCH_AGENTS = 10000 # Creatures steering along the field
+FLOW_BENCH_SEARCH_AGENTS = 100 # Agents given their own A* search instead, for comparison
+WORLDGEN_BENCH_SIZES = (2048, 8192) # Square map sizes for the worldgen scenario
+FRAME_RATE_BENCH_RATES = (30, 60, 144, 240, None) # Frames (or ticks) per second; None = uncapped (jittery 0.2-3 ms frames)
+FRAME_RATE_BENCH_SECONDS = 4.0 # Simulated time walked at each rate
+# Absolute limits checked on every run: (scenario, phase) -> max p95 in ms
+BUDGETS = {
+    ('creatures', 'creatures_update'): 2.0, # Leaves most of a 60 Hz tick (16.7 ms) for everything else
+}
+# Upper limits on throughput figures that are really correctness checks
+THROUGHPUT_LIMITS = {
+    ('frame_rates', 'max_spread_px'): 0.001, # Same distance walked at every frame and tick rate
+}
+
+
+class ScriptedKeys:
+    """Stands in for pygame.key.get_pressed: the held keys follow a looping script.
+
+    `script` is a list of (ticks, keys) steps; `keys` is a tuple of pygame key codes
+    held for that many calls. Every call is one simulation tick (Player reads input
+    once per update).
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self.length = sum(ticks for ticks, _ in script)
+        self.calls = 0
+
+    def __call__(self):
+        tick = self.calls % self.length
+        self.calls += 1
+        for ticks, keys in self.script:
+            if tick < ticks:
+                break
+            tick -= ticks
+        pressed = [False] * 512
+        for key in keys:
+            pressed[key] = True
+        return pressed
+
+
+# A lap that pushes along walls in every direction, so collision sliding is exercised too
+WALK_SCRIPT = [
+    (120, (pygame.K_d,)),
+    (60, (pygame.K_d, pygame.K_s)),
+    (120, (pygame.K_s,)),
+    (60, (pygame.K_a, pygame.K_s)),
+    (120, (pygame.K_a,)),
+    (60, (pygame.K_a, pygame.K_w)),
+    (120, (pygame.K_w,)),
+    (60, (pygame.K_d, pygame.K_w)),
+]
+ZOOM_LEVELS = (0.5, 0.75, 1.0, 1.5, 2.0)
+
+
+class PhaseTimer:
+    """Collects per-call durations (ms) by phase name."""
+
+    def __init__(self):
+        self.samples = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(name, []).append((time.perf_counter() - start) * 1000.0)
+
+    def summary(self):
+        phases = {}
+        for name, samples in self.samples.items():
+            values = np.array(samples)
+            stats = {f'p{p}': round(float(np.percentile(values, p)), 4) for p in PERCENTILES}
+            stats['mean'] = round(float(values.mean()), 4)
+            stats['count'] = len(samples)
+            phases[name] = stats
+        return phases
+
+
+def _run_frames(game, timer, frames, before_frame=None):
+    """Runs `frames` full frames (events, one tick, draw), timing each phase.
+    Returns frames per second over the timed work."""
+    start = time.perf_counter()
+    for frame in range(frames):
+        if before_frame:
+            before_frame(frame)
+        with timer.phase('frame'):
+            with timer.phase('handle_events'):
+                game.handle_events()
+            with timer.phase('update'):
+                game.update(game.tick_dt)
+            with timer.phase('draw'):
+                game.draw()
+    return frames / (time.perf_counter() - start)
+
+
+def _post_mouse_motion(frame):
+    # Sweeps the cursor across the menu so button hover checks run every frame
+    x = (frame * 37) % pygame.display.get_surface().get_width()
+    y = (frame * 23) % pygame.display.get_surface().get_height()
+    pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(x, y), rel=(0, 0), buttons=(0, 0, 0)))
+
+
+def _wait_for_worker(game, timer, phase):
+    """Ticks the game until the save worker is idle, timing the whole wait as one sample."""
+    with timer.phase(phase):
+        while game.save_worker.busy:
+            game.update(game.tick_dt)
+            time.sleep(0.0005)
+
+
+# --- Scenarios ---
+# Each takes (game, timer, options) and returns its throughput figures.
+
+def scenario_walk(game, timer, options):
+    game.key_state = ScriptedKeys(WALK_SCRIPT)
+    game._start_new_game()
+    return {'frames_per_sec': _run_frames(game, timer, options.frames)}
+
+def scenario_zoom_sweep(game, timer, options):
+    game.key_state = ScriptedKeys(WALK_SCRIPT)
+    game._start_new_game()
+    def set_zoom(frame):
+        # Hold each zoom level for a few frames; the first frame at a level renders its chunks
+        game.zoom_level = game.target_zoom = ZOOM_LEVELS[(frame // 10) % len(ZOOM_LEVELS)]
+    return {'frames_per_sec': _run_frames(game, timer, options.frames, set_zoom)}
+
+def scenario_zoom_animate(game, timer, options):
+    """Smooth zoom driven by mouse wheel events: all the way out, then back in, repeatedly."""
+    game.key_state = ScriptedKeys(WALK_SCRIPT)
+    game._start_new_game()
+    notches = round(math.log(ZOOM_MAX / ZOOM_MIN, ZOOM_STEP))
+    def wheel(frame):
+        # Two notches every 10 frames, so the zoom is almost always mid-animation
+        step = frame // 10
+        if frame % 10 == 0:
+            direction = -1 if (step * 2 // notches) % 2 == 0 else 1
+            pygame.event.post(pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=2 * direction, flipped=False))
+    fps = _run_frames(game, timer, options.frames, wheel)
+    return {'frames_per_sec': fps}
+
+def scenario_zoom_sweep_raster(game, timer, options):
+    """zoom_sweep with the map drawn by its paletted raster instead of cached chunks."""
+    game.key_state = ScriptedKeys(WALK_SCRIPT)
+    game._start_new_game()
+    game.map.render_mode = 'raster'
+    def set_zoom(frame):
+        game.zoom_level = game.target_zoom = ZOOM_LEVELS[(frame // 10) % len(ZOOM_LEVELS)]
+    return {'frames_per_sec': _run_frames(game, timer, options.frames, set_zoom)}
+
+def scenario_pause_menu(game, timer, options):
+    game._start_new_game()
+    game.game_state = GameState.PAUSE_MENU
+    return {'frames_per_sec': _run_frames(game, timer, options.frames, _post_mouse_motion)}
+
+def scenario_slot_screen(game, timer, options):
+    game._start_new_game()
+    game.game_state = GameState.PAUSE_MENU
+    game._enter_slot_selection(mode='save')
+    return {'frames_per_sec': _run_frames(game, timer, options.frames, _post_mouse_motion)}
+
+def scenario_new_game(game, timer, options):
+    runs = max(1, options.frames // 30)
+    start = time.perf_counter()
+    for _ in range(runs):
+        with timer.phase('new_game'):
+            game._start_new_game()
+        _run_frames(game, timer, 1) # First frame renders the chunks around the spawn
+    return {'new_games_per_sec': runs / (time.perf_counter() - start)}
+
+def scenario_save_load(game, timer, options):
+    throughput = {}
+    rng = np.random.default_rng(options.seed)
+    for size in options.map_sizes:
+        game.map = Map(rows=size, cols=size, seed=options.seed)
+        game.player = Player(TILE_SIZE, TILE_SIZE, key_state=game.key_state)
+        game._spawn_creatures() # update() moves creatures while waiting on the worker
+        game.game_state = GameState.PLAYING
+        # Touch 1% of the tiles so delta saves have something to store
+        for row, col in rng.integers(0, size, (max(1, size * size // 100), 2)):
+            game.map.set_tile(int(row), int(col), int(rng.integers(0, 6)))
+
+        runs = SAVE_LOAD_RUNS
+        start = time.perf_counter()
+        for _ in range(runs):
+            game._previous_game_state = GameState.PLAYING
+            with timer.phase(f'save_submit_{size}'): # Game-thread cost: snapshot + queueing
+                game._save_game_to_slot(1, f'bench {size}')
+            _wait_for_worker(game, timer, f'save_total_{size}')
+            game._previous_game_state = GameState.PLAYING
+            game._load_game_from_slot(1)
+            _wait_for_worker(game, timer, f'load_total_{size}')
+            if game.game_state != GameState.PLAYING:
+                raise RuntimeError(f'Loading the {size}x{size} save failed')
+        elapsed = time.perf_counter() - start
+        throughput[f'tiles_per_sec_{size}'] = runs * 2 * size * size / elapsed
+    return throughput
+
+def scenario_creatures(game, timer, options):
+    game.key_state = ScriptedKeys(WALK_SCRIPT)
+    game._start_new_game()
+    creatures = game.creatures
+    creatures.spawn_random(game.map, CREATURE_BENCH_COUNT - creatures.count,
+                           game.player.rect.centerx, game.player.rect.centery, CREATURE_SPAWN_RADIUS_TILES * TILE_SIZE)
+    start = time.perf_counter()
+    for _ in range(options.frames):
+        with timer.phase('creatures_update'):
+            creatures.update(game.tick_dt, game.map)
+    updates_per_sec = creatures.count * options.frames / (time.perf_counter() - start)
+    return {'creature_updates_per_sec': updates_per_sec,
+            'frames_per_sec': _run_frames(game, timer, options.frames)}
+
+def scenario_spatial_hash(game, timer, options):
+    """SpatialHash scaling at constant density (about one box per 16 tiles), with an O(n^2)
+    colliderect baseline for the small counts."""
+    rng = np.random.default_rng(options.seed)
+    throughput = {}
+    ticks = max(10, options.frames // 10)
+    for count in SPATIAL_HASH_COUNTS:
+        world = np.sqrt(count * 16) * TILE_SIZE
+        x, y = rng.uniform(0, world, count), rng.uniform(0, world, count)
+        size = rng.uniform(8, 32, count)
+        spatial = SpatialHash()
+        with timer.phase(f'insert_{count}'):
+            handles = spatial.insert_many(x, y, size, size)
+        view = (world / 2, world / 2, 1200, 800)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            x = np.clip(x + rng.normal(0, 2, count), 0, world)
+            y = np.clip(y + rng.normal(0, 2, count), 0, world)
+            with timer.phase(f'move_many_{count}'):
+                spatial.move_many(handles, x, y)
+            with timer.phase(f'query_view_{count}'):
+                spatial.query_rect(*view)
+            with timer.phase(f'query_radius_{count}'):
+                spatial.query_radius(world / 2, world / 2, 160)
+            with timer.phase(f'pairs_{count}'):
+                spatial.overlapping_pairs()
+        throughput[f'ticks_per_sec_{count}'] = ticks / (time.perf_counter() - start)
+        if count <= NAIVE_PAIRS_MAX_COUNT:
+            rects = [pygame.Rect(int(bx), int(by), int(s), int(s)) for bx, by, s in zip(x, y, size)]
+            with timer.phase(f'naive_pairs_{count}'):
+                [(i, j) for i in range(count) for j in range(i + 1, count) if rects[i].colliderect(rects[j])]
+    return throughput
+
+def scenario_pathfinding(game, timer, options):
+    """Random long-distance path queries: plain grid A* against the hierarchical Pathfinder
+    with cold clusters, warm clusters and the path cache, then re-pathing after a tile change."""
+    rng = random.Random(options.seed)
+    blocking_tile = next(tile_id for tile_id, blocked in enumerate(COLLIDABLE_LOOKUP) if blocked)
+    for size in PATH_BENCH_SIZES:
+        game_map = Map(rows=size, cols=size, seed=options.seed)
+        walkable = bytearray((~COLLIDABLE_LOOKUP[game_map.data]).astype(np.uint8).tobytes())
+        rows, cols = game_map.walkable_cells()
+        picks = [rng.randrange(len(rows)) for _ in range(2 * PATH_BENCH_QUERIES)]
+        queries = [((int(rows[a]), int(cols[a])), (int(rows[b]), int(cols[b]))) for a, b in zip(picks[::2], picks[1::2])]
+        pathfinder = game_map.pathfinder
+        for start, goal in queries:
+            with timer.phase(f'astar_{size}'):
+                _astar(walkable, size, size, start[0] * size + start[1], goal[0] * size + goal[1])
+        for label in ('hpa_cold', 'hpa_cached'):
+            for start, goal in queries:
+                with timer.phase(f'{label}_{size}'):
+                    pathfinder.find_path(start, goal)
+        pathfinder._cache.clear()
+        pathfinder._cached_by_cluster.clear()
+        paths = []
+        for start, goal in queries:
+            with timer.phase(f'hpa_warm_{size}'):
+                paths.append(pathfinder.find_path(start, goal))
+        # Block a tile on each path: only the paths through that cluster are re-searched
+        for (start, goal), path in zip(queries, paths):
+            if path and len(path) > 2:
+                row, col = path[len(path) // 2]
+                game_map.set_tile(row, col, blocking_tile)
+                with timer.phase(f'repath_{size}'):
+                    pathfinder.find_path(start, goal)
+    return {}
+
+def scenario_flow_field(game, timer, options):
+    """Flow fields toward a moving goal: cold windowed fields, updates as the goal walks, and
+    agents steering along the field against one A* search per agent over the same window."""
+    rng = random.Random(options.seed)
+    for size in FLOW_BENCH_SIZES:
+        game_map = Map(rows=size, cols=size, seed=options.seed)
+        rows, cols = game_map.walkable_cells()
+        near_centre = np.flatnonzero((np.abs(rows - size // 2) < size // 4) & (np.abs(cols - size // 2) < size // 4))
+        goals = [(int(rows[i]), int(cols[i])) for i in rng.sample(list(near_centre), FLOW_BENCH_GOALS)]
+        if size <= FLOW_BENCH_FULL_MAP_MAX:
+            for goal in goals:
+                with timer.phase(f'full_map_{size}'):
+                    FlowField(game_map, radius=size).update(*goal)
+        field = FlowField(game_map)
+        for goal in goals:
+            field = FlowField(game_map)
+            with timer.phase(f'cold_{size}'):
+                field.update(*goal)
+
+        # Walk the goal around like a player would; updates on the same tile are free
+        goal = goals[-1]
+        for _ in range(FLOW_BENCH_STEPS):
+            d_row, d_col = rng.choice(DIRECTIONS)
+            if not game_map.is_collidable(goal[0] + d_row, goal[1] + d_col):
+                goal = (goal[0] + d_row, goal[1] + d_col)
+            with timer.phase(f'step_{size}'):
+                field.update(*goal)
+
+        creatures = EntityPool(seed=options.seed)
+        creatures.spawn_random(game_map, FLOW_BENCH_AGENTS, (goal[1] + 0.5) * TILE_SIZE, (goal[0] + 0.5) * TILE_SIZE,
+                               field.radius * TILE_SIZE)
+        for _ in range(options.frames // 10):
+            with timer.phase(f'steer_{FLOW_BENCH_AGENTS}_{size}'):
+                creatures.steer(field)
+            creatures.update(game.tick_dt, game_map)
+
+        window = bytearray(field.walkable.astype(np.uint8).tobytes())
+        height, width = field.walkable.shape
+        target = (goal[0] - field.row0) * width + goal[1] - field.col0
+        starts = rng.sample(list(np.flatnonzero(np.isfinite(field.distance))), FLOW_BENCH_SEARCH_AGENTS)
+        with timer.phase(f'astar_{FLOW_BENCH_SEARCH_AGENTS}x_{size}'):
+            for start in starts:
+                _astar(window, height, width, int(start), target)
+    return {}
+
+def scenario_worldgen(game, timer, options):
+    """Seeded map generation on 1, 2, 4... worker processes (up to the CPU count), checking the
+    parallel output matches the serial one."""
+    generator = get_generator()
+    cpus = os.cpu_count() or 1
+    worker_counts = [1 << i for i in range(cpus.bit_length()) if 1 << i <= cpus]
+    if worker_counts[-1] != cpus:
+        worker_counts.append(cpus)
+    results = {}
+    for size in WORLDGEN_BENCH_SIZES:
+        serial = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            with timer.phase(f'generate_{size}_x{workers}'):
+                if workers == 1:
+                    tiles = generator.generate(options.seed, size, size, workers=1)
+                else:
+                    tiles = generator.generate_parallel(options.seed, size, size, workers)
+            elapsed = time.perf_counter() - start
+            if serial is None:
+                serial, serial_time = tiles, elapsed
+            else:
+                results[f'speedup_{size}_x{workers}'] = serial_time / elapsed
+                results[f'identical_{size}_x{workers}'] = float(np.array_equal(tiles, serial))
+            results[f'mtiles_per_sec_{size}_x{workers}'] = size * size / elapsed / 1e6
+            del tiles
+    return results
+
+def scenario_frame_rates(game, timer, options):
+    """Walks the player right across open ground for the same simulated time, fed in as
+    frames of each FRAME_RATE_BENCH_RATES rate (fixed 60 Hz ticks), and then with the
+    simulation itself ticking at each rate. Reports the distance of every run at exactly
+    the time fed in: the simulated position plus the velocity over the time that hasn't
+    made a whole tick yet. They should all equal PLAYER_SPEED * FRAME_RATE_BENCH_SECONDS."""
+    rng = np.random.default_rng(options.seed)
+    seconds = FRAME_RATE_BENCH_SECONDS
+    size = int(PLAYER_SPEED * seconds / TILE_SIZE) + 8
+    game.map = Map(data=np.full((size, size), TILE_TYPE_GRASS, dtype=np.uint8))
+    game.creatures = EntityPool(seed=options.seed)
+    game.game_state = GameState.PLAYING
+    start_x = start_y = 2 * TILE_SIZE
+
+    def frame_times(rate):
+        if rate is not None:
+            return [1.0 / rate] * round(seconds * rate)
+        times = rng.uniform(0.0002, 0.003, int(seconds / 0.0002) + 1)
+        times = times[:np.searchsorted(np.cumsum(times), seconds) + 1]
+        times[-1] -= times.sum() - seconds # Land exactly on `seconds`
+        return times.tolist()
+
+    def walk(phase, times, tick_dt):
+        game.player = Player(start_x, start_y, key_state=ScriptedKeys([(1 << 30, (pygame.K_d,))]))
+        game.tick_dt = tick_dt
+        game._accumulator = 0.0
+        game._reset_interpolation()
+        for frame_time in times:
+            with timer.phase(phase):
+                game.step_frame(frame_time)
+        return game.player.x + game.player.vx * game._accumulator - start_x
+
+    distances = {}
+    for rate in FRAME_RATE_BENCH_RATES:
+        name = f'{rate}fps' if rate else 'uncapped'
+        distances[f'distance_{name}'] = walk(f'frame_{name}', frame_times(rate), 1.0 / SIMULATION_TICK_RATE)
+    for rate in FRAME_RATE_BENCH_RATES:
+        if rate: # Ticks need a fixed rate
+            distances[f'distance_tick_{rate}hz'] = walk(f'tick_{rate}hz', frame_times(rate), 1.0 / rate)
+    values = list(distances.values())
+    return dict(distances, expected_px=PLAYER_SPEED * seconds, max_spread_px=max(values) - min(values))
+
+
+SCENARIOS = {
+    'walk': scenario_walk,
+    'zoom_sweep': scenario_zoom_sweep,
+    'zoom_animate': scenario_zoom_animate,
+    'zoom_sweep_raster': scenario_zoom_sweep_raster,
+    'pause_menu': scenario_pause_menu,
+    'slot_screen': scenario_slot_screen,
+    'new_game': scenario_new_game,
+    'save_load': scenario_save_load,
+    'creatures': scenario_creatures,
+    'spatial_hash': scenario_spatial_hash,
+    'pathfinding': scenario_pathfinding,
+    'flow_field': scenario_flow_field,
+    'worldgen': scenario_worldgen,
+    'frame_rates': scenario_frame_rates,
+}
+
+
+def run_benchmarks(options):
+    """Runs the selected scenarios, each on a fresh Game, inside a scratch save directory."""
+    results = {
+        'format': RESULTS_FORMAT,
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'frames': options.frames,
+            'seed': options.seed,
+            'map_sizes': list(options.map_sizes),
+        },
+        'scenarios': {},
+    }
+    work_dir = tempfile.mkdtemp(prefix='durango_bench_')
+    old_cwd = os.getcwd()
+    os.chdir(work_dir) # Save slots are written relative to the working directory
+    try:
+        for name in options.scenarios:
+            game = Game(headless=True, seed=options.seed)
+            timer = PhaseTimer()
+            with contextlib.redirect_stdout(io.StringIO()): # The game's status prints
+                throughput = SCENARIOS[name](game, timer, options)
+            game.save_worker.shutdown()
+            results['scenarios'][name] = {
+                'phases': timer.summary(),
+                'throughput': {key: round(value, 3) for key, value in throughput.items()},
+            }
+            print(f"{name}: done")
+    finally:
+        os.chdir(old_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Returns a list of regression messages: phases whose p50 or p95 got slower by more
+    than `threshold` (relative) and MIN_REGRESSION_MS (absolute), and throughput that dropped
+    by more than `threshold`."""
+    regressions = []
+    for name, scenario in current['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            continue
+        for phase, stats in scenario['phases'].items():
+            base_stats = base['phases'].get(phase)
+            if base_stats is None:
+                continue
+            for key in ('p50', 'p95'):
+                old, new = base_stats[key], stats[key]
+                if new - old > MIN_REGRESSION_MS and new > old * (1 + threshold):
+                    regressions.append(f"{name}/{phase} {key}: {old:.3f} ms -> {new:.3f} ms (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+        for key, new in scenario['throughput'].items():
+            old = base['throughput'].get(key)
+            if old and new < old * (1 - threshold):
+                regressions.append(f"{name}/{key}: {old:.1f} -> {new:.1f} ({(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def check_budgets(results):
+    """Returns messages for phases whose p95 exceeds its absolute budget in BUDGETS,
+    and for throughput figures above their THROUGHPUT_LIMITS."""
+    over = []
+    for (name, phase), budget_ms in BUDGETS.items():
+        stats = results['scenarios'].get(name, {}).get('phases', {}).get(phase)
+        if stats and stats['p95'] > budget_ms:
+            over.append(f"{name}/{phase} p95: {stats['p95']:.3f} ms exceeds its {budget_ms:.3f} ms budget")
+    for (name, key), limit in THROUGHPUT_LIMITS.items():
+        value = results['scenarios'].get(name, {}).get('throughput', {}).get(key)
+        if value is not None and value > limit:
+            over.append(f"{name}/{key}: {value:.3f} exceeds its {limit:.3f} limit")
+    return over
+
+
+def print_summary(results):
+    for name, scenario in results['scenarios'].items():
+        print(f"\n{name}")
+        for phase, stats in scenario['phases'].items():
+            print(f"  {phase:<18} p50 {stats['p50']:9.3f}  p95 {stats['p95']:9.3f}  p99 {stats['p99']:9.3f} ms  (n={stats['count']})")
+        for key, value in scenario['throughput'].items():
+            print(f"  {key:<18} {value:.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless gameplay benchmarks')
+    parser.add_argument('--scenario', dest='scenarios', action='append', choices=sorted(SCENARIOS),
+                        help='scenario to run (repeatable; default: all)')
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES, help='frames per frame-based scenario')
+    parser.add_argument('--map-sizes', type=int, nargs='+', default=list(DEFAULT_MAP_SIZES),
+                        help='square map sizes (tiles) for save_load')
+    parser.add_argument('--seed', type=int, default=1, help='world and input seed')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='results JSON to check for regressions against')
+    parser.add_argument('--compare', metavar='RESULTS', help='compare this stored results JSON instead of running')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='relative slowdown that counts as a regression')
+    options = parser.parse_args(argv)
+    options.scenarios = options.scenarios or list(SCENARIOS)
+
+    if options.compare:
+        if not options.baseline:
+            parser.error('--compare needs --baseline')
+        with open(options.compare) as f:
+            results = json.load(f)
+    else:
+        results = run_benchmarks(options)
+        print_summary(results)
+        if options.output:
+            with open(options.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"\nResults written to {options.output}")
+
+    status = 0
+    over_budget = check_budgets(results)
+    if over_budget:
+        print(f"\n{len(over_budget)} phase(s) over budget:")
+        for message in over_budget:
+            print(f"  {message}")
+        status = 1
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, options.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {options.baseline}:")
+            for message in regressions:
+                print(f"  {message}")
+            status = 1
+        else:
+            print(f"\nNo regressions against {options.baseline}.")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,8 @@
 
 import pygame
 from config import * # Import necessary constants for Button styling
+from profiler import tracer
+from text_cache import text_cache
 
 class Button:
     def __init__(self, x, y, width, height, text, action=None):
@@ -11,16 +13,23 @@ class Button:
         self.color = BUTTON_COLOR
         self.hover_color = BUTTON_HOVER_COLOR
         self.text_color = TEXT_COLOR
-        self.font = pygame.font.Font(None, BUTTON_FONT_SIZE)
+        self.font_size = BUTTON_FONT_SIZE # Label is rendered through the shared text_cache
         self.is_hovered = False
+        self._drawn_state = None # What the last draw() showed, for dirty-rect menus
+
+    def needs_redraw(self):
+        """True if the button looks different from its last draw()."""
+        return self._drawn_state != (self.is_hovered, self.text, tuple(self.rect))
 
     def draw(self, surface):
+        self._drawn_state = (self.is_hovered, self.text, tuple(self.rect))
         current_color = self.hover_color if self.is_hovered else self.color
         pygame.draw.rect(surface, current_color, self.rect)
         
-        text_surface = self.font.render(self.text, True, self.text_color)
+        text_surface = text_cache.render(self.text, self.font_size, self.text_color)
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
+        tracer.draw_calls += 2 # Background rect and label
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEMOTION:
@@ -1,5 +1,6 @@
 # durango_wildlands_clone/config.py
 
+import os
 import pygame
 
 # Screen Dimensions
@@ -76,4 +77,120 @@ BUTTON_HEIGHT = 40
 BUTTON_SPACING = 10
 BUTTON_FONT_SIZE = 30
 TITLE_FONT_SIZE = 74
-SMALL_FONT_SIZE = 36
\ No newline at end of file
+SMALL_FONT_SIZE = 36
+
+# Map rendering
+CHUNK_SIZE_TILES = 16 # Map is rasterized and cached in square chunks of this many tiles
+CHUNK_CACHE_MAX_BYTES = 96 * 1024 * 1024 # Memory budget for cached chunk surfaces (LRU-evicted)
+MAP_RENDER_MODE = 'chunks' # 'chunks' (cached sprite chunks) or 'raster' (flat tile colors, one paletted pixel per tile)
+RASTER_MAX_TILES = 4096 # Maps up to this many tiles a side are rastered whole; bigger ones in a window around the camera
+RASTER_MARGIN_TILES = 16 # Extra tiles rastered on each side of the view, so small camera moves don't rebuild the window
+RENDER_MODE_TOGGLE_KEY = pygame.K_F6 # Switches the map between the two render modes
+MIP_LEVELS = 4 # Chunk pyramid levels: level k covers 2**k x 2**k chunks at 1/2**k scale (see level/chunk_pyramid.py)
+MIP_CACHE_MAX_BYTES = 64 * 1024 * 1024 # Memory budget for pyramid surfaces above level 0 (LRU-evicted)
+
+# Zoom
+ZOOM_MIN = 1 / 16
+ZOOM_MAX = 2.0
+ZOOM_STEP = 1.25 # Zoom factor per mouse wheel notch or zoom key press
+ZOOM_SMOOTHING = 12.0 # How fast the zoom eases towards its target (per second; higher is snappier)
+ZOOM_IN_KEYS = (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS)
+ZOOM_OUT_KEYS = (pygame.K_MINUS, pygame.K_KP_MINUS)
+ZOOM_RESET_KEYS = (pygame.K_0, pygame.K_KP0) # Back to INITIAL_ZOOM_LEVEL
+
+# Sprites (see assets.py)
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+SPRITE_FILES = { # Sprite name -> image file under ASSET_DIR. Sprites without one are drawn as flat-colour placeholders
+    # 'tile_1': 'tiles/grass.png',
+    # 'player': 'player.png',
+    # 'creature_deer': 'creatures/deer.png',
+}
+ASSET_PRELOAD = ('tiles', 'entities') # Sprite sheets loaded and packed into atlases at startup instead of on first draw
+ATLAS_MAX_WIDTH = 1024 # Atlas sheets wrap onto a new shelf (row) past this many pixels
+ATLAS_ZOOM_CACHE_ENTRIES = 8 # Pre-scaled atlases kept per sheet (one per zoom level, LRU-evicted)
+
+# World generation
+WORLD_GENERATOR = 'threshold' # 'threshold' (per-tile random roll) or 'noise' (fractal value noise)
+WORLD_NOISE_SCALE = 24 # Tiles per lattice cell of the coarsest noise octave
+WORLD_GEN_WORKERS = None # Processes for generating large maps (None = one per CPU, 1 = never parallel)
+WORLD_GEN_PARALLEL_MIN_TILES = 1 << 22 # Maps at least this big (2048 x 2048) are generated in parallel (Map, main thread only)
+WORLD_GEN_REGION_TILES = 512 # Side of the square regions a parallel generation is split into
+
+# World streaming (open world made of chunks generated or loaded around the player)
+WORLD_STREAMING = True # False = the classic fixed MAP_WIDTH_TILES x MAP_HEIGHT_TILES map
+STREAM_WORLD_SIZE_TILES = 1 << 20 # Width and height of the streamed world; it is never held in memory at once
+STREAM_LOAD_RADIUS_CHUNKS = 2 # Chunks around the player that are kept loaded
+STREAM_UNLOAD_RADIUS_CHUNKS = 4 # Chunks farther than this (and off camera) are evicted to the chunk store
+
+# Simulation timing
+SIMULATION_TICK_RATE = 60 # Fixed simulation ticks per second, independent of the render FPS
+MAX_FRAME_TIME = 0.25 # Seconds of real time one rendered frame may feed into the simulation (avoids a spiral of death after a stall)
+
+# Profiling (see profiler.py)
+TRACE_BUFFER_SPANS = 1 << 16 # Timing spans kept in the tracer's ring buffer
+PROFILER_GRAPH_FRAMES = 240 # Frames shown in the overlay's frame-time graph (also the top-spans window)
+PROFILER_TOP_SPANS = 8 # Spans listed in the overlay
+PROFILER_TOGGLE_KEY = pygame.K_F3 # Shows/hides the profiler overlay (traces while it's shown)
+TRACE_EXPORT_KEY = pygame.K_F4 # Writes the buffered spans as a Chrome trace (while tracing)
+TRACE_TOGGLE_KEY = pygame.K_F5 # Starts/stops tracing without the overlay
+TRACE_EXPORT_PATH = 'trace.json' # Where TRACE_EXPORT_KEY writes unless a --trace path was given
+
+# Input recording and replay (see replay.py)
+REPLAY_KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d) # Held keys recorded every tick (the ones Player polls)
+REPLAY_EVENT_ATTRS = { # Event types a recording keeps, and the attributes Game reads from each
+    pygame.QUIT: (),
+    pygame.KEYDOWN: ('key', 'mod', 'unicode'),
+    pygame.MOUSEMOTION: ('pos',),
+    pygame.MOUSEBUTTONDOWN: ('pos', 'button'),
+    pygame.MOUSEWHEEL: ('x', 'y'),
+    pygame.WINDOWFOCUSLOST: (),
+    pygame.WINDOWFOCUSGAINED: (),
+    pygame.WINDOWMINIMIZED: (),
+    pygame.WINDOWRESTORED: (),
+    pygame.WINDOWEXPOSED: (),
+}
+
+# UI text
+TEXT_CACHE_MAX_ENTRIES = 256 # Rendered text surfaces kept by the shared TextCache (LRU-evicted)
+
+# Idle mode (static menus, unfocused window)
+IDLE_WAIT_MS = 200 # Longest the loop blocks waiting for input when idle (keep under MAX_FRAME_TIME so no simulated time is dropped)
+
+# Creatures (see entities.py)
+CREATURE_KINDS = ( # (name, size in pixels, wander speed in pixels/second, color)
+    ('deer', 24, 70, (170, 120, 70)),
+    ('rabbit', 12, 110, (210, 210, 200)),
+    ('boar', 20, 55, (90, 60, 40)),
+)
+CREATURE_COUNT = 300 # Creatures spawned around the player for a new or loaded game
+CREATURE_SPAWN_RADIUS_TILES = 24
+
+# Spatial hash (see spatial_hash.py)
+SPATIAL_HASH_CELL_TILES = 2 # Cell size in tiles; must be at least as large as any hashed box
+CREATURE_FLEE_RADIUS = 160 # Creatures within this many pixels of the player run away
+CREATURE_FLEE_SPEED_FACTOR = 1.8 # Flee speed relative to the creature's wander speed
+CREATURE_FLEE_SECONDS = 1.5
+
+# Pathfinding (see level/pathfinding.py)
+PATH_CLUSTER_TILES = CHUNK_SIZE_TILES # HPA* cluster size; matching the chunks means streaming a chunk touches one cluster
+PATH_ENTRANCE_SPLIT = 6 # Border entrances at least this wide get a portal at each end instead of one in the middle
+PATH_DIRECT_SEARCH_CLUSTERS = 1 # Start and goal within this many clusters: try an exact A* over the window around them first
+PATH_CACHE_MAX_ENTRIES = 512 # Found paths kept in the LRU path cache
+PATH_BUDGET_MS = 2.0 # Time per tick spent answering queued path requests
+
+# Flow fields (see level/flow_field.py)
+FLOW_FIELD_RADIUS_TILES = 32 # A field covers this many tiles around its goal
+FLOW_FIELD_RECENTER_TILES = 12 # The goal may wander this far from the window's centre before the window moves
+CREATURE_STEER_HOLD_SECONDS = 0.5 # A creature steered along a flow field keeps that heading this long
+
+# Multiplayer server and bot clients (see net/)
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 7777
+SERVER_WORLDS = 1 # Worlds one server hosts; each client joins one of them
+SERVER_SESSIONS_PER_WORLD = 256 # Further clients for a full world are turned away
+SERVER_SNAPSHOT_INTERVAL_TICKS = 3 # Ticks between state snapshots (3 at 60 ticks/s = 20 snapshots/s)
+SERVER_SNAPSHOT_HISTORY = 32 # Snapshots kept per client as delta baselines; older acks get a full snapshot
+SERVER_VIEW_MARGIN = 64 # Pixels around a client's camera view that are sent too, so things don't pop in at the edge
+SERVER_MAX_SEND_BUFFER = 256 * 1024 # Bytes queued to a client beyond which its snapshots are skipped until it catches up
+SERVER_REPORT_SECONDS = 5.0 # How often the server prints tick times and bandwidth
+BOT_KEY_HOLD_SECONDS = (0.3, 2.0) # Bots hold each random set of movement keys this long (range)
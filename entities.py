@@ -0,0 +1,307 @@
+# durango_wildlands_clone/entities.py
+
+import numpy as np
+import pygame
+from config import TILE_SIZE, CREATURE_KINDS, CREATURE_FLEE_SPEED_FACTOR, CREATURE_FLEE_SECONDS, \
+                   CREATURE_STEER_HOLD_SECONDS
+from spatial_hash import SpatialHash
+from assets import assets
+
+def _placeholder_sprite(size, color):
+    """Flat ellipse, drawn for a creature kind without an image."""
+    def draw():
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.ellipse(sprite, color, sprite.get_rect())
+        return sprite
+    return draw
+
+for _name, _size, _speed, _color in CREATURE_KINDS:
+    assets.declare('entities', f'creature_{_name}', (_size, _size), _placeholder_sprite(_size, _color))
+
+# Creature behaviour states
+STATE_IDLE = 0
+STATE_WANDER = 1
+STATE_FLEE = 2
+STATE_SEEK = 3 # Following a flow field
+
+class EntityPool:
+    """Struct-of-arrays store for large numbers of simple creatures (wildlife, NPCs).
+
+    Every attribute lives in its own contiguous NumPy array indexed by slot, and
+    update() moves all creatures in a few vectorized passes instead of one Python
+    object per creature. Slots 0..count-1 are live; removing a creature moves the
+    last one into its slot, so slots are not stable -- `ids` holds a stable id per slot.
+    Every creature is also in `spatial` (a SpatialHash) for proximity queries.
+
+    Positions are float world pixels (top-left of the creature's box). Creatures are
+    smaller than a tile and move less than a tile per tick, so a box spans at most
+    two tile rows/columns and a move can only enter the next row/column.
+    """
+
+    # One contiguous array per attribute
+    FIELDS = (
+        ('x', np.float64), ('y', np.float64),           # World pixels
+        ('prev_x', np.float64), ('prev_y', np.float64), # Position at the start of the last tick (for interpolation)
+        ('vx', np.float32), ('vy', np.float32),         # Pixels per second
+        ('size', np.int16),                             # Box width = height, pixels
+        ('speed', np.float32),
+        ('kind', np.uint8),                             # Index into CREATURE_KINDS
+        ('state', np.uint8),
+        ('timer', np.float32),                          # Seconds until the next wander decision
+        ('ids', np.int64),                              # Stable id of the creature in each slot
+        ('handle', np.int64),                           # The creature's box in self.spatial
+    )
+
+    def __init__(self, capacity=1024, seed=None):
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+        self._next_id = 0
+        self._sprite_zoom = None
+        self._sprite_cache = []
+        self.spatial = SpatialHash()
+        self._slot_of_handle = np.zeros(0, dtype=np.int64) # spatial handle -> slot
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """(Re)allocates every per-creature array with room for `capacity`, keeping live slots."""
+        for name, dtype in self.FIELDS:
+            array = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:self.count] = old[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    # --- Spawning / removal ---
+    def spawn(self, x, y, kind):
+        """Adds creatures of `kind` at arrays (or scalars) of world pixel positions. Returns their ids."""
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        n = len(x)
+        if self.count + n > self.capacity:
+            self._allocate(max(self.capacity * 2, self.count + n))
+        s = slice(self.count, self.count + n)
+        _, size, speed, _ = CREATURE_KINDS[kind]
+        self.x[s] = self.prev_x[s] = x
+        self.y[s] = self.prev_y[s] = y
+        self.vx[s] = self.vy[s] = 0
+        self.size[s] = size
+        self.speed[s] = speed
+        self.kind[s] = kind
+        self.state[s] = STATE_IDLE
+        self.timer[s] = self.rng.uniform(0, 2, n) # Stagger the first decisions
+        ids = np.arange(self._next_id, self._next_id + n)
+        self.ids[s] = ids
+        handles = self.spatial.insert_many(x, y, np.full(n, size), np.full(n, size))
+        self.handle[s] = handles
+        if len(self._slot_of_handle) < self.spatial.capacity:
+            grown = np.zeros(self.spatial.capacity, dtype=np.int64)
+            grown[:len(self._slot_of_handle)] = self._slot_of_handle
+            self._slot_of_handle = grown
+        self._slot_of_handle[handles] = np.arange(s.start, s.stop)
+        self._next_id += n
+        self.count += n
+        return ids
+
+    def spawn_random(self, game_map, count, center_x, center_y, radius):
+        """Spawns `count` creatures of random kinds on walkable tiles within `radius` pixels of a point."""
+        rows, cols = game_map.walkable_cells()
+        near = (np.abs(cols * TILE_SIZE - center_x) <= radius) & (np.abs(rows * TILE_SIZE - center_y) <= radius)
+        rows, cols = rows[near], cols[near]
+        if not len(rows):
+            return np.empty(0, dtype=np.int64)
+        picks = self.rng.integers(0, len(rows), count)
+        kinds = self.rng.integers(0, len(CREATURE_KINDS), count)
+        ids = []
+        for kind in range(len(CREATURE_KINDS)):
+            chosen = picks[kinds == kind]
+            size = CREATURE_KINDS[kind][1]
+            # Centered in its tile, so a fresh creature never overlaps a blocked neighbour
+            ids.append(self.spawn(cols[chosen] * TILE_SIZE + (TILE_SIZE - size) / 2,
+                                  rows[chosen] * TILE_SIZE + (TILE_SIZE - size) / 2, kind))
+        return np.concatenate(ids)
+
+    def remove(self, slot):
+        """Removes the creature in `slot` by moving the last live creature into it."""
+        last = self.count - 1
+        self.spatial.remove(self.handle[slot])
+        for name, _ in self.FIELDS:
+            array = getattr(self, name)
+            array[slot] = array[last]
+        self._slot_of_handle[self.handle[slot]] = slot
+        self.count -= 1
+
+    def clear(self):
+        self.count = 0
+        self.spatial.clear()
+
+    # --- Simulation ---
+    def update(self, dt, game_map):
+        """Advances every creature by one tick: wander decisions, then movement with tile collision."""
+        n = self.count
+        if not n:
+            return
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        self._decide(dt, n)
+        self._move_axis(dt, game_map, n, horizontal=True)
+        self._move_axis(dt, game_map, n, horizontal=False)
+        self.spatial.move_many(self.handle[:n], self.x[:n], self.y[:n])
+
+    def scare(self, center_x, center_y, radius):
+        """Creatures within `radius` pixels of a point (e.g. the player) run straight away from it."""
+        slots = self.near(center_x, center_y, radius)
+        if len(slots):
+            self._flee(slots, center_x, center_y)
+        return slots
+
+    def scare_many(self, centers_x, centers_y, radius):
+        """scare() for several points at once (e.g. every player in a server world): creatures
+        within `radius` pixels of any of them run from the nearest one.
+
+        One (points x creatures) distance matrix instead of a spatial query per point, which
+        is cheaper once there are more than a handful of points.
+        """
+        n = self.count
+        centers_x = np.asarray(centers_x, dtype=np.float64)[:, None]
+        centers_y = np.asarray(centers_y, dtype=np.float64)[:, None]
+        if not n or not len(centers_x):
+            return np.empty(0, dtype=np.int64)
+        x, y, size = self.x[:n], self.y[:n], self.size[:n]
+        # Distance from each point to the nearest point of each box, as in SpatialHash.query_radius
+        dx = np.maximum(np.maximum(x - centers_x, centers_x - (x + size)), 0)
+        dy = np.maximum(np.maximum(y - centers_y, centers_y - (y + size)), 0)
+        distance = dx * dx + dy * dy
+        nearest = distance.argmin(axis=0)
+        slots = np.nonzero(distance[nearest, np.arange(n)] <= radius * radius)[0]
+        if len(slots):
+            self._flee(slots, centers_x[nearest[slots], 0], centers_y[nearest[slots], 0])
+        return slots
+
+    def _flee(self, slots, center_x, center_y):
+        """Sends creatures running straight away from a point (or one point per creature)."""
+        half = self.size[slots] / 2
+        away_x = self.x[slots] + half - center_x
+        away_y = self.y[slots] + half - center_y
+        length = np.maximum(np.hypot(away_x, away_y), 1e-6)
+        speed = self.speed[slots] * CREATURE_FLEE_SPEED_FACTOR
+        self.vx[slots] = away_x / length * speed
+        self.vy[slots] = away_y / length * speed
+        self.state[slots] = STATE_FLEE
+        self.timer[slots] = CREATURE_FLEE_SECONDS
+
+    def steer(self, flow_field, slots=None):
+        """Heads creatures (all, or `slots`) along a FlowField towards its goal at their wander speed.
+        Call it every tick while they should follow the field; creatures the field can't guide
+        (outside its window, no way through, already there) are left alone."""
+        slots = np.arange(self.count) if slots is None else np.asarray(slots)
+        half = self.size[slots] / 2
+        dx, dy = flow_field.directions_at(self.x[slots] + half, self.y[slots] + half)
+        guided = (dx != 0) | (dy != 0)
+        slots = slots[guided]
+        speed = self.speed[slots]
+        self.vx[slots] = dx[guided] * speed
+        self.vy[slots] = dy[guided] * speed
+        self.state[slots] = STATE_SEEK
+        self.timer[slots] = CREATURE_STEER_HOLD_SECONDS
+        return slots
+
+    def _decide(self, dt, n):
+        """Creatures whose timer ran out either stop for a while or pick a new random heading."""
+        timer = self.timer[:n]
+        timer -= dt
+        due = np.flatnonzero(timer <= 0)
+        if not len(due):
+            return
+        wander = self.rng.random(len(due)) < 0.6
+        angle = self.rng.uniform(0, 2 * np.pi, len(due))
+        speed = np.where(wander, self.speed[due], 0)
+        self.vx[due] = np.cos(angle) * speed
+        self.vy[due] = np.sin(angle) * speed
+        self.state[due] = np.where(wander, STATE_WANDER, STATE_IDLE)
+        timer[due] = self.rng.uniform(1, 4, len(due))
+
+    def _move_axis(self, dt, game_map, n, horizontal):
+        """Moves every creature along one axis, stopping flush against collidable tiles.
+
+        Only the tile row/column the leading edge moves into is tested (moves are
+        shorter than a tile), across the one or two tiles the box spans on the other axis.
+        A creature that bumps into something drops its heading and decides again next tick.
+        """
+        pos, other = (self.x, self.y) if horizontal else (self.y, self.x)
+        velocity = self.vx if horizontal else self.vy
+        pos, other, velocity, size = pos[:n], other[:n], velocity[:n], self.size[:n]
+        step = np.clip(velocity * dt, -(TILE_SIZE - 1), TILE_SIZE - 1)
+        moving = np.flatnonzero(step != 0)
+        if not len(moving):
+            return
+        start, step, size, other = pos[moving], step[moving], size[moving].astype(np.float64), other[moving]
+        target = start + step
+        new = target.copy()
+
+        forward = step > 0
+        leading_edge = np.where(forward, target + size - 1e-6, target)
+        entered = np.floor(leading_edge / TILE_SIZE)
+        previous = np.where(forward, np.floor((start + size - 1e-6) / TILE_SIZE), np.floor(start / TILE_SIZE))
+        # Most moves stay inside the tile they started in, with nothing new to hit, so only
+        # the ones crossing into the next row/column are looked up in the map
+        crossing = np.flatnonzero(entered != previous)
+        if len(crossing):
+            entered, forward, size_crossing, other = entered[crossing], forward[crossing], size[crossing], other[crossing]
+            cells = entered.astype(np.int64)
+            first = np.floor(other / TILE_SIZE).astype(np.int64)
+            last = np.floor((other + size_crossing - 1e-6) / TILE_SIZE).astype(np.int64)
+            if horizontal:
+                blocked = game_map.collidable_at(first, cells) | game_map.collidable_at(last, cells)
+            else:
+                blocked = game_map.collidable_at(cells, first) | game_map.collidable_at(cells, last)
+            hit = crossing[blocked]
+            entered, forward, size_crossing = entered[blocked], forward[blocked], size_crossing[blocked]
+            new[hit] = np.where(forward, entered * TILE_SIZE - size_crossing, (entered + 1) * TILE_SIZE)
+        # Stay inside the map
+        extent = game_map.width if horizontal else game_map.height
+        np.clip(new, 0, extent - size, out=new)
+        pos[moving] = new
+
+        # Blocked moves end flush against the tile, short of the target, so they count as bumped too
+        bumped = moving[new != target]
+        if len(bumped):
+            self.vx[bumped] = 0
+            self.vy[bumped] = 0
+            self.timer[bumped] = 0
+
+    # --- Queries / drawing ---
+    def in_rect(self, left, top, width, height):
+        """Slots of the creatures whose boxes overlap a world-pixel rect."""
+        return self._slot_of_handle[self.spatial.query_rect(left, top, width, height)]
+
+    def near(self, center_x, center_y, radius):
+        """Slots of the creatures within `radius` pixels of a point."""
+        return self._slot_of_handle[self.spatial.query_radius(center_x, center_y, radius)]
+
+    def overlapping_pairs(self):
+        """(n, 2) array of slot pairs whose boxes overlap."""
+        return self._slot_of_handle[self.spatial.overlapping_pairs()]
+
+    def draw(self, surface, view_rect, offset_x, offset_y, zoom_level, alpha=1.0):
+        """Draws the creatures inside `view_rect` (world pixels: the camera view from Game.update).
+
+        Positions are blended between the last two ticks by `alpha`, like the player's.
+        """
+        visible = self.in_rect(*view_rect)
+        if not len(visible):
+            return 0
+        x = self.prev_x[visible] + (self.x[visible] - self.prev_x[visible]) * alpha
+        y = self.prev_y[visible] + (self.y[visible] - self.prev_y[visible]) * alpha
+        screen_x = ((x - offset_x) * zoom_level).astype(np.int64)
+        screen_y = ((y - offset_y) * zoom_level).astype(np.int64)
+        sprites = self._sprites(zoom_level)
+        surface.blits(list(zip((sprites[k] for k in self.kind[visible]), zip(screen_x.tolist(), screen_y.tolist()))), False)
+        return len(visible)
+
+    def _sprites(self, zoom_level):
+        """One pre-scaled sprite per creature kind (from the 'entities' atlas), looked up when the zoom level changes."""
+        if self._sprite_zoom != zoom_level:
+            self._sprite_zoom = zoom_level
+            self._sprite_cache = [assets.image('entities', f'creature_{name}', zoom_level) for name, *_ in CREATURE_KINDS]
+        return self._sprite_cache
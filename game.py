@@ -2,28 +2,37 @@
 
 import pygame
 import sys
+import os
+import math
 import random
-import json
-import os 
+import time
 from enum import Enum
 from config import * # Import all constants
 from player import Player
+from entities import EntityPool
 from button import Button 
 from level.map import Map # Import Map from the level package
-from level.tile import Tile # Corrected: Added this import
+from level.streaming_map import StreamingMap
+import save_format
+from save_format import SaveFormatError
+from save_worker import SaveWorker
+from profiler import tracer, traced, ProfilerOverlay
+from text_cache import text_cache
+from assets import assets
+from replay import InputRecorder, Playback, ReplayStats
 
 # --- InputBox Class ---
 class InputBox:
-    def __init__(self, x, y, width, height, text='', font=None):
+    def __init__(self, x, y, width, height, text='', font_size=INPUT_BOX_FONT_SIZE):
         self.rect = pygame.Rect(x, y, width, height)
         self.color_inactive = INPUT_BOX_COLOR_INACTIVE
         self.color_active = INPUT_BOX_COLOR_ACTIVE
         self.outline_color = INPUT_BOX_OUTLINE_COLOR
         self.text_color = INPUT_BOX_TEXT_COLOR
         self.text = text
-        self.font = font if font else pygame.font.Font(None, INPUT_BOX_FONT_SIZE)
+        self.font_size = font_size # Text is rendered through the shared text_cache
         self.active = False 
-        self.txt_surface = self.font.render(text, True, self.text_color)
+        self._drawn_state = None # What the last draw() showed, for dirty-rect menus
         self.placeholder_text = "Enter filename..." 
 
     def handle_event(self, event):
@@ -40,18 +49,22 @@ class InputBox:
                     self.text = self.text[:-1]
                 else:
                     self.text += event.unicode
-                self.txt_surface = self.font.render(self.text, True, self.text_color)
+
+    def needs_redraw(self):
+        """True if the box looks different from its last draw()."""
+        return self._drawn_state != (self.text, self.active, tuple(self.rect))
 
     def draw(self, surface):
+        self._drawn_state = (self.text, self.active, tuple(self.rect))
         current_fill_color = self.color_active if self.active else self.color_inactive
         pygame.draw.rect(surface, current_fill_color, self.rect)
         pygame.draw.rect(surface, self.outline_color, self.rect, 2) 
 
         if self.text:
-            text_surface = self.font.render(self.text, True, self.text_color)
+            text_surface = text_cache.render(self.text, self.font_size, self.text_color)
             surface.blit(text_surface, (self.rect.x + 5, self.rect.y + 5))
         else:
-            placeholder_surface = self.font.render(self.placeholder_text, True, (150,150,150))
+            placeholder_surface = text_cache.render(self.placeholder_text, self.font_size, (150,150,150))
             surface.blit(placeholder_surface, (self.rect.x + 5, self.rect.y + 5))
             
     def get_text(self):
@@ -59,7 +72,6 @@ class InputBox:
 
     def set_text(self, text):
         self.text = text
-        self.txt_surface = self.font.render(self.text, True, self.text_color)
 
 
 # Define Game States 
@@ -69,34 +81,69 @@ class GameState(Enum):
     PAUSE_MENU = 3
     SLOT_SELECTION = 4
     INPUT_TEXT_PROMPT = 5
+    LOADING = 6
+
+# Posted by the save worker when a job finishes, so an idle loop wakes up to apply it
+SAVE_WORKER_EVENT = pygame.event.custom_type()
+
+# States drawn as a menu over a frozen snapshot of the game (see Game._draw_menu_frame)
+MENU_STATES = (GameState.START_SCREEN, GameState.PAUSE_MENU, GameState.SLOT_SELECTION,
+               GameState.INPUT_TEXT_PROMPT, GameState.LOADING)
 
 class Game:
-    def __init__(self):
-        """Initializes the game, sets up the screen, and loads assets."""
+    def __init__(self, headless=False, seed=None, trace_path=None, record_path=None):
+        """Initializes the game, sets up the screen, and loads assets.
+
+        headless: run on SDL's dummy video driver (no window) for soak tests and fast-forwarding.
+        seed: seeds world generation and spawn points, for reproducible runs.
+        trace_path: trace from the start and write a Chrome trace there on exit.
+        record_path: record the session's input there on exit, for run_replay (see replay.py).
+        """
+        self.headless = headless
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy' # Must be set before the display is initialized
         pygame.init()
         # Initial screen setup (will be updated by _set_screen_mode)
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Durango Wildlands Clone")
+        assets.preload(ASSET_PRELOAD) # Needs the display, so the atlases are converted to its format
         self.clock = pygame.time.Clock()
         self.running = True
 
+        # Fixed-timestep simulation: update() always advances by tick_dt, however fast frames render
+        self.tick_dt = 1.0 / SIMULATION_TICK_RATE
+        self.tick_count = 0
+        self.render_alpha = 1.0 # How far the current frame is between the last two ticks
+        self._accumulator = 0.0 # Real time not yet simulated (less than one tick), see step_frame
+        self._prev_player_pos = None # Player/camera state at the start of the last tick, for interpolation
+        self._prev_camera = None
+        # Unseeded runs pick a seed anyway, so a recording can regenerate the same world
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed) # World seeds and spawn points
+        self.key_state = pygame.key.get_pressed # Player input source (swap in a scripted one for tests)
+
+        # Profiling: F3 shows the overlay (tracing while it's up), F5 traces without it, F4 exports a Chrome trace
+        self.trace_path = trace_path
+        self.profiler_overlay = ProfilerOverlay(tracer)
+        self.show_profiler = False
+        self.tracing = bool(trace_path) # Tracing asked for on its own (F5 or --trace), overlay or not
+        self._update_tracing()
+
         self.game_state = GameState.START_SCREEN
         self.fullscreen = False # New: Track fullscreen state
+        self.window_focused = True # Unfocused (or minimized) windows idle instead of running at FPS
 
         # Game components (initialized to None, will be set when playing or loading)
         self.map = None
         self.player = None
+        self.creatures = None
 
         # Camera settings
         self.camera_offset_x = 0
         self.camera_offset_y = 0
         self.zoom_level = INITIAL_ZOOM_LEVEL
-
-        # Fonts for UI text
-        self.title_font = pygame.font.Font(None, TITLE_FONT_SIZE)
-        self.button_font = pygame.font.Font(None, BUTTON_FONT_SIZE)
-        self.small_font = pygame.font.Font(None, SMALL_FONT_SIZE)
-        self.input_font = pygame.font.Font(None, INPUT_BOX_FONT_SIZE) 
+        self.target_zoom = INITIAL_ZOOM_LEVEL # zoom_level eases towards this (mouse wheel, zoom keys)
+        self.view_rect = (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT) # Camera view in world pixels, set by update()
 
         # --- Buttons for Start Screen ---
         self.start_button = Button(
@@ -149,12 +196,29 @@ class Game:
         self.slot_selection_buttons = []
         self.num_save_slots = 10
         self.slot_selection_mode = 'load' 
+        self.slot_index = save_format.SlotIndex(self.num_save_slots) # Cached slot names
+        self._slot_buttons_key = None # (screen size, mode, index version) the slot buttons were built for
+
+        # --- Background save/load ---
+        self.save_worker = SaveWorker(on_result=lambda: pygame.event.post(pygame.event.Event(SAVE_WORKER_EVENT)))
+        self._loading_slot = None
+        self._loading_started_ms = 0
+        self._state_before_load = GameState.START_SCREEN
+        self._loading_rect = None # Screen area the loading text and bar covered last frame
+
+        # --- Menu rendering: darkened game frame captured once, then dirty rects only ---
+        self._menu_background = None
+        self._menu_background_key = None # (screen size, map, player) the background shows
+        self._menu_key = None # Menu layout on screen; a change means a full redraw
 
         # --- Input Box for file naming / renaming ---
         self.current_input_box = None
         self.input_callback = None # Function to call when input is finished
         self.input_prompt_text = "" # Text displayed above the input box
 
+        # Wraps key_state, so it must come after it and before the first Player is made
+        self.recorder = InputRecorder(self, record_path) if record_path else None
+
     def _set_screen_mode(self):
         """Toggles between windowed and fullscreen modes."""
         if self.fullscreen:
@@ -176,6 +240,7 @@ class Game:
         
         # Adjusting layout for current screen size
         current_screen_width, current_screen_height = self.screen.get_size()
+        self._slot_buttons_key = (self.screen.get_size(), mode, self.slot_index.version)
         
         total_rows_height = (self.num_save_slots + 1) * (BUTTON_HEIGHT + BUTTON_SPACING) - BUTTON_SPACING
         start_y = (current_screen_height - total_rows_height) // 2
@@ -230,37 +295,44 @@ class Game:
         """Returns a dictionary of existing save files mapped to their slot numbers."""
         saves = {}
         for i in range(1, self.num_save_slots + 1):
-            filename_path = f'save_slot_{i}.json' 
-            if os.path.exists(filename_path):
-                try:
-                    with open(filename_path, 'r') as f:
-                        data = json.load(f)
-                        saves[f'slot_{i}'] = data.get('save_name', f"Unnamed Save {i}")
-                except (json.JSONDecodeError, KeyError):
-                    saves[f'slot_{i}'] = f"Corrupted Slot {i}"
-            else:
+            save_name = self.slot_index.name(i)
+            if save_name is save_format.SlotIndex.EMPTY:
                 saves[f'slot_{i}'] = f"Empty Slot {i}" 
+            elif save_name is save_format.SlotIndex.CORRUPTED:
+                saves[f'slot_{i}'] = f"Corrupted Slot {i}"
+            else:
+                saves[f'slot_{i}'] = save_name or f"Unnamed Save {i}"
         return saves
 
     def _initialize_game_components(self):
         """Initializes map and player for a new game."""
-        self.map = Map() 
+        if WORLD_STREAMING:
+            self.map = StreamingMap(seed=self.rng.getrandbits(63))
+            # Spawn near the middle of the world; load the chunks there to pick a spawn tile from
+            self.map.update_streaming(self.map.width // 2, self.map.height // 2)
+        else:
+            self.map = Map(seed=self.rng.getrandbits(63)) 
 
-        valid_spawn_tiles = []
-        for r_idx in range(self.map.rows):
-            for c_idx in range(self.map.cols):
-                tile = self.map.data[r_idx][c_idx] 
-                # Player can only spawn on non-collidable tiles (grass or dirt for now)
-                if not tile.is_collidable:
-                    valid_spawn_tiles.append((tile.rect.x, tile.rect.y))
+        # Player can only spawn on non-collidable tiles (grass or dirt for now)
+        spawn_rows, spawn_cols = self.map.walkable_cells()
 
         spawn_x, spawn_y = PLAYER_START_X, PLAYER_START_Y
-        if valid_spawn_tiles:
-            spawn_x, spawn_y = random.choice(valid_spawn_tiles)
+        if len(spawn_rows):
+            spawn_index = self.rng.randrange(len(spawn_rows))
+            spawn_x = int(spawn_cols[spawn_index]) * TILE_SIZE
+            spawn_y = int(spawn_rows[spawn_index]) * TILE_SIZE
         else:
             print("Warning: No valid spawn tiles found on the map. Spawning at default location.")
 
-        self.player = Player(spawn_x, spawn_y)
+        self.player = Player(spawn_x, spawn_y, key_state=self.key_state)
+        self._spawn_creatures()
+        self._reset_interpolation()
+
+    def _spawn_creatures(self):
+        """Populates the area around the player with wandering creatures (they aren't saved)."""
+        self.creatures = EntityPool(seed=self.rng.getrandbits(63))
+        self.creatures.spawn_random(self.map, CREATURE_COUNT, *self.player.center,
+                                    CREATURE_SPAWN_RADIUS_TILES * TILE_SIZE)
 
     # --- Button Action Methods ---
     def _start_new_game(self):
@@ -275,6 +347,7 @@ class Game:
     def _enter_slot_selection(self, mode):
         self._previous_game_state = self.game_state 
         self.game_state = GameState.SLOT_SELECTION
+        self.slot_index.refresh() # Pick up any slot files changed outside the game
         self._create_slot_selection_buttons(mode) 
         print(f"Entering Slot Selection for {mode.upper()}...")
 
@@ -286,6 +359,7 @@ class Game:
         self.game_state = GameState.START_SCREEN
         self.map = None
         self.player = None
+        self.creatures = None
         print("Exiting to Main Menu...")
 
     def _exit_game(self):
@@ -301,7 +375,7 @@ class Game:
             (self.screen.get_width() - INPUT_BOX_WIDTH) // 2, # Use current screen width
             self.screen.get_height() // 2,                     # Use current screen height
             INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT,
-            text='MySaveGame', font=self.input_font 
+            text='MySaveGame' 
         )
         self.current_input_box.active = True
         self.input_callback = self._finalize_save_with_filename 
@@ -321,7 +395,7 @@ class Game:
             (self.screen.get_width() - INPUT_BOX_WIDTH) // 2, 
             self.screen.get_height() // 2,                    
             INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT,
-            text=current_name, font=self.input_font
+            text=current_name
         )
         self.current_input_box.active = True
         self.input_callback = lambda filename: self._finalize_save_with_filename_and_slot(filename, slot_number)
@@ -338,7 +412,7 @@ class Game:
             (self.screen.get_width() - INPUT_BOX_WIDTH) // 2, 
             self.screen.get_height() // 2,                    
             INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT,
-            text=initial_name, font=self.input_font
+            text=initial_name
         )
         self.current_input_box.active = True
         self.input_callback = lambda new_name: self._finalize_rename_filename(slot_number, new_name)
@@ -353,8 +427,7 @@ class Game:
 
         target_slot = -1
         for i in range(1, self.num_save_slots + 1):
-            filename_path = f'save_slot_{i}.json'
-            if not os.path.exists(filename_path):
+            if save_format.find_slot_file(i) is None:
                 target_slot = i
                 break
         
@@ -378,24 +451,9 @@ class Game:
             self.game_state = self._previous_game_state
             return
 
-        filename_path = f'save_slot_{slot_number}.json'
-        if os.path.exists(filename_path):
-            try:
-                with open(filename_path, 'r') as f:
-                    save_data = json.load(f)
-                save_data['save_name'] = new_name 
-                with open(filename_path, 'w') as f:
-                    json.dump(save_data, f, indent=4)
-                print(f"Renamed slot {slot_number} to '{new_name}'")
-                # Re-create slot buttons to update names on the UI
-                self._create_slot_selection_buttons(self.slot_selection_mode)
-                self.game_state = self._previous_game_state 
-            except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
-                print(f"Error renaming file for slot {slot_number}: {e}")
-                self.game_state = self._previous_game_state
-        else:
-            print(f"Cannot rename: No save file found for slot {slot_number}.")
-            self.game_state = self._previous_game_state
+        # The slot file is rewritten on the save worker; the slot buttons refresh when it finishes
+        self.save_worker.rename(slot_number, new_name)
+        self.game_state = self._previous_game_state
 
 
     def _save_game_to_slot(self, slot_number, filename_to_save_as):
@@ -404,79 +462,140 @@ class Game:
             self.game_state = self._previous_game_state 
             return
 
-        # When saving, only save the tile IDs, not the entire Tile objects
-        map_id_data = [[tile.id for tile in row] for row in self.map.data]
-
+        # Snapshot on the game thread (a copy of the tile grid, or of the resident modified
+        # chunks, is a memcpy); reading stored chunks, serializing and writing happen on the save worker.
         save_data = {
             'player_x': self.player.rect.x,
             'player_y': self.player.rect.y,
-            'map_data': map_id_data, 
-            'save_name': filename_to_save_as 
+            'save_name': filename_to_save_as,
+            # Tile grid (or modified chunks), seed and generator. With a seed the worker
+            # stores only the tiles that differ from the regenerated world.
+            **self.map.save_snapshot(),
         }
         
-        filename_path = f'save_slot_{slot_number}.json' 
-        try:
-            with open(filename_path, 'w') as f:
-                json.dump(save_data, f, indent=4)
-            print(f"Game saved successfully as '{filename_to_save_as}' to {filename_path}")
-            self.game_state = self._previous_game_state 
-        except Exception as e:
-            print(f"Error saving game: {e}")
-            self.game_state = self._previous_game_state
+        if self.save_worker.save(slot_number, save_data):
+            print(f"Saving game as '{filename_to_save_as}' to slot {slot_number}...")
+        else:
+            print(f"Save for slot {slot_number} already queued; it will use this newer state.")
+        self.game_state = self._previous_game_state 
 
     def _load_game_from_slot(self, slot_number):
-        filename_path = f'save_slot_{slot_number}.json'
-        try:
-            with open(filename_path, 'r') as f:
-                save_data = json.load(f)
-            
-            # Reconstruct Map with Tile objects from saved IDs
-            self.map = Map() 
-            loaded_map_id_data = save_data['map_data']
-            
-            # Create Tile objects from the loaded IDs
-            reconstructed_map_data = []
-            for r_idx, row_ids in enumerate(loaded_map_id_data):
-                reconstructed_row = []
-                for c_idx, tile_id in enumerate(row_ids):
-                    reconstructed_row.append(Tile(tile_id, c_idx * TILE_SIZE, r_idx * TILE_SIZE))
-                reconstructed_map_data.append(reconstructed_row)
-            
-            self.map.data = reconstructed_map_data 
-            self.map.rows = len(reconstructed_map_data)
-            self.map.cols = len(reconstructed_map_data[0]) if reconstructed_map_data else 0
-            self.map.width = self.map.cols * TILE_SIZE
-            self.map.height = self.map.rows * TILE_SIZE
-
+        # Decoding happens on the save worker; _finish_load swaps the new Map/Player in
+        self._state_before_load = self._previous_game_state
+        self._loading_slot = slot_number
+        self._loading_started_ms = pygame.time.get_ticks()
+        self.game_state = GameState.LOADING
+        self.save_worker.load(slot_number)
+
+    def _process_save_worker_results(self):
+        """Applies finished background save/load/rename jobs on the game thread."""
+        results = self.save_worker.poll()
+        if self.recorder:
+            self.recorder.record_results(self.tick_count, results)
+        for kind, slot_number, result, error in results:
+            if kind in ('save', 'rename'):
+                self.slot_index.invalidate(slot_number)
+                if error:
+                    print(f"Error {'saving' if kind == 'save' else 'renaming'} slot {slot_number}: {error}")
+                elif kind == 'save':
+                    print(f"Game saved successfully to {result}")
+                else:
+                    print(f"Renamed slot {slot_number} to '{result}'")
+            elif kind == 'load':
+                self._finish_load(slot_number, result, error)
 
-            self.player = Player(save_data['player_x'], save_data['player_y'])
-            
-            self.game_state = GameState.PLAYING
-            print(f"Game loaded successfully from slot {slot_number} ('{save_data.get('save_name', 'Unnamed')}')")
-        except FileNotFoundError:
+    def _finish_load(self, slot_number, save_data, error):
+        self._loading_slot = None
+        if error is None:
+            try:
+                # Wrap the saved tile IDs directly in the Map's grid
+                if save_data.get('chunks') is not None:
+                    rows, cols = save_data['map_size']
+                    self.map = StreamingMap(rows=rows, cols=cols, seed=save_data['seed'],
+                                            generator=save_data['generator'], modified_chunks=save_data['chunks'])
+                else:
+                    self.map = Map(data=save_data['map_data'], seed=save_data.get('seed'),
+                                   generator=save_data.get('generator'))
+                self.player = Player(save_data['player_x'], save_data['player_y'], key_state=self.key_state)
+                self.map.update_streaming(*self.player.center)
+                self._spawn_creatures()
+                self._reset_interpolation()
+                self.game_state = GameState.PLAYING
+                print(f"Game loaded successfully from slot {slot_number} ('{save_data.get('save_name', 'Unnamed')}')")
+                return
+            except Exception as e:
+                error = e
+
+        if isinstance(error, FileNotFoundError):
             print(f"No save file found for slot {slot_number}.")
-        except json.JSONDecodeError:
-            print(f"Error reading save file {filename_path}. It might be corrupted.")
-        except Exception as e:
-            print(f"An unexpected error occurred while loading game from slot {slot_number}: {e}")
-        finally:
-            if self.game_state == GameState.SLOT_SELECTION: 
-                self.game_state = self._previous_game_state 
-
-
-    def handle_events(self):
-        for event in pygame.event.get():
+        elif isinstance(error, SaveFormatError):
+            print(f"Error reading save file for slot {slot_number}. It might be corrupted.")
+        else:
+            print(f"An unexpected error occurred while loading game from slot {slot_number}: {error}")
+        self.game_state = self._state_before_load
+
+
+    def _update_tracing(self):
+        """Traces only while something wants the spans, so the instrumentation costs nothing otherwise."""
+        enabled = self.show_profiler or self.tracing
+        if enabled != tracer.enabled:
+            tracer.set_enabled(enabled)
+
+    def _export_trace(self):
+        path = self.trace_path or TRACE_EXPORT_PATH
+        span_count = tracer.export_chrome_trace(path)
+        print(f"Wrote {span_count} trace spans to {path}")
+
+    def _is_idle(self):
+        """True when nothing changes on screen without input: static menus, or an unfocused window."""
+        if self.show_profiler:
+            return False # The frame-time graph keeps moving
+        if not self.window_focused:
+            return True
+        return self.game_state in MENU_STATES and self.game_state != GameState.LOADING # Loading animates
+
+    def _wait_for_events(self, timeout_ms):
+        """Blocks until an event arrives (or the timeout passes). Returns every pending event."""
+        event = pygame.event.wait(timeout_ms)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    @traced('Game.handle_events')
+    def handle_events(self, events=None):
+        """Handles `events`, or everything in pygame's event queue if None."""
+        for event in (pygame.event.get() if events is None else events):
             if event.type == pygame.QUIT:
                 self.running = False
+            if event.type in (pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED):
+                self.window_focused = False
+            elif event.type in (pygame.WINDOWFOCUSGAINED, pygame.WINDOWRESTORED):
+                self.window_focused = True
+            if event.type == pygame.WINDOWEXPOSED:
+                self._menu_key = None # Menus only push dirty rects; repaint the whole window next frame
             
             # Global keyboard shortcut for fullscreen
             if event.type == pygame.KEYDOWN:
+                # Profiler shortcuts work in every state
+                if event.key == PROFILER_TOGGLE_KEY:
+                    self.show_profiler = not self.show_profiler
+                    self._update_tracing()
+                elif event.key == TRACE_TOGGLE_KEY:
+                    self.tracing = not self.tracing
+                    self._update_tracing()
+                    print(f"Tracing {'on' if self.tracing else 'off'}")
+                elif event.key == TRACE_EXPORT_KEY and tracer.enabled:
+                    self._export_trace()
+                elif event.key == RENDER_MODE_TOGGLE_KEY and self.map:
+                    self.map.render_mode = 'raster' if self.map.render_mode == 'chunks' else 'chunks'
+                    print(f"Map render mode: {self.map.render_mode}")
                 # Check for Alt + Enter
-                if event.key == pygame.K_RETURN and (pygame.key.get_mods() & pygame.KMOD_ALT):
+                # The event's own modifiers, not pygame.key.get_mods(), so replayed events act the same
+                if event.key == pygame.K_RETURN and (event.mod & pygame.KMOD_ALT):
                     self.fullscreen = not self.fullscreen
                     self._set_screen_mode() # Call the new function to update display mode
                 # Check for Ctrl + Enter
-                elif event.key == pygame.K_RETURN and (pygame.key.get_mods() & pygame.KMOD_CTRL):
+                elif event.key == pygame.K_RETURN and (event.mod & pygame.KMOD_CTRL):
                     self.fullscreen = not self.fullscreen
                     self._set_screen_mode()
 
@@ -503,41 +622,147 @@ class Game:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE: 
                         self.game_state = GameState.PAUSE_MENU
+                    elif event.key in ZOOM_IN_KEYS:
+                        self._zoom_by(ZOOM_STEP)
+                    elif event.key in ZOOM_OUT_KEYS:
+                        self._zoom_by(1 / ZOOM_STEP)
+                    elif event.key in ZOOM_RESET_KEYS:
+                        self.target_zoom = INITIAL_ZOOM_LEVEL
+                elif event.type == pygame.MOUSEWHEEL:
+                    self._zoom_by(ZOOM_STEP ** event.y)
+
+    def _zoom_by(self, factor):
+        """Moves the zoom target; update() eases the actual zoom level towards it."""
+        self.target_zoom = max(ZOOM_MIN, min(ZOOM_MAX, self.target_zoom * factor))
+
+    def _ease_zoom(self, dt):
+        """Moves zoom_level towards target_zoom by a fixed fraction of the remaining ratio per second,
+        so each wheel notch feels the same at any zoom. Snaps once the difference is invisible."""
+        if self.zoom_level == self.target_zoom:
+            return
+        ratio = self.target_zoom / self.zoom_level
+        self.zoom_level *= ratio ** (1 - math.exp(-ZOOM_SMOOTHING * dt))
+        if abs(self.zoom_level / self.target_zoom - 1) < 0.002:
+            self.zoom_level = self.target_zoom
 
 
+    @traced('Game.update')
     def update(self, dt):
+        self.tick_count += 1
+        self._process_save_worker_results()
+
         if self.game_state == GameState.PLAYING:
             if self.player and self.map:
-                self.player.update(dt, self.map)
+                # Remember the state at the start of the tick so draw() can interpolate
+                self._prev_player_pos = (self.player.x, self.player.y)
+                self._prev_camera = (self.camera_offset_x, self.camera_offset_y)
 
-                # Camera centering and clamping
-                # Calculate the desired camera offset based on player's position
-                target_camera_x = self.player.rect.centerx - self.screen.get_width() / (2 * self.zoom_level)
-                target_camera_y = self.player.rect.centery - self.screen.get_height() / (2 * self.zoom_level)
+                self.player.update(dt, self.map)
+                player_x, player_y = self.player.center # Float state, like the player's own movement
+                self.creatures.scare(player_x, player_y, CREATURE_FLEE_RADIUS)
+                self.creatures.update(dt, self.map)
+                self.map.pathfinder.process() # Queued path requests, within the per-tick budget
+                self._ease_zoom(dt)
 
-                # Clamp camera to map boundaries
-                max_camera_x = self.map.width - self.screen.get_width() / self.zoom_level
-                max_camera_y = self.map.height - self.screen.get_height() / self.zoom_level
+                # Camera centred on the player, clamped to the map's edges
+                view_width = self.screen.get_width() / self.zoom_level
+                view_height = self.screen.get_height() / self.zoom_level
+                self.camera_offset_x, self.camera_offset_y = self.map.camera_at(player_x, player_y, view_width, view_height)
 
-                self.camera_offset_x = max(0, min(target_camera_x, max_camera_x))
-                self.camera_offset_y = max(0, min(target_camera_y, max_camera_y))
+                # Streamed worlds load chunks around the player and drop far-away ones
+                self.view_rect = (self.camera_offset_x, self.camera_offset_y, view_width, view_height)
+                self.map.update_streaming(player_x, player_y, self.view_rect)
 
 
+    @traced('Game.draw')
     def draw(self):
-        self.screen.fill(DARK_GREY)
+        if self.game_state in MENU_STATES:
+            self._draw_menu_frame()
+            return
 
-        # Draw playing screen components if game is active or overlaid
-        if self.game_state in [GameState.PLAYING, GameState.PAUSE_MENU, GameState.SLOT_SELECTION, GameState.INPUT_TEXT_PROMPT] and self.map and self.player:
+        self._menu_background = None # The world moves again; the next menu takes a fresh snapshot
+        self.screen.fill(DARK_GREY)
+        if self.map and self.player:
             self._draw_playing_screen()
+
+        if self.show_profiler:
+            with tracer.span('ProfilerOverlay.draw'):
+                self.profiler_overlay.draw(self.screen)
             
-            # Apply a semi-transparent overlay when in menus over the game
-            if self.game_state in [GameState.PAUSE_MENU, GameState.SLOT_SELECTION, GameState.INPUT_TEXT_PROMPT]:
-                # The overlay should scale to the current screen size
-                overlay = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
-                overlay.fill((0, 0, 0, 150)) # Black with 150 alpha (out of 255)
-                self.screen.blit(overlay, (0,0))
+        pygame.display.flip()
 
+    def _capture_menu_background(self):
+        """Renders the game frame behind the menus once, darkened (plain background without a game)."""
+        self.screen.fill(DARK_GREY)
+        if self.map and self.player:
+            self._draw_playing_screen()
+            # Semi-transparent overlay over the game; blended once here instead of every menu frame
+            overlay = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 150)) # Black with 150 alpha (out of 255)
+            self.screen.blit(overlay, (0,0))
+            tracer.draw_calls += 1
+        return self.screen.copy()
+
+    def _menu_widgets(self):
+        """The widgets of the current menu that can change without a layout change."""
+        if self.game_state == GameState.START_SCREEN:
+            return self.start_screen_buttons
+        if self.game_state == GameState.PAUSE_MENU:
+            return self.pause_menu_buttons
+        if self.game_state == GameState.SLOT_SELECTION:
+            return self.slot_selection_buttons
+        if self.game_state == GameState.INPUT_TEXT_PROMPT and self.current_input_box:
+            return [self.current_input_box]
+        return []
+
+    @traced('Game._draw_menu_frame')
+    def _draw_menu_frame(self):
+        """Draws a menu over the frozen game frame, pushing only the rects that changed.
+
+        The darkened game frame is captured once per menu session. A full redraw and
+        flip happen only when the menu layout changes; after that, each frame redraws
+        just the widgets whose look changed (hover, typed text) plus the loading
+        animation, and hands those rects to pygame.display.update.
+        """
+        if self.game_state == GameState.SLOT_SELECTION:
+            self._refresh_slot_selection_buttons()
+
+        background_key = (self.screen.get_size(), id(self.map), id(self.player))
+        if self._menu_background is None or background_key != self._menu_background_key:
+            self._menu_background = self._capture_menu_background()
+            self._menu_background_key = background_key
+            self._menu_key = None
+
+        menu_key = (self.game_state, id(self.screen), self._slot_buttons_key,
+                    self.input_prompt_text, id(self.current_input_box))
+        if menu_key != self._menu_key or self.show_profiler:
+            # Layout changed (or the profiler panel, which changes every frame, is up): full redraw
+            self.screen.blit(self._menu_background, (0, 0))
+            tracer.draw_calls += 1
+            self._draw_menu_contents()
+            if self.show_profiler:
+                with tracer.span('ProfilerOverlay.draw'):
+                    self.profiler_overlay.draw(self.screen)
+            pygame.display.flip()
+            self._menu_key = menu_key
+            return
 
+        dirty_rects = []
+        for widget in self._menu_widgets():
+            if widget.needs_redraw():
+                area = widget.rect.copy() # Widgets only move on layout changes, which redraw everything
+                self.screen.blit(self._menu_background, area, area)
+                widget.draw(self.screen)
+                dirty_rects.append(area)
+        if self.game_state == GameState.LOADING and self._loading_rect:
+            previous_area = self._loading_rect
+            self.screen.blit(self._menu_background, previous_area, previous_area)
+            self._draw_loading_screen()
+            dirty_rects.append(previous_area.union(self._loading_rect))
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+
+    def _draw_menu_contents(self):
         # Draw specific UI for current game state
         if self.game_state == GameState.START_SCREEN:
             self._draw_start_screen()
@@ -547,17 +772,19 @@ class Game:
             self._draw_slot_selection_screen()
         elif self.game_state == GameState.INPUT_TEXT_PROMPT:
             self._draw_input_prompt()
-            
-        pygame.display.flip()
+        elif self.game_state == GameState.LOADING:
+            self._draw_loading_screen()
 
+    @traced('Game._draw_start_screen')
     def _draw_start_screen(self):
         # UI elements positioning should adapt to current screen dimensions if going full screen
         current_screen_width, current_screen_height = self.screen.get_size()
 
-        title_text = self.title_font.render("Durango Wildlands Clone", True, TEXT_COLOR)
+        title_text = text_cache.render("Durango Wildlands Clone", TITLE_FONT_SIZE, TEXT_COLOR)
         # Position relative to current screen dimensions
         title_rect = title_text.get_rect(center=(current_screen_width // 2, current_screen_height // 2 - 150)) # Adjusted Y
         self.screen.blit(title_text, title_rect)
+        tracer.draw_calls += 1
 
         # Update button positions based on current screen dimensions
         self.start_button.rect.center = (current_screen_width // 2, current_screen_height // 2 - BUTTON_HEIGHT - BUTTON_SPACING)
@@ -567,12 +794,14 @@ class Game:
         for button in self.start_screen_buttons:
             button.draw(self.screen)
 
+    @traced('Game._draw_pause_menu')
     def _draw_pause_menu(self):
         current_screen_width, current_screen_height = self.screen.get_size()
 
-        title_text = self.title_font.render("Game Paused", True, TEXT_COLOR)
+        title_text = text_cache.render("Game Paused", TITLE_FONT_SIZE, TEXT_COLOR)
         title_rect = title_text.get_rect(center=(current_screen_width // 2, current_screen_height // 2 - 200)) # Adjusted Y
         self.screen.blit(title_text, title_rect)
+        tracer.draw_calls += 1
 
         # Update button positions based on current screen dimensions
         self.resume_button.rect.center = (current_screen_width // 2, current_screen_height // 2 - (BUTTON_HEIGHT + BUTTON_SPACING) * 1.5)
@@ -584,16 +813,21 @@ class Game:
         for button in self.pause_menu_buttons:
             button.draw(self.screen)
 
+    def _refresh_slot_selection_buttons(self):
+        # Rebuild the buttons only if the screen size, mode or slot index changed since last time
+        if self._slot_buttons_key != (self.screen.get_size(), self.slot_selection_mode, self.slot_index.version):
+            self._create_slot_selection_buttons(self.slot_selection_mode)
+
+    @traced('Game._draw_slot_selection_screen')
     def _draw_slot_selection_screen(self):
         current_screen_width, current_screen_height = self.screen.get_size()
 
         if self.slot_selection_mode == 'save':
-            title_text = self.title_font.render("Select Save Slot", True, TEXT_COLOR)
+            title_text = text_cache.render("Select Save Slot", TITLE_FONT_SIZE, TEXT_COLOR)
         else: 
-            title_text = self.title_font.render("Select Load Slot", True, TEXT_COLOR)
+            title_text = text_cache.render("Select Load Slot", TITLE_FONT_SIZE, TEXT_COLOR)
             
-        # Re-calculate button positions before drawing them
-        self._create_slot_selection_buttons(self.slot_selection_mode) # This will update button rects based on current screen size
+        self._refresh_slot_selection_buttons()
 
         if self.slot_selection_buttons:
             # Find the top-most button to position the title relative to it
@@ -603,16 +837,19 @@ class Game:
 
         title_rect = title_text.get_rect(center=(current_screen_width // 2, first_button_top - TITLE_FONT_SIZE // 2 - BUTTON_SPACING))
         self.screen.blit(title_text, title_rect)
+        tracer.draw_calls += 1
 
         for button in self.slot_selection_buttons:
             button.draw(self.screen)
 
+    @traced('Game._draw_input_prompt')
     def _draw_input_prompt(self):
         current_screen_width, current_screen_height = self.screen.get_size()
 
-        prompt_surface = self.small_font.render(self.input_prompt_text, True, TEXT_COLOR)
+        prompt_surface = text_cache.render(self.input_prompt_text, SMALL_FONT_SIZE, TEXT_COLOR)
         prompt_rect = prompt_surface.get_rect(center=(current_screen_width // 2, current_screen_height // 2 - 50))
         self.screen.blit(prompt_surface, prompt_rect)
+        tracer.draw_calls += 1
 
         # Update input box position based on current screen dimensions
         self.current_input_box.rect.center = (current_screen_width // 2, current_screen_height // 2 + 20) # Adjusted Y
@@ -621,37 +858,168 @@ class Game:
             self.current_input_box.draw(self.screen)
 
 
+    @traced('Game._draw_loading_screen')
+    def _draw_loading_screen(self):
+        current_screen_width, current_screen_height = self.screen.get_size()
+
+        # Animated dots so it's clear the game hasn't frozen while the worker decodes
+        elapsed_ms = pygame.time.get_ticks() - self._loading_started_ms
+        dots = "." * (1 + (elapsed_ms // 300) % 3)
+        loading_surface = text_cache.render(f"Loading slot {self._loading_slot}{dots}", SMALL_FONT_SIZE, TEXT_COLOR)
+        loading_rect = loading_surface.get_rect(midleft=((current_screen_width - loading_surface.get_width()) // 2, current_screen_height // 2))
+        self.screen.blit(loading_surface, loading_rect)
+        tracer.draw_calls += 1
+
+        # Indeterminate progress bar
+        bar_rect = pygame.Rect(0, 0, INPUT_BOX_WIDTH, 8)
+        bar_rect.midtop = (current_screen_width // 2, loading_rect.bottom + BUTTON_SPACING)
+        pygame.draw.rect(self.screen, GREY, bar_rect, 1)
+        block_width = bar_rect.width // 4
+        block_x = bar_rect.x + (elapsed_ms // 4) % (bar_rect.width - block_width)
+        pygame.draw.rect(self.screen, WHITE, (block_x, bar_rect.y, block_width, bar_rect.height))
+        self._loading_rect = loading_rect.union(bar_rect) # Redrawn every frame by _draw_menu_frame
+
+    def _reset_interpolation(self):
+        """Call after the player or camera jumps (new game, load) so draw() doesn't blend across it."""
+        self._prev_player_pos = None
+        self._prev_camera = None
+
+    def _interpolate(self, previous, current):
+        """Blends a tick's start and end (x, y) by render_alpha. Only PLAYING frames interpolate."""
+        if previous is None or self.game_state != GameState.PLAYING:
+            return current
+        alpha = self.render_alpha
+        return (previous[0] + (current[0] - previous[0]) * alpha,
+                previous[1] + (current[1] - previous[1]) * alpha)
+
+    @traced('Game._draw_playing_screen')
     def _draw_playing_screen(self):
         if self.map and self.player:
-            self.map.draw(self.screen, self.camera_offset_x, self.camera_offset_y, self.zoom_level)
+            camera_x, camera_y = self._interpolate(self._prev_camera, (self.camera_offset_x, self.camera_offset_y))
+            self.map.draw(self.screen, camera_x, camera_y, self.zoom_level)
+            if self.creatures:
+                # Only creatures inside the camera view are drawn
+                alpha = self.render_alpha if self.game_state == GameState.PLAYING else 1.0
+                tracer.draw_calls += self.creatures.draw(self.screen, self.view_rect, camera_x, camera_y, self.zoom_level, alpha)
 
             if hasattr(self.player, 'original_image'):
                 # Player size should be relative to TILE_SIZE and zoom, not screen size
-                # The PLAYER_SIZE from config is already for zoom_level 1.0
-                scaled_player_width = int(PLAYER_SIZE * self.zoom_level)
-                scaled_player_height = int(PLAYER_SIZE * self.zoom_level)
-                
-                self.player.image = pygame.transform.scale(self.player.original_image, (scaled_player_width, scaled_player_height))
+                # The atlas caches the sprite pre-scaled per zoom level, so this is a lookup, not a rescale
+                self.player.image = assets.image('entities', 'player', self.zoom_level)
             else:
                 print("Warning: Player has no original_image. Drawing a default rectangle.")
                 pygame.draw.rect(self.screen, RED, self.player.rect)
                 return 
 
-            player_screen_x = (self.player.rect.x - self.camera_offset_x) * self.zoom_level
-            player_screen_y = (self.player.rect.y - self.camera_offset_y) * self.zoom_level
+            player_x, player_y = self._interpolate(self._prev_player_pos, (self.player.x, self.player.y))
+            player_screen_x = (player_x - camera_x) * self.zoom_level
+            player_screen_y = (player_y - camera_y) * self.zoom_level
             
             player_screen_rect = self.player.image.get_rect(topleft=(player_screen_x, player_screen_y))
 
             self.screen.blit(self.player.image, player_screen_rect)
+            tracer.draw_calls += 1
 
 
     def run(self):
-        self._set_screen_mode() # Set initial screen mode
-        while self.running:
-            dt = self.clock.tick(FPS) / 1000.0
-            self.handle_events()
-            self.update(dt)
-            self.draw()
-
+        if self.headless:
+            self.run_headless()
+        else:
+            self._set_screen_mode() # Set initial screen mode
+            while self.running:
+                tracer.next_frame()
+                if self._is_idle():
+                    # Sleep in the event queue instead of spinning at FPS; input wakes us immediately.
+                    # Menus then only push what the input changed (see _draw_menu_frame).
+                    events = self._wait_for_events(IDLE_WAIT_MS)
+                    frame_time = self.clock.tick() / 1000.0
+                else:
+                    # Rendering runs at up to FPS; the simulation catches up in fixed ticks
+                    events = None
+                    frame_time = self.clock.tick(FPS) / 1000.0
+                self.step_frame(frame_time, events)
+                self.draw()
+
+        self.save_worker.shutdown() # Let any queued saves finish before exiting
+        if self.recorder:
+            self.recorder.save()
+        if self.trace_path:
+            self._export_trace()
         pygame.quit()
-        sys.exit()
\ No newline at end of file
+        sys.exit()
+
+    def step_frame(self, frame_time, events=None):
+        """Feeds one rendered frame's real time (seconds) into the simulation: handles input,
+        runs as many fixed ticks as have accrued and sets render_alpha for draw().
+
+        Ticks always advance exactly tick_dt, so how far things move depends only on the
+        total time fed in, never on how it was split into frames.
+        """
+        if events is None:
+            events = pygame.event.get()
+        if self.recorder:
+            self.recorder.begin_frame(frame_time, events)
+        self._accumulator += min(frame_time, MAX_FRAME_TIME)
+        self.handle_events(events)
+        while self._accumulator >= self.tick_dt:
+            self.update(self.tick_dt)
+            self._accumulator -= self.tick_dt
+        self.render_alpha = self._accumulator / self.tick_dt
+        if self.recorder:
+            self.recorder.end_frame()
+
+    def run_headless(self, max_ticks=None):
+        """Runs the simulation as fast as the CPU allows, without drawing.
+
+        Starts a new game if still on the start screen. Each tick advances exactly tick_dt,
+        so for the same seed and per-tick input the result is identical to a windowed run.
+        Returns the number of ticks run.
+        """
+        if self.game_state == GameState.START_SCREEN:
+            self._start_new_game()
+        ticks = 0
+        while self.running and (max_ticks is None or ticks < max_ticks):
+            tracer.next_frame()
+            self.step_frame(self.tick_dt) # Exactly one tick per frame
+            ticks += 1
+        return ticks
+
+    def run_replay(self, recording, realtime=True):
+        """Plays back a Recording (replay.py) from the start screen: the same seed, frame
+        lengths, events, held keys and save results, so the session runs exactly as recorded.
+
+        Every frame is simulated and drawn. realtime keeps the recorded pace; otherwise frames
+        run back to back, as fast as the CPU allows. Returns ReplayStats with per-frame timings.
+        """
+        if not self.headless:
+            self._set_screen_mode()
+        playback = Playback(recording)
+        playback.attach(self)
+        if recording.starts_in_game:
+            self._start_new_game()
+        stats = ReplayStats(recording)
+        start_tick = self.tick_count
+        start = time.perf_counter()
+        recorded_time = 0.0
+        for frame, (frame_time, _, _, _) in enumerate(recording.frames):
+            if not self.running:
+                break
+            if not self.headless:
+                # Only the recorded events reach the game; the window's own just need draining
+                if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                    break
+            tracer.next_frame()
+            frame_start = time.perf_counter()
+            self.step_frame(frame_time, playback.events(frame))
+            self.draw()
+            stats.frame_ms.append((time.perf_counter() - frame_start) * 1000.0)
+            if stats.diverged_frame is None and not playback.check(frame, self):
+                stats.diverged_frame = frame
+            recorded_time += frame_time
+            if realtime:
+                delay = start + recorded_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        stats.ticks = self.tick_count - start_tick
+        stats.wall_seconds = time.perf_counter() - start
+        return stats
@@ -0,0 +1,97 @@
+# durango_wildlands_clone/level/chunk_cache.py
+
+import math
+import numpy as np
+import pygame
+from collections import OrderedDict
+from config import TILE_SIZE, CHUNK_SIZE_TILES, CHUNK_CACHE_MAX_BYTES
+from level.tile import Tile
+from assets import assets
+from profiler import traced
+
+class ChunkCache:
+    """LRU cache of pre-rendered map chunks, one surface per (chunk, zoom level).
+
+    A chunk is rasterized tile by tile the first time it is needed at a zoom level;
+    after that drawing it is a single blit. Surfaces are evicted least-recently-used
+    first once their total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, game_map, chunk_size=CHUNK_SIZE_TILES, max_bytes=CHUNK_CACHE_MAX_BYTES):
+        self.map = game_map
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._surfaces = OrderedDict() # (chunk_row, chunk_col, zoom_key) -> Surface
+
+    @staticmethod
+    def _zoom_key(zoom_level):
+        # Rounded so float noise in the zoom level doesn't create duplicate entries
+        return round(zoom_level, 3)
+
+    @staticmethod
+    def _surface_bytes(surface):
+        return surface.get_pitch() * surface.get_height()
+
+    def get(self, chunk_row, chunk_col, zoom_level):
+        """Returns the rendered surface for a chunk, rasterizing it on a cache miss."""
+        key = (chunk_row, chunk_col, self._zoom_key(zoom_level))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        surface = self._render_chunk(chunk_row, chunk_col, key[2])
+        self._surfaces[key] = surface
+        self.used_bytes += self._surface_bytes(surface)
+        self._evict()
+        return surface
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone is over budget
+        while self.used_bytes > self.max_bytes and len(self._surfaces) > 1:
+            _, old_surface = self._surfaces.popitem(last=False)
+            self.used_bytes -= self._surface_bytes(old_surface)
+
+    @traced('ChunkCache.render_chunk')
+    def _render_chunk(self, chunk_row, chunk_col, zoom_level):
+        """Rasterizes one chunk's tiles into a new off-screen surface."""
+        tiles = self.map.chunk_tiles(chunk_row, chunk_col)
+        start_row = chunk_row * self.chunk_size
+        start_col = chunk_col * self.chunk_size
+
+        # Chunk origin in world pixels; tiles are drawn relative to it
+        origin_x = start_col * TILE_SIZE
+        origin_y = start_row * TILE_SIZE
+        width = math.ceil(tiles.shape[1] * TILE_SIZE * zoom_level)
+        height = math.ceil(tiles.shape[0] * TILE_SIZE * zoom_level)
+
+        surface = pygame.Surface((max(1, width), max(1, height)))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert() # Match the display format so blits take the fast path
+
+        # One batched blit per tile out of the 'tiles' atlas, at the positions Tile.draw would use
+        # (Tile objects first: a tile id seen for the first time declares its sprite and repacks the sheet)
+        sprites = {tile_id: Tile.from_id(tile_id).sprite for tile_id in np.unique(tiles).tolist()}
+        atlas = assets.atlas('tiles', zoom_level)
+        areas = {tile_id: atlas.rects[sprite] for tile_id, sprite in sprites.items()}
+        blits = []
+        for r, row_ids in enumerate(tiles.tolist(), start_row):
+            screen_y = int((r * TILE_SIZE - origin_y) * zoom_level)
+            for c, tile_id in enumerate(row_ids, start_col):
+                blits.append((atlas.surface, (int((c * TILE_SIZE - origin_x) * zoom_level), screen_y), areas[tile_id]))
+        surface.blits(blits, False)
+        return surface
+
+    def invalidate(self, chunk_row, chunk_col):
+        """Drops every cached zoom level of one chunk."""
+        for key in [k for k in self._surfaces if k[0] == chunk_row and k[1] == chunk_col]:
+            self.used_bytes -= self._surface_bytes(self._surfaces.pop(key))
+
+    def invalidate_tile(self, row, col):
+        """Drops the chunk containing a tile so it is re-rendered on next draw."""
+        self.invalidate(row // self.chunk_size, col // self.chunk_size)
+
+    def clear(self):
+        self._surfaces.clear()
+        self.used_bytes = 0
@@ -0,0 +1,178 @@
+# durango_wildlands_clone/level/chunk_pyramid.py
+
+import math
+import numpy as np
+import pygame
+from collections import OrderedDict
+from config import TILE_SIZE, MIP_LEVELS, MIP_CACHE_MAX_BYTES
+from level.tile import Tile
+from assets import assets
+from profiler import traced, tracer
+
+class ChunkPyramid:
+    """Mip pyramid of pre-rendered map surfaces, for drawing the map at any zoom level.
+
+    Level 0 is the map's ChunkCache at 1x: one surface per chunk. A level-k surface
+    covers 2**k x 2**k chunks at 1/2**k scale, so every surface is about the same size
+    and a zoomed-out view blits a few coarse surfaces rather than many chunks. Levels
+    1 and up are built straight from tile ids with NumPy, using each tile sprite
+    smoothscaled to the level's tile size (so they are filtered, not just subsampled).
+
+    draw() picks the finest level that's at least as detailed as the zoom and scales
+    its surfaces to the zoom (nearest-neighbour). While the zoom animates, or when it is
+    past 1x, only the on-screen part of each surface is scaled, every frame, so the cost
+    follows the screen size. Once the zoom stays put for a frame, whole surfaces are
+    scaled once and kept, so a settled zoomed-out view is plain blits. Level surfaces
+    are LRU-evicted beyond `max_bytes`.
+    """
+
+    def __init__(self, game_map, levels=MIP_LEVELS, max_bytes=MIP_CACHE_MAX_BYTES):
+        self.map = game_map
+        self.chunk_cache = game_map.chunk_cache
+        self.levels = levels
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._surfaces = OrderedDict() # (level, row, col) -> Surface, levels >= 1
+        self._sprites = {} # level -> (256, px, px) sprite pixels per tile id, [y][x]
+        self._sprite_ids = {} # level -> tile ids filled in _sprites[level]
+        self._scaled = {} # (level, row, col) -> Surface scaled to _scaled_zoom (the last frame's surfaces)
+        self._scaled_zoom = None
+
+    def level_for(self, zoom_level):
+        """Coarsest level whose resolution is still at least `zoom_level`."""
+        level = 0
+        while level + 1 < self.levels and zoom_level <= 0.5 ** (level + 1):
+            level += 1
+        return level
+
+    def _span(self, level):
+        """Tiles covered by one surface (a side) at a level."""
+        return self.chunk_cache.chunk_size << level
+
+    # --- Level surfaces ---
+    def _sprite_table(self, level, tile_ids, surface_format):
+        """Per-tile-id sprite pixels at the level's tile size, mapped to `surface_format`'s pixel values."""
+        size = TILE_SIZE >> level
+        table = self._sprites.get(level)
+        if table is None:
+            table = self._sprites[level] = np.zeros((256, size, size), dtype=np.uint32)
+            self._sprite_ids[level] = set()
+        known = self._sprite_ids[level]
+        for tile_id in set(tile_ids) - known:
+            image = assets.image('tiles', Tile.from_id(tile_id).sprite)
+            if image.get_bitsize() < 24:
+                image = image.convert(24) # smoothscale needs 24 or 32 bit pixels
+            image = pygame.transform.smoothscale(image, (size, size)).convert(surface_format)
+            table[tile_id] = pygame.surfarray.array2d(image).T # [y][x]
+            known.add(tile_id)
+        return table
+
+    @traced('ChunkPyramid.render_level')
+    def _render(self, level, row, col):
+        """Builds one level-k surface from the tile ids it covers."""
+        span = self._span(level)
+        tiles = self.map.tiles_in_region(row * span, col * span, span, span)
+        size = TILE_SIZE >> level
+        rows, cols = tiles.shape
+        surface = pygame.Surface((cols * size, rows * size))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert() # Match the display format so blits take the fast path
+        table = self._sprite_table(level, np.unique(tiles).tolist(), surface)
+        # table[tiles] is (tile row, tile col, y, x); reordered to (Y, X) it matches the surface's
+        # memory layout (pixels2d is [x][y], so its .T is [y][x]), and the values are already in the
+        # surface's pixel format, so filling the surface is a straight copy
+        pygame.surfarray.pixels2d(surface).T[:] = table[tiles].transpose(0, 2, 1, 3).reshape(rows * size, cols * size)
+        return surface
+
+    def get(self, level, row, col):
+        """The unscaled surface for one cell of a level, rendering it on a cache miss."""
+        if level == 0:
+            return self.chunk_cache.get(row, col, 1.0)
+        key = (level, row, col)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+        surface = self._surfaces[key] = self._render(level, row, col)
+        self.used_bytes += surface.get_pitch() * surface.get_height()
+        # Always keep the newest entry, even if it alone is over budget
+        while self.used_bytes > self.max_bytes and len(self._surfaces) > 1:
+            _, old_surface = self._surfaces.popitem(last=False)
+            self.used_bytes -= old_surface.get_pitch() * old_surface.get_height()
+        return surface
+
+    def invalidate_tile(self, row, col):
+        """Drops every level's surface containing a tile (level 0 is the ChunkCache's job)."""
+        for level in range(self.levels):
+            span = self._span(level)
+            key = (level, row // span, col // span)
+            self._scaled.pop(key, None)
+            surface = self._surfaces.pop(key, None)
+            if surface is not None:
+                self.used_bytes -= surface.get_pitch() * surface.get_height()
+
+    def clear(self):
+        self._surfaces.clear()
+        self._scaled.clear()
+        self._sprites.clear()
+        self._sprite_ids.clear()
+        self.used_bytes = 0
+
+    # --- Drawing ---
+    def draw(self, surface, offset_x, offset_y, zoom_level):
+        """Blits the level surfaces overlapping the view, scaled to `zoom_level`."""
+        level = self.level_for(zoom_level)
+        span = self._span(level)
+        span_pixels = span * TILE_SIZE # World pixels per surface
+        scale = zoom_level * (1 << level) # Surface pixels -> screen pixels
+        zoom_key = round(zoom_level, 3)
+        settled = zoom_key == self._scaled_zoom # Same zoom as last frame
+        previous = self._scaled if settled else {}
+        self._scaled, self._scaled_zoom = {}, zoom_key # Only this frame's surfaces are kept
+
+        view_right = offset_x + surface.get_width() / zoom_level
+        view_bottom = offset_y + surface.get_height() / zoom_level
+        start_col = max(0, int(offset_x // span_pixels))
+        end_col = min((self.map.cols - 1) // span, int(view_right // span_pixels))
+        start_row = max(0, int(offset_y // span_pixels))
+        end_row = min((self.map.rows - 1) // span, int(view_bottom // span_pixels))
+
+        blits = []
+        for row in range(start_row, end_row + 1):
+            for col in range(start_col, end_col + 1):
+                key = (level, row, col)
+                screen_x = int((col * span_pixels - offset_x) * zoom_level)
+                screen_y = int((row * span_pixels - offset_y) * zoom_level)
+                if scale > 1 or (scale != 1 and not settled):
+                    # Zoomed in past 1x, or mid-animation (each frame a new zoom): scaling whole
+                    # surfaces would mostly make off-screen or throwaway pixels, so only the part
+                    # on screen is scaled, every frame
+                    blits.append(self._scaled_visible(surface, self.get(level, row, col), screen_x, screen_y, scale))
+                    continue
+                image = previous.get(key)
+                if image is None:
+                    image = self.get(level, row, col)
+                    if scale != 1:
+                        # Rounded up, so neighbouring surfaces overlap by a pixel instead of leaving a seam
+                        image = pygame.transform.scale(image, (max(1, math.ceil(image.get_width() * scale)),
+                                                               max(1, math.ceil(image.get_height() * scale))))
+                self._scaled[key] = image
+                blits.append((image, (screen_x, screen_y)))
+        surface.blits(blits, False)
+        tracer.draw_calls += len(blits)
+
+    @staticmethod
+    def _scaled_visible(target, image, screen_x, screen_y, scale):
+        """(surface, position) for the on-screen part of `image` drawn at (screen_x, screen_y) scaled by `scale`."""
+        # Whole source pixels covering the target's area
+        left = max(0, int(-screen_x / scale))
+        top = max(0, int(-screen_y / scale))
+        right = min(image.get_width(), math.ceil((target.get_width() - screen_x) / scale))
+        bottom = min(image.get_height(), math.ceil((target.get_height() - screen_y) / scale))
+        if right <= left or bottom <= top:
+            return image.subsurface((0, 0, 0, 0)), (screen_x, screen_y)
+        area = pygame.Rect(left, top, right - left, bottom - top)
+        # Scaled edges are placed where scaling the whole image would put them
+        x0, y0 = screen_x + int(left * scale), screen_y + int(top * scale)
+        size = (max(1, screen_x + math.ceil(right * scale) - x0), max(1, screen_y + math.ceil(bottom * scale) - y0))
+        return pygame.transform.scale(image.subsurface(area), size), (x0, y0)
@@ -0,0 +1,115 @@
+# durango_wildlands_clone/level/collision.py
+
+import math
+import numpy as np
+from config import TILE_SIZE
+from level.tile import COLLIDABLE_LOOKUP
+
+class CollisionBitmap:
+    """Packed 1-bit-per-tile grid of collidable tiles, derived from COLLISION_TILES.
+
+    Bits are kept in a flat bytearray (row-major, MSB first within a byte) so a single
+    lookup is plain Python integer indexing, with no per-call NumPy overhead.
+    """
+
+    def __init__(self, tile_ids):
+        tile_ids = np.asarray(tile_ids)
+        self.rows, self.cols = tile_ids.shape
+        self.stride = (self.cols + 7) // 8 # Bytes per row
+        self.bits = bytearray(np.packbits(COLLIDABLE_LOOKUP[tile_ids], axis=1).tobytes())
+
+    def is_blocked(self, row, col):
+        return (self.bits[row * self.stride + (col >> 3)] >> (7 - (col & 7))) & 1
+
+    def set_tile(self, row, col, tile_id):
+        """Keeps the bitmap in sync after a tile change."""
+        index = row * self.stride + (col >> 3)
+        mask = 0x80 >> (col & 7)
+        if COLLIDABLE_LOOKUP[tile_id]:
+            self.bits[index] |= mask
+        else:
+            self.bits[index] &= ~mask & 0xFF
+
+    def as_array(self):
+        """Returns the (rows, cols) bool grid, e.g. for vectorized queries."""
+        packed = np.frombuffer(self.bits, dtype=np.uint8).reshape(self.rows, self.stride)
+        return np.unpackbits(packed, axis=1, count=self.cols).astype(bool)
+
+
+def _span(start, length):
+    """First and last tile index covered by [start, start + length)."""
+    return int(math.floor(start / TILE_SIZE)), int(math.ceil((start + length) / TILE_SIZE)) - 1
+
+
+def sweep_x(game_map, x, y, width, height, dx):
+    """Moves a box horizontally by dx, stopping flush against the first collidable column.
+
+    Every tile column between the start and end position is tested, so large steps
+    can't tunnel through thin walls. Returns (new_x, hit).
+    """
+    if dx == 0:
+        return x, False
+    first_row, last_row = _span(y, height)
+    if dx > 0:
+        leading = x + width
+        start_col = int(math.ceil(leading / TILE_SIZE)) # First column not yet overlapped
+        end_col = int(math.ceil((leading + dx) / TILE_SIZE)) - 1 # Last column overlapped after the move
+        cols = range(start_col, end_col + 1)
+    else:
+        start_col = int(math.floor(x / TILE_SIZE)) - 1 # First column to the left not yet overlapped
+        end_col = int(math.floor((x + dx) / TILE_SIZE))
+        cols = range(start_col, end_col - 1, -1)
+
+    for col in cols:
+        for row in range(first_row, last_row + 1):
+            if game_map.is_collidable(row, col):
+                # Stop flush against the blocking column
+                return (col * TILE_SIZE - width if dx > 0 else (col + 1) * TILE_SIZE), True
+    return x + dx, False
+
+
+def sweep_y(game_map, x, y, width, height, dy):
+    """Vertical counterpart of sweep_x. Returns (new_y, hit)."""
+    if dy == 0:
+        return y, False
+    first_col, last_col = _span(x, width)
+    if dy > 0:
+        leading = y + height
+        start_row = int(math.ceil(leading / TILE_SIZE))
+        end_row = int(math.ceil((leading + dy) / TILE_SIZE)) - 1
+        rows = range(start_row, end_row + 1)
+    else:
+        start_row = int(math.floor(y / TILE_SIZE)) - 1
+        end_row = int(math.floor((y + dy) / TILE_SIZE))
+        rows = range(start_row, end_row - 1, -1)
+
+    for row in rows:
+        for col in range(first_col, last_col + 1):
+            if game_map.is_collidable(row, col):
+                return (row * TILE_SIZE - height if dy > 0 else (row + 1) * TILE_SIZE), True
+    return y + dy, False
+
+
+def move_box(game_map, x, y, width, height, dx, dy):
+    """Float-precision move_and_collide for a box given by its top-left corner and size.
+
+    Positions keep their fractional part, so steps smaller than a pixel (slow movers,
+    high tick rates) accumulate instead of truncating to nothing. Returns
+    (new_x, new_y, hit_x, hit_y).
+    """
+    x, hit_x = sweep_x(game_map, x, y, width, height, dx)
+    y, hit_y = sweep_y(game_map, x, y, width, height, dy)
+    return x, y, hit_x, hit_y
+
+
+def move_and_collide(game_map, rect, dx, dy):
+    """Moves a pygame.Rect by (dx, dy) against the map's collidable tiles, sliding along walls.
+
+    The axes are swept one after the other (x, then y), so a blocked axis doesn't stop
+    movement along the other one. Returns (hit_x, hit_y).
+    """
+    new_x, hit_x = sweep_x(game_map, rect.x, rect.y, rect.width, rect.height, dx)
+    rect.x = int(new_x)
+    new_y, hit_y = sweep_y(game_map, rect.x, rect.y, rect.width, rect.height, dy)
+    rect.y = int(new_y)
+    return hit_x, hit_y
@@ -0,0 +1,173 @@
+# durango_wildlands_clone/level/flow_field.py
+
+import numpy as np
+from config import TILE_SIZE, FLOW_FIELD_RADIUS_TILES, FLOW_FIELD_RECENTER_TILES
+from level.pathfinding import SQRT2
+
+# Direction field values index these 8-connected moves (d_row, d_col); -1 = stay put
+# (the goal itself, a blocked tile, or one that can't reach the goal)
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+_COSTS = np.array([1.0, 1.0, 1.0, 1.0, SQRT2, SQRT2, SQRT2, SQRT2])
+# Unit (dx, dy) vector per direction, plus a zero vector in the last row for -1
+_UNIT = np.array([(d_col, d_row) for d_row, d_col in DIRECTIONS] + [(0, 0)], dtype=np.float64)
+_UNIT[:8] /= np.hypot(_UNIT[:8, 0], _UNIT[:8, 1])[:, None]
+
+
+class FlowField:
+    """Distance-to-goal (integration) field and per-tile steering directions for one goal.
+
+    One field serves any number of agents heading for the same target: after update(),
+    direction_at() and directions_at() are table lookups, so a crowd costs one field
+    instead of one path search per agent. The field only covers a window of
+    FLOW_FIELD_RADIUS_TILES around the goal; agents outside it get a zero vector.
+
+    The window's collision grid and per-direction step costs (same moves and costs as
+    Pathfinder) are built with NumPy and kept while the goal stays within
+    FLOW_FIELD_RECENTER_TILES of the window's centre and the map is unchanged. The
+    integration pass is a vectorized wavefront (see _integrate). When the goal moves
+    inside the window, the old field plus the old distance to the new goal is already a
+    valid upper bound everywhere, so the wavefront starts from it and only visits the
+    tiles that got closer. Updates while the goal stays on its tile are free.
+    """
+
+    def __init__(self, game_map, radius=FLOW_FIELD_RADIUS_TILES, recenter=FLOW_FIELD_RECENTER_TILES):
+        self.map = game_map
+        self.radius = radius
+        self.recenter = recenter
+        self.goal = None
+        self.row0 = self.col0 = 0
+        self.center = None
+        self.walkable = None
+        self.distance = None   # (rows, cols) float64 path length to the goal, inf where it can't be reached
+        self.directions = None # (rows, cols) int8 index into DIRECTIONS, or -1
+        self._padded = None    # distance with an inf border (self.distance is its interior)
+        self._step_costs = None # (8, padded tiles) cost of each DIRECTIONS move from a tile, inf if not allowed
+        self._step_offsets = None # Flat index offset of each DIRECTIONS move in _padded
+        self._map_version = None
+
+    # --- Computing ---
+    def update(self, goal_row, goal_col):
+        """Points the field at a goal tile. Returns True if anything was recomputed."""
+        goal = (int(goal_row), int(goal_col))
+        map_version = self.map.version
+        if goal == self.goal and map_version == self._map_version:
+            return False
+        rebuilt = (self.center is None or map_version != self._map_version
+                   or max(abs(goal[0] - self.center[0]), abs(goal[1] - self.center[1])) > self.recenter)
+        if rebuilt:
+            self._build_window(goal)
+            self._map_version = map_version
+        self.goal = goal
+        rows, cols = self.walkable.shape
+        local_row, local_col = goal[0] - self.row0, goal[1] - self.col0
+        if 0 <= local_row < rows and 0 <= local_col < cols and self.walkable[local_row, local_col]:
+            # d(tile, new goal) <= d(tile, old goal) + d(old goal, new goal): start from that when possible
+            shift = np.inf if rebuilt else self.distance[local_row, local_col]
+            if np.isfinite(shift):
+                self._padded += shift
+            else:
+                self._padded.fill(np.inf)
+            self.distance[local_row, local_col] = 0.0
+            self._integrate(local_row, local_col)
+        else:
+            self._padded.fill(np.inf)
+        self.directions = self._directions()
+        return True
+
+    def update_at(self, x, y):
+        """update() for a goal given in world pixels (e.g. the player's centre)."""
+        return self.update(int(y // TILE_SIZE), int(x // TILE_SIZE))
+
+    def _build_window(self, goal):
+        """Fetches the walkable window centred on `goal` and the step costs out of each of its tiles."""
+        self.center = goal
+        self.row0 = max(0, goal[0] - self.radius)
+        self.col0 = max(0, goal[1] - self.radius)
+        rows = min(self.map.rows, goal[0] + self.radius + 1) - self.row0
+        cols = min(self.map.cols, goal[1] + self.radius + 1) - self.col0
+        grid_rows = np.broadcast_to(np.arange(self.row0, self.row0 + rows)[:, None], (rows, cols))
+        grid_cols = np.broadcast_to(np.arange(self.col0, self.col0 + cols)[None, :], (rows, cols))
+        self.walkable = ~self.map.collidable_at(grid_rows, grid_cols)
+        walkable = np.zeros((rows + 2, cols + 2), dtype=bool)
+        walkable[1:-1, 1:-1] = self.walkable
+        # Laid out like _padded (the border never moves), so the wavefront can work on flat indices
+        self._step_costs = np.full((len(DIRECTIONS), rows + 2, cols + 2), np.inf)
+        for i, (d_row, d_col) in enumerate(DIRECTIONS):
+            allowed = self.walkable & walkable[1 + d_row:rows + 1 + d_row, 1 + d_col:cols + 1 + d_col]
+            if d_row and d_col: # No corner cutting
+                allowed &= walkable[1 + d_row:rows + 1 + d_row, 1:-1] & walkable[1:-1, 1 + d_col:cols + 1 + d_col]
+            self._step_costs[i, 1:-1, 1:-1][allowed] = _COSTS[i]
+        self._step_costs = self._step_costs.reshape(len(DIRECTIONS), -1)
+        self._step_offsets = np.array([d_row * (cols + 2) + d_col for d_row, d_col in DIRECTIONS])
+        self._padded = np.full((rows + 2, cols + 2), np.inf)
+        self.distance = self._padded[1:-1, 1:-1]
+
+    def _integrate(self, row, col):
+        """Brings self.distance to exact path lengths after the tile (row, col) got a lower value.
+
+        Every other tile must hold an upper bound consistent with its neighbours (a previous
+        field shifted by a constant, or inf). A Dijkstra run in bulk: every step costs at
+        least 1, so all pending tiles less than 1 above the lowest one are final together;
+        they're settled in one vectorized pass, and only neighbours they improve go pending.
+        """
+        distance = self._padded.ravel()
+        costs, offsets = self._step_costs, self._step_offsets
+        queued = np.zeros(len(distance), dtype=bool)
+        queued[(row + 1) * self._padded.shape[1] + col + 1] = True
+        pending = np.flatnonzero(queued)
+        while len(pending):
+            values = distance[pending]
+            final = values < values.min() + 1.0
+            settled = pending[final]
+            queued[settled] = False
+            targets = (settled[:, None] + offsets).ravel()
+            steps = (values[final][:, None] + costs[:, settled].T).ravel()
+            better = steps < distance[targets]
+            targets = targets[better]
+            np.minimum.at(distance, targets, steps[better])
+            queued[targets] = True
+            pending = np.flatnonzero(queued)
+
+    def _directions(self):
+        """Per tile, the allowed move to the neighbour with the lowest distance + step cost."""
+        rows, cols = self.walkable.shape
+        candidates = np.empty((len(DIRECTIONS), rows, cols))
+        for i, (d_row, d_col) in enumerate(DIRECTIONS):
+            step_costs = self._step_costs[i].reshape(self._padded.shape)[1:-1, 1:-1]
+            candidates[i] = self._padded[1 + d_row:rows + 1 + d_row, 1 + d_col:cols + 1 + d_col] + step_costs
+        best = candidates.argmin(axis=0).astype(np.int8)
+        stuck = ~np.isfinite(candidates.min(axis=0)) | (self.distance == 0)
+        best[stuck] = -1
+        return best
+
+    # --- Sampling ---
+    def direction_at(self, x, y):
+        """Unit (dx, dy) towards the goal for a world pixel position; (0.0, 0.0) if there's no way."""
+        if self.directions is None:
+            return 0.0, 0.0
+        row, col = int(y // TILE_SIZE) - self.row0, int(x // TILE_SIZE) - self.col0
+        if 0 <= row < self.directions.shape[0] and 0 <= col < self.directions.shape[1]:
+            dx, dy = _UNIT[self.directions[row, col]]
+            return float(dx), float(dy)
+        return 0.0, 0.0
+
+    def directions_at(self, x, y):
+        """Vectorized direction_at for arrays of world pixel positions. Returns (dx, dy) arrays."""
+        x, y = np.asarray(x), np.asarray(y)
+        if self.directions is None:
+            return np.zeros(x.shape), np.zeros(y.shape)
+        rows = np.floor(y / TILE_SIZE).astype(np.int64) - self.row0
+        cols = np.floor(x / TILE_SIZE).astype(np.int64) - self.col0
+        height, width = self.directions.shape
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        index = np.full(x.shape, -1, dtype=np.int64)
+        index[inside] = self.directions[rows[inside], cols[inside]]
+        unit = _UNIT[index]
+        return unit[..., 0], unit[..., 1]
+
+    def distance_to_goal(self, row, col):
+        """Path length in tiles from a tile to the goal (inf if unreachable or outside the window)."""
+        row, col = row - self.row0, col - self.col0
+        if self.distance is not None and 0 <= row < self.distance.shape[0] and 0 <= col < self.distance.shape[1]:
+            return float(self.distance[row, col])
+        return float('inf')
@@ -0,0 +1,222 @@
+# durango_wildlands_clone/level/generator.py
+
+import os
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from config import TILE_TYPE_WATER, TILE_TYPE_GRASS, TILE_TYPE_DIRT, \
+                   TILE_TYPE_MOUNTAIN, TILE_TYPE_TREE_COLLIDABLE, TILE_TYPE_ROCK_COLLIDABLE, \
+                   WORLD_GENERATOR, WORLD_NOISE_SCALE, WORLD_GEN_WORKERS, WORLD_GEN_PARALLEL_MIN_TILES, \
+                   WORLD_GEN_REGION_TILES
+
+# Every tile's random values come from hashing (seed, salt, row, col), not from a
+# sequential RNG stream. That makes a generated region identical no matter how the
+# world is split up (whole map, row bands, chunks) or in which order it is built.
+
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MASK_64 = (1 << 64) - 1
+
+def _mix64(x):
+    """splitmix64 finalizer on a uint64 array (wrap-around multiplication is intended)."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * _MIX_1
+    x = x ^ (x >> np.uint64(27))
+    x = x * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+def hash_uniform(seed, salt, rows, cols):
+    """Deterministic floats in [0, 1) for broadcastable int arrays of rows and cols."""
+    key = np.array([(seed * 0x9E3779B97F4A7C15 + salt) & _MASK_64], dtype=np.uint64)
+    rows = np.asarray(rows).astype(np.int64).view(np.uint64)
+    cols = np.asarray(cols).astype(np.int64).view(np.uint64)
+    x = _mix64(_mix64(key ^ rows) + cols * _GOLDEN)
+    return (x >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+class WorldGenerator:
+    """Base class for a deterministic tile generator.
+
+    Subclasses implement generate_region(); `version` must be bumped whenever the
+    output for a given seed changes, since saves store only the tiles that differ
+    from the regenerated world.
+    """
+    name = None
+    generator_id = 0
+    version = 1
+
+    BAND_TILES = 1 << 20 # Tiles generated per band, to keep float scratch arrays small
+
+    def generate(self, seed, rows, cols, workers=None, parallel=False):
+        """Returns a (rows, cols) uint8 grid of tile ids for a seed.
+
+        With `parallel`, maps of WORLD_GEN_PARALLEL_MIN_TILES or more are generated in
+        parallel when more than one worker is available (`workers` defaults to
+        WORLD_GEN_WORKERS, None = one per CPU). Only honoured on the main thread: forking
+        the pool from another thread (the save worker regenerating a baseline) can copy a
+        lock some other thread holds into the children and deadlock them. The output is
+        the same either way.
+        """
+        workers = workers or WORLD_GEN_WORKERS or os.cpu_count() or 1
+        if (parallel and workers > 1 and rows * cols >= WORLD_GEN_PARALLEL_MIN_TILES
+                and threading.current_thread() is threading.main_thread()):
+            return self.generate_parallel(seed, rows, cols, workers)
+        map_data = np.empty((rows, cols), dtype=np.uint8)
+        band = max(1, self.BAND_TILES // max(cols, 1))
+        for r in range(0, rows, band):
+            band_rows = min(band, rows - r)
+            map_data[r:r + band_rows] = self.generate_region(seed, r, 0, band_rows, cols)
+        return map_data
+
+    def generate_parallel(self, seed, rows, cols, workers, region_tiles=WORLD_GEN_REGION_TILES):
+        """generate() split into square regions across a process pool.
+
+        Workers write their regions straight into one shared-memory tile buffer, so the
+        only things pickled are the task arguments; no tile data goes back through the
+        pool. Tiles are hashed from (seed, row, col), so the split can't change the result.
+        The shared-memory block is closed and unlinked even if the pool raises (a worker's
+        exception or a broken pool); otherwise it would outlive the process. Call this from
+        the main thread only (see generate()).
+        """
+        regions = [(r, c, min(region_tiles, rows - r), min(region_tiles, cols - c))
+                   for r in range(0, rows, region_tiles) for c in range(0, cols, region_tiles)]
+        shared = shared_memory.SharedMemory(create=True, size=max(1, rows * cols))
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(regions))) as pool:
+                for future in [pool.submit(_generate_shared, self, seed, shared.name, (rows, cols), region)
+                               for region in regions]:
+                    future.result() # Re-raises a worker's exception
+            return np.ndarray((rows, cols), dtype=np.uint8, buffer=shared.buf).copy()
+        finally:
+            shared.close()
+            shared.unlink()
+
+    def generate_region(self, seed, row, col, rows, cols):
+        """Returns the (rows, cols) uint8 tile ids of the region whose top-left tile is (row, col)."""
+        raise NotImplementedError
+
+    @staticmethod
+    def _grid_indices(row, col, rows, cols):
+        return np.arange(row, row + rows)[:, None], np.arange(col, col + cols)[None, :]
+
+
+def _generate_shared(generator, seed, shared_name, shape, region):
+    """Process pool task: generates one region into the shared tile buffer."""
+    shared = shared_memory.SharedMemory(name=shared_name)
+    try:
+        row, col, rows, cols = region
+        tiles = np.ndarray(shape, dtype=np.uint8, buffer=shared.buf)
+        tiles[row:row + rows, col:col + cols] = generator.generate_region(seed, row, col, rows, cols)
+        del tiles # Release the buffer before closing
+    finally:
+        shared.close()
+
+
+class ThresholdGenerator(WorldGenerator):
+    """The original per-tile random roll against fixed type thresholds."""
+    name = 'threshold'
+    generator_id = 1
+    version = 1
+
+    # Cumulative thresholds for the roll, and the tile id each band maps to.
+    # A roll at or above the last threshold falls through to grass.
+    THRESHOLDS = np.array([0.1, 0.2, 0.25, 0.30, 0.33])
+    TILE_IDS = np.array([
+        TILE_TYPE_WATER,            # 10% water
+        TILE_TYPE_DIRT,             # 10% dirt (grass + dirt = 80%)
+        TILE_TYPE_MOUNTAIN,         # 5% mountains
+        TILE_TYPE_TREE_COLLIDABLE,  # 5% trees
+        TILE_TYPE_ROCK_COLLIDABLE,  # 3% rocks
+        TILE_TYPE_GRASS,            # everything else
+    ], dtype=np.uint8)
+
+    def generate_region(self, seed, row, col, rows, cols):
+        r, c = self._grid_indices(row, col, rows, cols)
+        rand_vals = hash_uniform(seed, 0, r, c)
+        return self.TILE_IDS[np.searchsorted(self.THRESHOLDS, rand_vals, side='right')]
+
+
+class ValueNoiseGenerator(WorldGenerator):
+    """Fractal value noise: coherent lakes, shores and mountain ranges, with trees and
+    rocks scattered over the grass."""
+    name = 'noise'
+    generator_id = 2
+    version = 1
+
+    OCTAVES = 4
+    PERSISTENCE = 0.5 # Amplitude multiplier per octave
+
+    # Elevation bands (elevation is normalized to roughly 0..1)
+    WATER_LEVEL = 0.34
+    SHORE_LEVEL = 0.39
+    MOUNTAIN_LEVEL = 0.68
+    TREE_CHANCE = 0.08
+    ROCK_CHANCE = 0.03
+
+    def __init__(self, scale=WORLD_NOISE_SCALE):
+        self.scale = scale # Tiles per lattice cell of the lowest octave
+
+    @staticmethod
+    def _lattice_coords(coords):
+        """Splits 1-D float coords into lattice indices (relative to the first) and faded fractions."""
+        base = np.floor(coords)
+        frac = coords - base
+        # Smoothstep fade so lattice lines don't show up as creases
+        frac = frac * frac * (3 - 2 * frac)
+        base = base.astype(np.int64)
+        return base[0], base - base[0], frac
+
+    def _value_noise(self, seed, salt, y, x):
+        """Smoothly interpolated lattice noise on the grid spanned by 1-D coords y (rows) and x (cols).
+
+        Rows and cols are separable, so only the few lattice points covering the region
+        are hashed; each tile then gathers its four corners from that small table.
+        """
+        y_origin, iy, fy = self._lattice_coords(y)
+        x_origin, ix, fx = self._lattice_coords(x)
+        lattice = hash_uniform(seed, salt,
+                               np.arange(y_origin, y_origin + iy[-1] + 2)[:, None],
+                               np.arange(x_origin, x_origin + ix[-1] + 2)[None, :])
+        # Interpolate along x on the (few) lattice rows first, then along y per tile row
+        left = lattice[:, ix]
+        lattice_rows = left + (lattice[:, ix + 1] - left) * fx[None, :]
+        top = lattice_rows[iy]
+        return top + (lattice_rows[iy + 1] - top) * fy[:, None]
+
+    def elevation(self, seed, row, col, rows, cols):
+        r = np.arange(row, row + rows)
+        c = np.arange(col, col + cols)
+        total = np.zeros((rows, cols))
+        amplitude = 1.0
+        frequency = 1.0 / self.scale
+        amplitude_sum = 0.0
+        for octave in range(self.OCTAVES):
+            total += amplitude * self._value_noise(seed, 100 + octave, r * frequency, c * frequency)
+            amplitude_sum += amplitude
+            amplitude *= self.PERSISTENCE
+            frequency *= 2
+        return total / amplitude_sum
+
+    def generate_region(self, seed, row, col, rows, cols):
+        elevation = self.elevation(seed, row, col, rows, cols)
+        tiles = np.full((rows, cols), TILE_TYPE_GRASS, dtype=np.uint8)
+        tiles[elevation < self.SHORE_LEVEL] = TILE_TYPE_DIRT
+        tiles[elevation < self.WATER_LEVEL] = TILE_TYPE_WATER
+        tiles[elevation >= self.MOUNTAIN_LEVEL] = TILE_TYPE_MOUNTAIN
+
+        r, c = self._grid_indices(row, col, rows, cols)
+        scatter = hash_uniform(seed, 1, r, c)
+        grass = tiles == TILE_TYPE_GRASS
+        tiles[grass & (scatter < self.TREE_CHANCE)] = TILE_TYPE_TREE_COLLIDABLE
+        tiles[grass & (scatter >= self.TREE_CHANCE) & (scatter < self.TREE_CHANCE + self.ROCK_CHANCE)] = TILE_TYPE_ROCK_COLLIDABLE
+        return tiles
+
+
+GENERATORS = {gen.name: gen for gen in (ThresholdGenerator(), ValueNoiseGenerator())}
+GENERATORS_BY_ID = {gen.generator_id: gen for gen in GENERATORS.values()}
+
+def get_generator(name=None):
+    """Returns a registered generator by name (defaults to config.WORLD_GENERATOR)."""
+    return GENERATORS[name or WORLD_GENERATOR]
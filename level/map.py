@@ -2,68 +2,136 @@
 
 import pygame
 import random
-from config import TILE_SIZE, MAP_WIDTH_TILES, MAP_HEIGHT_TILES, \
-                   TILE_TYPE_WATER, TILE_TYPE_GRASS, TILE_TYPE_DIRT, \
-                   TILE_TYPE_MOUNTAIN, TILE_TYPE_TREE_COLLIDABLE, TILE_TYPE_ROCK_COLLIDABLE
-from level.tile import Tile # Import the Tile class
+import numpy as np
+from config import TILE_SIZE, MAP_WIDTH_TILES, MAP_HEIGHT_TILES, MAP_RENDER_MODE
+from level.tile import Tile, COLLIDABLE_LOOKUP # Import the Tile flyweight
+from level.chunk_cache import ChunkCache
+from level.chunk_pyramid import ChunkPyramid
+from level.raster import MapRaster
+from level.generator import WorldGenerator, get_generator
+from level.collision import CollisionBitmap, move_and_collide, move_box
+from level.pathfinding import Pathfinder
+from profiler import traced
 
 class Map:
-    def __init__(self):
-        self.rows = MAP_HEIGHT_TILES
-        self.cols = MAP_WIDTH_TILES
+    def __init__(self, data=None, rows=MAP_HEIGHT_TILES, cols=MAP_WIDTH_TILES, seed=None, generator=None):
+        # The world is generated deterministically from (seed, generator); a new random seed is
+        # picked if none is given. Pass `data` to wrap an existing (e.g. loaded) grid of tile ids.
+        # `seed` stays None for a wrapped grid that didn't come from a seed (e.g. an old save).
+        self.seed = seed
+        self.generator = generator if isinstance(generator, WorldGenerator) else get_generator(generator)
+        if data is None:
+            if self.seed is None:
+                self.seed = random.getrandbits(63)
+            data = self._generate_map(rows, cols)
+        self.data = np.ascontiguousarray(data, dtype=np.uint8)
+        self.rows, self.cols = self.data.shape
         self.width = self.cols * TILE_SIZE
         self.height = self.rows * TILE_SIZE
-        self.data = self._generate_map() # This will now store Tile objects
-
-    def _generate_map(self):
-        """Generates a random map with different tile types and collidable objects."""
-        # Simple random generation for now. Can be improved with noise, perlin, etc.
-        map_data = []
-        for r in range(self.rows):
-            row_tiles = []
-            for c in range(self.cols):
-                tile_id = TILE_TYPE_GRASS # Default to grass
-
-                rand_val = random.random()
-                if rand_val < 0.1:  # 10% water
-                    tile_id = TILE_TYPE_WATER
-                elif rand_val < 0.2: # 10% dirt (grass + dirt = 80%)
-                    tile_id = TILE_TYPE_DIRT
-                elif rand_val < 0.25: # 5% mountains
-                    tile_id = TILE_TYPE_MOUNTAIN
-                elif rand_val < 0.30: # 5% trees
-                    tile_id = TILE_TYPE_TREE_COLLIDABLE
-                elif rand_val < 0.33: # 3% rocks
-                    tile_id = TILE_TYPE_ROCK_COLLIDABLE
-
-                # Create a Tile object for each grid cell
-                tile = Tile(tile_id, c * TILE_SIZE, r * TILE_SIZE)
-                row_tiles.append(tile)
-            map_data.append(row_tiles)
-        return map_data
+        self.chunk_cache = ChunkCache(self)
+        self.pyramid = ChunkPyramid(self)
+        self.raster = MapRaster(self)
+        self.render_mode = MAP_RENDER_MODE # 'chunks' or 'raster', see draw()
+        self.collision = CollisionBitmap(self.data) # Kept in sync by set_tile
+        self.pathfinder = Pathfinder(self)
+        self._version = 0 # Bumped by set_tile, so derived data (flow fields) can tell it's stale
+
+    def _generate_map(self, rows, cols):
+        """Generates the grid of tile ids for this map's seed (in parallel if it's big)."""
+        return self.generator.generate(self.seed, rows, cols, parallel=True)
+
+    @property
+    def version(self):
+        """Bumped whenever tiles change, so derived data (flow fields) can tell it's stale."""
+        return self._version
+
+    def get_tile(self, row, col):
+        """Returns the Tile type at a grid cell, or None if out of bounds."""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return Tile.from_id(self.data[row, col])
+        return None
 
     def get_tile_at_pixel(self, pixel_x, pixel_y):
-        """Returns the Tile object at a given pixel coordinate."""
+        """Returns the Tile type at a given pixel coordinate."""
         col = int(pixel_x // TILE_SIZE)
         row = int(pixel_y // TILE_SIZE)
+        return self.get_tile(row, col)
 
-        # Ensure coordinates are within map bounds
+    def set_tile(self, row, col, tile_id):
+        """Changes one tile and invalidates its cached chunk."""
+        self.data[row, col] = tile_id
+        self.collision.set_tile(row, col, tile_id)
+        self.chunk_cache.invalidate_tile(row, col)
+        self.pyramid.invalidate_tile(row, col)
+        self.raster.set_tile(row, col, tile_id)
+        self.pathfinder.invalidate_tile(row, col)
+        self._version += 1
+
+    def is_collidable(self, row, col):
+        """True if the tile at a grid cell blocks movement. Out-of-bounds cells do not."""
         if 0 <= row < self.rows and 0 <= col < self.cols:
-            return self.data[row][col]
-        return None # Return None if out of bounds
+            return self.collision.is_blocked(row, col)
+        return False
+
+    def collidable_at(self, rows, cols):
+        """Vectorized is_collidable for int arrays of rows and cols (out-of-bounds cells do not block)."""
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        blocked = np.zeros(np.shape(rows), dtype=bool)
+        blocked[inside] = COLLIDABLE_LOOKUP[self.data[rows[inside], cols[inside]]]
+        return blocked
+
+    def find_path(self, start, goal):
+        """Tile path [(row, col), ...] from start to goal avoiding collidable tiles, or None."""
+        return self.pathfinder.find_path(start, goal)
+
+    def move_and_collide(self, rect, dx, dy):
+        """Moves a pygame.Rect by (dx, dy), sliding along collidable tiles. Returns (hit_x, hit_y).
+        Usable by any moving entity, not just the player."""
+        return move_and_collide(self, rect, dx, dy)
+
+    def move_box(self, x, y, width, height, dx, dy):
+        """move_and_collide for float positions (top-left x, y). Returns (new_x, new_y, hit_x, hit_y)."""
+        return move_box(self, x, y, width, height, dx, dy)
+
+    def walkable_cells(self):
+        """Returns (rows, cols) index arrays of every non-collidable tile."""
+        return np.nonzero(~COLLIDABLE_LOOKUP[self.data])
+
+    def chunk_tiles(self, chunk_row, chunk_col):
+        """Returns the tile ids of one render/streaming chunk (smaller at the map's edges)."""
+        size = self.chunk_cache.chunk_size
+        return self.data[chunk_row * size:(chunk_row + 1) * size, chunk_col * size:(chunk_col + 1) * size]
+
+    def tiles_in_region(self, row, col, rows, cols):
+        """Tile ids of a rectangle of the map (clipped at the map's edges)."""
+        return self.data[row:row + rows, col:col + cols]
+
+    def update_streaming(self, center_x, center_y, view_rect=None):
+        """Fixed maps are always fully resident; see StreamingMap."""
+
+    def update_streaming_around(self, points):
+        """Fixed maps are always fully resident; see StreamingMap."""
+
+    def camera_at(self, center_x, center_y, view_width, view_height):
+        """Top-left (world pixels) of a view_width x view_height camera centred on a point,
+        clamped to the map's edges."""
+        max_x = self.width - view_width
+        max_y = self.height - view_height
+        return max(0, min(center_x - view_width / 2, max_x)), max(0, min(center_y - view_height / 2, max_y))
+
+    def save_snapshot(self):
+        """Returns the map part of a save dict. Cheap enough to call on the game thread."""
+        return {
+            'map_data': self.data.copy(),
+            'seed': self.seed,
+            'generator': self.generator.name,
+        }
 
+    @traced('Map.draw')
     def draw(self, surface, offset_x, offset_y, zoom_level):
-        """Draws all tiles on the map, considering camera offset and zoom."""
-        # Only draw tiles that are visible on screen to optimize
-        screen_width_tiles = int(surface.get_width() / (TILE_SIZE * zoom_level)) + 2 # +2 for padding
-        screen_height_tiles = int(surface.get_height() / (TILE_SIZE * zoom_level)) + 2
-
-        start_col = max(0, int(offset_x / TILE_SIZE))
-        end_col = min(self.cols, start_col + screen_width_tiles)
-        start_row = max(0, int(offset_y / TILE_SIZE))
-        end_row = min(self.rows, start_row + screen_height_tiles)
-
-        for r in range(start_row, end_row):
-            for c in range(start_col, end_col):
-                tile = self.data[r][c]
-                tile.draw(surface, offset_x, offset_y, zoom_level)
\ No newline at end of file
+        """Draws the visible part of the map, considering camera offset and zoom."""
+        if self.render_mode == 'raster':
+            self.raster.draw(surface, offset_x, offset_y, zoom_level)
+        else:
+            # Cached chunks at 1x, coarser pre-downscaled surfaces when zoomed out
+            self.pyramid.draw(surface, offset_x, offset_y, zoom_level)
@@ -0,0 +1,466 @@
+# durango_wildlands_clone/level/pathfinding.py
+
+import math
+import time
+import heapq
+import numpy as np
+from collections import OrderedDict, deque
+from config import (PATH_CLUSTER_TILES, PATH_ENTRANCE_SPLIT, PATH_DIRECT_SEARCH_CLUSTERS,
+                    PATH_CACHE_MAX_ENTRIES, PATH_BUDGET_MS)
+
+SQRT2 = math.sqrt(2)
+# 8-connected moves: (d_row, d_col, cost). Diagonals may not cut a blocked corner.
+_STEPS = ((-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+          (-1, -1, SQRT2), (-1, 1, SQRT2), (1, -1, SQRT2), (1, 1, SQRT2))
+
+_START = 'start' # Abstract-graph nodes for the endpoints of a query; portals are (row, col) cells
+_GOAL = 'goal'
+
+
+def octile(a, b):
+    """Distance between two cells with 8-connected moves and no obstacles."""
+    d_row, d_col = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return max(d_row, d_col) + (SQRT2 - 1) * min(d_row, d_col)
+
+
+def _neighbour_table(walkable, rows, cols):
+    """For each flat cell index, the [(neighbour index, cost)] it can step to (empty if blocked).
+    `walkable` is a flat buffer (bytearray or contiguous array) of 0/1 per cell."""
+    grid = np.frombuffer(walkable, dtype=np.uint8).reshape(rows, cols).astype(bool)
+    padded = np.zeros((rows + 2, cols + 2), dtype=bool)
+    padded[1:-1, 1:-1] = grid
+    index = np.arange(rows * cols).reshape(rows, cols)
+    sources, targets, costs = [], [], []
+    for d_row, d_col, cost in _STEPS:
+        allowed = grid & padded[1 + d_row:rows + 1 + d_row, 1 + d_col:cols + 1 + d_col]
+        if d_row and d_col: # No corner cutting
+            allowed &= padded[1 + d_row:rows + 1 + d_row, 1:-1] & padded[1:-1, 1 + d_col:cols + 1 + d_col]
+        source = index[allowed]
+        sources.append(source)
+        targets.append(source + d_row * cols + d_col)
+        costs.append(np.full(len(source), cost))
+    source = np.concatenate(sources)
+    order = np.argsort(source, kind='stable') # Grouped by cell, in _STEPS order within a cell
+    targets = np.concatenate(targets)[order].tolist()
+    costs = np.concatenate(costs)[order].tolist()
+    table = []
+    start = 0
+    for end in np.cumsum(np.bincount(source, minlength=rows * cols)).tolist():
+        table.append(list(zip(targets[start:end], costs[start:end])))
+        start = end
+    return table
+
+
+def _dijkstra(neighbours, source):
+    """Distances from `source` to every cell of a neighbour table (inf if unreachable), the prev
+    index of each cell on its shortest path (-1 at the source) and the number of expansions."""
+    dist = [math.inf] * len(neighbours)
+    prev = [-1] * len(neighbours)
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    expansions = 0
+    heappop, heappush = heapq.heappop, heapq.heappush
+    while heap:
+        d, i = heappop(heap)
+        if d > dist[i]:
+            continue
+        expansions += 1
+        for j, cost in neighbours[i]:
+            nd = d + cost
+            if nd < dist[j]:
+                dist[j] = nd
+                prev[j] = i
+                heappush(heap, (nd, j))
+    return dist, prev, expansions
+
+
+def _astar(walkable, rows, cols, source, target):
+    """A* from `source` to `target` over a window's flat walkable bytearray.
+
+    Cells are flat indices row * cols + col. Returns (dist, prev, expansions): dist holds
+    the settled cells' distances; follow prev from a cell to get back to `source`.
+    """
+    dist = {source: 0.0}
+    prev = {source: -1}
+    closed = set()
+    target_row, target_col = divmod(target, cols)
+    heap = [(0.0, 0.0, source)]
+    expansions = 0
+    while heap:
+        _, d, i = heapq.heappop(heap)
+        if i in closed:
+            continue
+        closed.add(i)
+        expansions += 1
+        if i == target:
+            break
+        row, col = divmod(i, cols)
+        for d_row, d_col, cost in _STEPS:
+            r, c = row + d_row, col + d_col
+            if not (0 <= r < rows and 0 <= c < cols) or not walkable[r * cols + c]:
+                continue
+            if d_row and d_col and not (walkable[r * cols + col] and walkable[row * cols + c]):
+                continue
+            j = r * cols + c
+            nd = d + cost
+            if nd < dist.get(j, math.inf):
+                dist[j] = nd
+                prev[j] = i
+                h = octile((r, c), (target_row, target_col))
+                heapq.heappush(heap, (nd + h, nd, j))
+    # Only settled cells have final distances
+    return {i: dist[i] for i in closed}, prev, expansions
+
+
+def _walk_back(prev, i, cols, row0, col0):
+    """Cells (global row, col) from flat index `i` back to the search's source, inclusive."""
+    cells = []
+    while i != -1:
+        r, c = divmod(i, cols)
+        cells.append((row0 + r, col0 + c))
+        i = prev[i]
+    return cells
+
+
+class _Cluster:
+    """One PATH_CLUSTER_TILES square of the grid: its walkable cells, its portals and the
+    shortest in-cluster paths between them."""
+    __slots__ = ('row0', 'col0', 'rows', 'cols', 'walkable', 'neighbours', 'crossings', 'edges', 'prev', 'stale')
+
+    def __init__(self, row0, col0, rows, cols, walkable):
+        self.row0, self.col0, self.rows, self.cols = row0, col0, rows, cols
+        self.walkable = walkable # Flat bytearray, 1 = walkable
+        self.neighbours = _neighbour_table(walkable, rows, cols)
+        self.crossings = None # Portal cell -> portal cells across the border, the edges were built for
+        self.edges = None # Portal cell -> [(other portal cell, cost)], built on first use
+        self.prev = {}    # Portal cell -> prev list of its in-cluster Dijkstra
+        self.stale = False # A neighbour changed: the portals on the shared border may have moved
+
+    def local(self, cell):
+        return (cell[0] - self.row0) * self.cols + cell[1] - self.col0
+
+
+class PathRequest:
+    """A queued path query; `path` is set (a list of cells, or None if unreachable) once `done`."""
+    __slots__ = ('start', 'goal', 'path', 'done')
+
+    def __init__(self, start, goal):
+        self.start, self.goal = start, goal
+        self.path = None
+        self.done = False
+
+
+class Pathfinder:
+    """Tile pathfinding on a map's collision grid, HPA*-style.
+
+    The grid is split into clusters of PATH_CLUSTER_TILES (the chunk size, so streaming
+    a chunk in or out touches exactly one cluster). Where two neighbouring clusters
+    share walkable border cells, each run of them becomes an entrance with one or two
+    portal pairs; portals in the same cluster are linked by their in-cluster shortest
+    paths. A long query is an A* over this small portal graph, refined back to tiles
+    from the stored in-cluster paths. Short queries (start and goal within
+    PATH_DIRECT_SEARCH_CLUSTERS clusters) first try a plain A* over that window, which is exact.
+
+    Everything is built lazily per cluster and dropped by invalidate_region() when tiles
+    change. Found paths go into an LRU cache that remembers which clusters each path
+    crosses, so a tile change only evicts the paths through its cluster. Paths are
+    8-connected lists of (row, col) tiles from start to goal, or None if unreachable.
+
+    For many agents, request() queues a query and process() answers queued ones until
+    the per-tick time budget is spent.
+    """
+
+    def __init__(self, game_map, cluster_size=PATH_CLUSTER_TILES, cache_entries=PATH_CACHE_MAX_ENTRIES):
+        self.map = game_map
+        self.cluster_size = cluster_size
+        self.cache_entries = cache_entries
+        self._clusters = {}  # (cluster_row, cluster_col) -> _Cluster
+        self._borders = {}   # ('h' or 'v', cluster_row, cluster_col) -> [(cell on this side, cell on the other)]
+        self._cache = OrderedDict() # (start, goal) -> (path, set of clusters it crosses)
+        self._cached_by_cluster = {} # cluster -> set of cache keys of the paths crossing it
+        self._queue = deque()
+        self.expansions = 0 # Search nodes expanded, for profiling
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # --- Grid access ---
+    def _walkable_window(self, row0, col0, rows, cols):
+        """Flat walkable bytearray of a window, clipped to the map by the caller."""
+        grid_rows = np.arange(row0, row0 + rows)[:, None]
+        grid_cols = np.arange(col0, col0 + cols)[None, :]
+        blocked = self.map.collidable_at(np.broadcast_to(grid_rows, (rows, cols)), np.broadcast_to(grid_cols, (rows, cols)))
+        return bytearray((~blocked).astype(np.uint8).tobytes())
+
+    def _cluster_of(self, cell):
+        return cell[0] // self.cluster_size, cell[1] // self.cluster_size
+
+    def _cluster(self, key):
+        cluster = self._clusters.get(key)
+        if cluster is None:
+            size = self.cluster_size
+            row0, col0 = key[0] * size, key[1] * size
+            rows, cols = min(size, self.map.rows - row0), min(size, self.map.cols - col0)
+            cluster = self._clusters[key] = _Cluster(row0, col0, rows, cols, self._walkable_window(row0, col0, rows, cols))
+        return cluster
+
+    def is_walkable(self, cell):
+        row, col = cell
+        if not (0 <= row < self.map.rows and 0 <= col < self.map.cols):
+            return False
+        cluster = self._cluster(self._cluster_of(cell))
+        return bool(cluster.walkable[cluster.local(cell)])
+
+    # --- Abstract graph ---
+    def _border(self, key):
+        """Portal pairs across one cluster border: 'h' = with the cluster to the right, 'v' = below."""
+        portals = self._borders.get(key)
+        if portals is not None:
+            return portals
+        kind, cluster_row, cluster_col = key
+        here = self._cluster((cluster_row, cluster_col))
+        portals = []
+        if kind == 'h' and here.col0 + here.cols < self.map.cols:
+            there = self._cluster((cluster_row, cluster_col + 1))
+            cells = [((r, here.col0 + here.cols - 1), (r, there.col0)) for r in range(here.row0, here.row0 + here.rows)]
+        elif kind == 'v' and here.row0 + here.rows < self.map.rows:
+            there = self._cluster((cluster_row + 1, cluster_col))
+            cells = [((here.row0 + here.rows - 1, c), (there.row0, c)) for c in range(here.col0, here.col0 + here.cols)]
+        else:
+            cells = []
+            there = None
+        # Runs of cells open on both sides are entrances
+        run = []
+        for pair in cells + [None]:
+            if pair is not None and here.walkable[here.local(pair[0])] and there.walkable[there.local(pair[1])]:
+                run.append(pair)
+                continue
+            if len(run) >= PATH_ENTRANCE_SPLIT:
+                portals += [run[0], run[-1]]
+            elif run:
+                portals.append(run[len(run) // 2])
+            run = []
+        self._borders[key] = portals
+        return portals
+
+    def _edges(self, cluster_key):
+        """Portal cell -> [(neighbour portal, cost)] for a cluster, across and inside it."""
+        cluster = self._cluster(cluster_key)
+        if cluster.edges is not None and not cluster.stale:
+            return cluster.edges
+        cluster_row, cluster_col = cluster_key
+        crossings = {} # Portal cell here -> portal cells across the border
+        for key, side in ((('h', cluster_row, cluster_col), 0), (('v', cluster_row, cluster_col), 0),
+                          (('h', cluster_row, cluster_col - 1), 1), (('v', cluster_row - 1, cluster_col), 1)):
+            if key[1] < 0 or key[2] < 0:
+                continue
+            for pair in self._border(key):
+                crossings.setdefault(pair[side], []).append(pair[1 - side])
+        cluster.stale = False
+        if crossings == cluster.crossings:
+            return cluster.edges # Same portals as before: the in-cluster paths still hold
+
+        cluster.crossings = crossings
+        cluster.prev = {}
+        edges = {}
+        for portal, across in crossings.items():
+            dist, prev, expansions = _dijkstra(cluster.neighbours, cluster.local(portal))
+            self.expansions += expansions
+            cluster.prev[portal] = prev
+            edges[portal] = [(other, 1.0) for other in across]
+            for other in crossings:
+                d = dist[cluster.local(other)]
+                if other != portal and d < math.inf:
+                    edges[portal].append((other, d))
+        cluster.edges = edges
+        return edges
+
+    def invalidate_region(self, row, col, rows=1, cols=1):
+        """Forgets the clusters overlapping a tile region (after tiles changed or a chunk streamed
+        in or out), the borders around them and the cached paths through them."""
+        size = self.cluster_size
+        for cluster_row in range(row // size, (row + rows - 1) // size + 1):
+            for cluster_col in range(col // size, (col + cols - 1) // size + 1):
+                key = (cluster_row, cluster_col)
+                self._clusters.pop(key, None)
+                for border in (('h', cluster_row, cluster_col), ('v', cluster_row, cluster_col),
+                               ('h', cluster_row, cluster_col - 1), ('v', cluster_row - 1, cluster_col)):
+                    self._borders.pop(border, None)
+                # The neighbours' portals on the shared borders may have moved; _edges checks
+                for neighbour in ((cluster_row, cluster_col - 1), (cluster_row, cluster_col + 1),
+                                  (cluster_row - 1, cluster_col), (cluster_row + 1, cluster_col)):
+                    other = self._clusters.get(neighbour)
+                    if other is not None:
+                        other.stale = True
+                for cache_key in self._cached_by_cluster.pop(key, ()):
+                    self._uncache(cache_key)
+
+    def invalidate_tile(self, row, col):
+        self.invalidate_region(row, col)
+
+    def clear(self):
+        self._clusters.clear()
+        self._borders.clear()
+        self._cache.clear()
+        self._cached_by_cluster.clear()
+
+    # --- Queries ---
+    def find_path(self, start, goal):
+        """Shortest (hierarchically near-shortest for long trips) tile path from start to goal, or None."""
+        start, goal = tuple(start), tuple(goal)
+        key = (start, goal)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached[0]
+        self.cache_misses += 1
+        if not (self.is_walkable(start) and self.is_walkable(goal)):
+            return None
+        path = None
+        reach = PATH_DIRECT_SEARCH_CLUSTERS * self.cluster_size
+        if max(abs(start[0] - goal[0]), abs(start[1] - goal[1])) <= reach:
+            path = self._direct_path(start, goal, reach)
+        if path is None:
+            path = self._hierarchical_path(start, goal)
+        if path is not None:
+            self._cache_path(key, path)
+        return path
+
+    def _direct_path(self, start, goal, margin):
+        """Plain A* in the window around start and goal, widened by `margin` tiles. None if it
+        finds nothing (a path might still exist around the window)."""
+        row0 = max(0, min(start[0], goal[0]) - margin)
+        col0 = max(0, min(start[1], goal[1]) - margin)
+        rows = min(self.map.rows, max(start[0], goal[0]) + margin + 1) - row0
+        cols = min(self.map.cols, max(start[1], goal[1]) + margin + 1) - col0
+        walkable = self._walkable_window(row0, col0, rows, cols)
+        target = (goal[0] - row0) * cols + goal[1] - col0
+        dist, prev, expansions = _astar(walkable, rows, cols, (start[0] - row0) * cols + start[1] - col0, target)
+        self.expansions += expansions
+        if target not in dist:
+            return None
+        return _walk_back(prev, target, cols, row0, col0)[::-1]
+
+    def _hierarchical_path(self, start, goal):
+        start_key, goal_key = self._cluster_of(start), self._cluster_of(goal)
+        start_cluster, goal_cluster = self._cluster(start_key), self._cluster(goal_key)
+        start_portals, goal_portals = self._edges(start_key), self._edges(goal_key)
+
+        # Connect the endpoints to their own clusters' portals
+        start_dist, start_prev, expansions = _dijkstra(start_cluster.neighbours, start_cluster.local(start))
+        goal_dist, goal_prev, more = _dijkstra(goal_cluster.neighbours, goal_cluster.local(goal))
+        self.expansions += expansions + more
+        start_edges = [(p, start_dist[start_cluster.local(p)]) for p in start_portals
+                       if start_dist[start_cluster.local(p)] < math.inf]
+        if start_key == goal_key and start_dist[start_cluster.local(goal)] < math.inf:
+            start_edges.append((_GOAL, start_dist[start_cluster.local(goal)]))
+        goal_edges = {p: goal_dist[goal_cluster.local(p)] for p in goal_portals
+                      if goal_dist[goal_cluster.local(p)] < math.inf}
+
+        # A* over the portal graph
+        goal_row, goal_col = goal
+        g = {_START: 0.0}
+        came_from = {_START: None}
+        heap = [(octile(start, goal), 0.0, 0, _START)]
+        closed = set()
+        tie = 1 # Heap tiebreaker: start/goal nodes are strings, portals tuples
+        while heap:
+            _, d, _, node = heapq.heappop(heap)
+            if node in closed:
+                continue
+            closed.add(node)
+            self.expansions += 1
+            if node == _GOAL:
+                break
+            if node == _START:
+                neighbours = start_edges
+            else:
+                neighbours = self._edges(self._cluster_of(node))[node]
+                if node in goal_edges:
+                    neighbours = neighbours + [(_GOAL, goal_edges[node])]
+            for other, cost in neighbours:
+                nd = d + cost
+                if nd < g.get(other, math.inf):
+                    g[other] = nd
+                    came_from[other] = node
+                    if other == _GOAL:
+                        h = 0.0
+                    else:
+                        d_row, d_col = abs(other[0] - goal_row), abs(other[1] - goal_col)
+                        h = d_row + d_col + (SQRT2 - 2) * min(d_row, d_col) # octile()
+                    heapq.heappush(heap, (nd + h, nd, tie, other))
+                    tie += 1
+        if _GOAL not in closed:
+            return None
+
+        nodes = [_GOAL]
+        while came_from[nodes[-1]] is not None:
+            nodes.append(came_from[nodes[-1]])
+        nodes.reverse()
+
+        # Refine each abstract hop back to tiles
+        path = [start]
+        for a, b in zip(nodes, nodes[1:]):
+            if a == _START:
+                target = goal if b == _GOAL else b
+                path += _walk_back(start_prev, start_cluster.local(target), start_cluster.cols,
+                                   start_cluster.row0, start_cluster.col0)[::-1][1:]
+            elif b == _GOAL:
+                # goal_prev leads from a portal towards the goal
+                path += _walk_back(goal_prev, goal_cluster.local(a), goal_cluster.cols,
+                                   goal_cluster.row0, goal_cluster.col0)[1:]
+            elif self._cluster_of(a) == self._cluster_of(b):
+                cluster = self._cluster(self._cluster_of(a))
+                path += _walk_back(cluster.prev[a], cluster.local(b), cluster.cols, cluster.row0, cluster.col0)[::-1][1:]
+            else:
+                path.append(b) # Step across a border
+        return path
+
+    # --- Path cache ---
+    def _cache_path(self, key, path):
+        clusters = {self._cluster_of(cell) for cell in path}
+        self._cache[key] = (path, clusters)
+        for cluster in clusters:
+            self._cached_by_cluster.setdefault(cluster, set()).add(key)
+        if len(self._cache) > self.cache_entries:
+            self._uncache(next(iter(self._cache)))
+
+    def _uncache(self, key):
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return
+        for cluster in entry[1]:
+            keys = self._cached_by_cluster.get(cluster)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._cached_by_cluster[cluster]
+
+    # --- Budgeted requests ---
+    def request(self, start, goal):
+        """Queues a path query for process(); cached paths are answered right away."""
+        request = PathRequest(tuple(start), tuple(goal))
+        cached = self._cache.get((request.start, request.goal))
+        if cached is not None:
+            self._cache.move_to_end((request.start, request.goal))
+            self.cache_hits += 1
+            request.path, request.done = cached[0], True
+        else:
+            self._queue.append(request)
+        return request
+
+    def process(self, budget_ms=PATH_BUDGET_MS):
+        """Answers queued requests until `budget_ms` is spent (at least one per call, so the
+        queue always drains). Returns how many were answered."""
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        answered = 0
+        while self._queue and (not answered or time.perf_counter() < deadline):
+            request = self._queue.popleft()
+            request.path = self.find_path(request.start, request.goal)
+            request.done = True
+            answered += 1
+        return answered
+
+    @property
+    def pending(self):
+        return len(self._queue)
@@ -0,0 +1,153 @@
+# durango_wildlands_clone/level/raster.py
+
+import math
+import numpy as np
+import pygame
+from config import TILE_SIZE, RASTER_MAX_TILES, RASTER_MARGIN_TILES
+from level.tile import Tile
+from profiler import traced, tracer
+
+UNKNOWN_TILE_COLOR = (200, 200, 200) # Palette entry for ids no Tile has been made for yet (Tile's default color)
+
+class MapRaster:
+    """Flat-color map renderer: an 8-bit paletted surface with one pixel per tile.
+
+    Palette entry N is tile id N's color, so the raster is just the tile-id grid
+    (written in with pygame.surfarray). Drawing expands the visible tiles through the
+    palette at one pixel per tile, then does one transform.scale into a reused
+    screen-sized surface and one blit. The cost depends on the screen size only, not on
+    the zoom level or how many tiles are visible, and recoloring tiles (highlights,
+    day/night tinting) is a palette change with no re-render at all.
+
+    Maps of up to RASTER_MAX_TILES a side are rastered whole, once. Bigger (streamed)
+    maps get a window around the camera, RASTER_MARGIN_TILES wider than the view on
+    every side, rebuilt when the view leaves it. set_tile keeps the raster in sync.
+    """
+
+    def __init__(self, game_map, max_tiles=RASTER_MAX_TILES, margin=RASTER_MARGIN_TILES):
+        self.map = game_map
+        self.max_tiles = max_tiles
+        self.margin = margin
+        self.surface = None
+        self.row0 = self.col0 = 0 # Top-left tile of the raster window
+        self.rows = self.cols = 0
+        self._base_palette = [UNKNOWN_TILE_COLOR] * 256 # Tile colors, before tint and highlights
+        self._known_ids = set()
+        self._tint = None
+        self._highlights = {} # tile id -> color
+        self._expanded = None # Visible tiles in the display format, one pixel each
+        self._scaled = None # Reused transform.scale target
+
+    # --- Palette ---
+    def _learn_ids(self, tile_ids):
+        """Adds the colors of tile ids not seen before to the palette. True if any were new."""
+        new_ids = set(tile_ids) - self._known_ids
+        for tile_id in new_ids:
+            self._base_palette[tile_id] = Tile.from_id(tile_id).color
+        self._known_ids |= new_ids
+        return bool(new_ids)
+
+    def palette(self):
+        """The 256 colors in use: tile colors with the tint and highlights applied."""
+        palette = list(self._base_palette)
+        for tile_id, color in self._highlights.items():
+            palette[tile_id] = color
+        if self._tint is not None:
+            tint_r, tint_g, tint_b = self._tint
+            palette = [(r * tint_r // 255, g * tint_g // 255, b * tint_b // 255) for r, g, b in palette]
+        return palette
+
+    def _apply_palette(self):
+        if self.surface is not None:
+            self.surface.set_palette(self.palette())
+
+    def set_tint(self, color):
+        """Multiplies every tile color by `color` (e.g. a dusky blue for night); None removes it."""
+        self._tint = None if color is None else tuple(color)
+        self._apply_palette()
+
+    def highlight(self, tile_id, color):
+        """Shows every tile of one type in `color`; color None restores it."""
+        if color is None:
+            self._highlights.pop(tile_id, None)
+        else:
+            self._highlights[tile_id] = tuple(color)
+        self._apply_palette()
+
+    # --- Raster contents ---
+    def _window_for(self, first_row, first_col, last_row, last_col):
+        """The tile window to raster for a visible tile range (inclusive)."""
+        if self.map.rows <= self.max_tiles and self.map.cols <= self.max_tiles:
+            return 0, 0, self.map.rows, self.map.cols
+        # Aligned to chunks, so a rebuild touches whole chunks of a streamed map
+        size = self.map.chunk_cache.chunk_size
+        row0 = max(0, first_row - self.margin) // size * size
+        col0 = max(0, first_col - self.margin) // size * size
+        row1 = min(self.map.rows, (last_row + self.margin) // size * size + size)
+        col1 = min(self.map.cols, (last_col + self.margin) // size * size + size)
+        return row0, col0, row1 - row0, col1 - col0
+
+    @traced('MapRaster.rebuild')
+    def _rebuild(self, row0, col0, rows, cols):
+        """Rasters a tile window of the map."""
+        tiles = self.map.tiles_in_region(row0, col0, rows, cols)
+
+        if self.surface is None or self.surface.get_size() != (cols, rows):
+            self.surface = pygame.Surface((cols, rows), 0, 8)
+        self.row0, self.col0, self.rows, self.cols = row0, col0, rows, cols
+        self._learn_ids(np.unique(tiles).tolist())
+        self._apply_palette()
+        pygame.surfarray.pixels2d(self.surface)[:] = tiles.T # surfarray is indexed [x, y]
+
+    def set_tile(self, row, col, tile_id):
+        """Updates one tile's pixel (a no-op outside the window)."""
+        if self.surface is None:
+            return
+        if self.row0 <= row < self.row0 + self.rows and self.col0 <= col < self.col0 + self.cols:
+            if self._learn_ids([int(tile_id)]):
+                self._apply_palette()
+            self.surface.set_at((col - self.col0, row - self.row0), int(tile_id))
+
+    def clear(self):
+        """Drops the raster; the next draw rebuilds it."""
+        self.surface = None
+        self._expanded = self._scaled = None
+
+    # --- Drawing ---
+    @staticmethod
+    def _display_surface(size):
+        surface = pygame.Surface(size)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert() # Match the display format so blits take the fast path
+        return surface
+
+    @traced('MapRaster.draw')
+    def draw(self, surface, offset_x, offset_y, zoom_level):
+        """Draws the visible part of the map, like Map.draw, in flat tile colors."""
+        # Whole tiles overlapping the view
+        first_col = max(0, int(offset_x // TILE_SIZE))
+        first_row = max(0, int(offset_y // TILE_SIZE))
+        last_col = min(self.map.cols - 1, math.ceil((offset_x + surface.get_width() / zoom_level) / TILE_SIZE) - 1)
+        last_row = min(self.map.rows - 1, math.ceil((offset_y + surface.get_height() / zoom_level) / TILE_SIZE) - 1)
+        if last_col < first_col or last_row < first_row:
+            return
+
+        if (self.surface is None or first_row < self.row0 or first_col < self.col0
+                or last_row >= self.row0 + self.rows or last_col >= self.col0 + self.cols):
+            self._rebuild(*self._window_for(first_row, first_col, last_row, last_col))
+
+        visible = pygame.Rect(first_col - self.col0, first_row - self.row0, last_col - first_col + 1, last_row - first_row + 1)
+        # Same rounding as Map.draw's chunk positions, so tile edges land on the same pixels
+        screen_x = int((first_col * TILE_SIZE - offset_x) * zoom_level)
+        screen_y = int((first_row * TILE_SIZE - offset_y) * zoom_level)
+        size = (max(1, int(((last_col + 1) * TILE_SIZE - offset_x) * zoom_level) - screen_x),
+                max(1, int(((last_row + 1) * TILE_SIZE - offset_y) * zoom_level) - screen_y))
+        if self._expanded is None or self._expanded.get_size() != visible.size:
+            self._expanded = self._display_surface(visible.size)
+        if self._scaled is None or self._scaled.get_size() != size:
+            self._scaled = self._display_surface(size)
+        # Palette lookup on the few visible tiles, so the big scale and blit are plain 32-bit copies
+        self._expanded.blit(self.surface, (0, 0), visible)
+        pygame.transform.scale(self._expanded, size, self._scaled)
+        surface.blit(self._scaled, (screen_x, screen_y))
+        tracer.draw_calls += 1
@@ -0,0 +1,286 @@
+# durango_wildlands_clone/level/streaming_map.py
+
+import os
+import random
+import shutil
+import tempfile
+import weakref
+import numpy as np
+from config import TILE_SIZE, CHUNK_SIZE_TILES, STREAM_WORLD_SIZE_TILES, \
+                   STREAM_LOAD_RADIUS_CHUNKS, STREAM_UNLOAD_RADIUS_CHUNKS, MAP_RENDER_MODE
+from level.map import Map
+from level.tile import Tile, COLLIDABLE_LOOKUP
+from level.chunk_cache import ChunkCache
+from level.chunk_pyramid import ChunkPyramid
+from level.raster import MapRaster
+from level.generator import WorldGenerator, get_generator
+from level.collision import CollisionBitmap
+from level.pathfinding import Pathfinder
+
+class ChunkStore:
+    """On-disk store for chunks that were modified and then evicted from memory.
+
+    Unmodified chunks are never written: they are regenerated from the seed.
+    Without a `directory` a private temp directory is used and removed again
+    when the store is garbage-collected or the program exits.
+    """
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix='durango_chunks_')
+            self._cleanup = weakref.finalize(self, shutil.rmtree, directory, True)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._stored = set() # (chunk_row, chunk_col)
+        for name in os.listdir(directory):
+            if name.endswith('.chunk'):
+                chunk_row, chunk_col = name[:-len('.chunk')].split('_')
+                self._stored.add((int(chunk_row), int(chunk_col)))
+
+    def _path(self, coords):
+        return os.path.join(self.directory, f'{coords[0]}_{coords[1]}.chunk')
+
+    def __contains__(self, coords):
+        return coords in self._stored
+
+    def coords(self):
+        return set(self._stored)
+
+    def write(self, coords, tiles):
+        """Stores a chunk's tile ids: a (rows u16, cols u16) shape header, then the raw grid."""
+        path = self._path(coords)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(np.array(tiles.shape, dtype='<u2').tobytes())
+            f.write(np.ascontiguousarray(tiles, dtype=np.uint8).tobytes())
+        os.replace(temp_path, path)
+        self._stored.add(coords)
+
+    def read(self, coords):
+        """Returns a stored chunk's tile ids, or None if the chunk was never stored."""
+        if coords not in self._stored:
+            return None
+        with open(self._path(coords), 'rb') as f:
+            buffer = bytearray(f.read())
+        rows, cols = np.frombuffer(buffer, dtype='<u2', count=2)
+        return np.frombuffer(buffer, dtype=np.uint8, offset=4).reshape(rows, cols)
+
+
+class StreamingMap(Map):
+    """An open world held in memory only around the player.
+
+    The world is split into CHUNK_SIZE_TILES chunks (the same chunks Map.draw renders).
+    A chunk is generated from the seed, or read back from the ChunkStore if it had been
+    modified, the first time anything touches it. update_streaming() evicts chunks that
+    are far from the player and off camera; modified ones go to the store first. Resident
+    memory therefore depends on the streaming radius, not on how far the player walks.
+    """
+
+    def __init__(self, rows=STREAM_WORLD_SIZE_TILES, cols=STREAM_WORLD_SIZE_TILES, seed=None, generator=None,
+                 modified_chunks=None, chunk_store=None):
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.generator = generator if isinstance(generator, WorldGenerator) else get_generator(generator)
+        self.rows = rows
+        self.cols = cols
+        self.width = self.cols * TILE_SIZE
+        self.height = self.rows * TILE_SIZE
+        self.chunk_size = CHUNK_SIZE_TILES
+        self.chunk_cache = ChunkCache(self, chunk_size=self.chunk_size)
+        self.pyramid = ChunkPyramid(self)
+        self.raster = MapRaster(self) # Windowed: the world is far bigger than RASTER_MAX_TILES
+        self.render_mode = MAP_RENDER_MODE
+        self.pathfinder = Pathfinder(self) # Sees non-resident chunks as blocked, like collidable_at
+        self.chunk_store = chunk_store or ChunkStore()
+
+        self._chunks = {}   # (chunk_row, chunk_col) -> resident uint8 tile grid
+        self._collision = {} # (chunk_row, chunk_col) -> CollisionBitmap of a resident chunk
+        self._dirty = set() # Resident chunks modified since they were last stored
+        self._version = 0 # Bumped whenever resident tiles change (load, evict, set_tile)
+        self._stack_version = -1
+        self._stack = None
+        self._chunk_key_stride = (self.cols - 1) // self.chunk_size + 1
+
+        # Chunks modified in a loaded save go straight to the store; they load on demand
+        for coords, tiles in (modified_chunks or {}).items():
+            self.chunk_store.write(coords, tiles)
+
+    @property
+    def resident_chunk_count(self):
+        return len(self._chunks)
+
+    # --- Chunk residency ---
+    def _chunk(self, chunk_row, chunk_col):
+        """Returns a chunk's tile grid, loading or generating it if it isn't resident."""
+        coords = (chunk_row, chunk_col)
+        tiles = self._chunks.get(coords)
+        if tiles is None:
+            tiles = self.chunk_store.read(coords)
+            if tiles is None:
+                start_row = chunk_row * self.chunk_size
+                start_col = chunk_col * self.chunk_size
+                tiles = self.generator.generate_region(
+                    self.seed, start_row, start_col,
+                    min(self.chunk_size, self.rows - start_row), min(self.chunk_size, self.cols - start_col)
+                )
+            self._chunks[coords] = tiles
+            self._collision[coords] = CollisionBitmap(tiles)
+            self._version += 1
+            self.pathfinder.invalidate_region(chunk_row * self.chunk_size, chunk_col * self.chunk_size,
+                                              self.chunk_size, self.chunk_size)
+        return tiles
+
+    def _evict(self, coords):
+        tiles = self._chunks.pop(coords)
+        del self._collision[coords]
+        self._version += 1
+        self.pathfinder.invalidate_region(coords[0] * self.chunk_size, coords[1] * self.chunk_size,
+                                          self.chunk_size, self.chunk_size)
+        if coords in self._dirty:
+            self.chunk_store.write(coords, tiles)
+            self._dirty.discard(coords)
+
+    def update_streaming(self, center_x, center_y, view_rect=None):
+        """Loads the chunks around a world pixel position (usually the player) and evicts
+        the ones beyond the unload radius that aren't inside `view_rect` (camera, world pixels)."""
+        self.update_streaming_around([(center_x, center_y, view_rect)])
+
+    def update_streaming_around(self, points):
+        """update_streaming for several players sharing the world (a server's): loads the chunks
+        around every (center_x, center_y, view_rect) and only evicts chunks that are beyond the
+        unload radius of all of them and inside none of the views."""
+        chunk_pixels = self.chunk_size * TILE_SIZE
+        # Players close together share chunks, so each distinct chunk and view is handled once
+        centers = {(int(center_y // chunk_pixels), int(center_x // chunk_pixels)) for center_x, center_y, _ in points}
+        views = {(int(y // chunk_pixels), int((y + h) // chunk_pixels), int(x // chunk_pixels), int((x + w) // chunk_pixels))
+                 for _, _, (x, y, w, h) in (point for point in points if point[2] is not None)}
+        max_chunk_row = (self.rows - 1) // self.chunk_size
+        max_chunk_col = (self.cols - 1) // self.chunk_size
+
+        radius = STREAM_LOAD_RADIUS_CHUNKS
+        for center_row, center_col in centers:
+            for chunk_row in range(max(0, center_row - radius), min(max_chunk_row, center_row + radius) + 1):
+                for chunk_col in range(max(0, center_col - radius), min(max_chunk_col, center_col + radius) + 1):
+                    self._chunk(chunk_row, chunk_col)
+
+        for coords in list(self._chunks):
+            chunk_row, chunk_col = coords
+            if any(max(abs(chunk_row - center_row), abs(chunk_col - center_col)) <= STREAM_UNLOAD_RADIUS_CHUNKS
+                   for center_row, center_col in centers):
+                continue
+            if any(top <= chunk_row <= bottom and left <= chunk_col <= right for top, bottom, left, right in views):
+                continue
+            self._evict(coords)
+
+    # --- Map interface ---
+    def get_tile(self, row, col):
+        """Returns the Tile type at a grid cell, or None if out of bounds."""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            tiles = self._chunk(row // self.chunk_size, col // self.chunk_size)
+            return Tile.from_id(tiles[row % self.chunk_size, col % self.chunk_size])
+        return None
+
+    def set_tile(self, row, col, tile_id):
+        """Changes one tile, marks its chunk modified and invalidates its rendered chunk."""
+        coords = (row // self.chunk_size, col // self.chunk_size)
+        tiles = self._chunk(*coords)
+        if not tiles.flags.writeable:
+            tiles = self._chunks[coords] = tiles.copy()
+        tiles[row % self.chunk_size, col % self.chunk_size] = tile_id
+        self._collision[coords].set_tile(row % self.chunk_size, col % self.chunk_size, tile_id)
+        self._dirty.add(coords)
+        self._version += 1
+        self.chunk_cache.invalidate_tile(row, col)
+        self.pyramid.invalidate_tile(row, col)
+        self.raster.set_tile(row, col, tile_id)
+        self.pathfinder.invalidate_tile(row, col)
+
+    def is_collidable(self, row, col):
+        """True if the tile at a grid cell blocks movement. Out-of-bounds cells do not."""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            coords = (row // self.chunk_size, col // self.chunk_size)
+            bitmap = self._collision.get(coords)
+            if bitmap is None:
+                self._chunk(*coords)
+                bitmap = self._collision[coords]
+            return bitmap.is_blocked(row % self.chunk_size, col % self.chunk_size)
+        return False
+
+    def collidable_at(self, rows, cols):
+        """Vectorized is_collidable for int arrays of rows and cols.
+
+        Unlike is_collidable this never loads a chunk: cells in chunks that aren't
+        resident count as blocked, so batch movers (creatures) stay inside the
+        streamed-in area instead of pulling the world in around them.
+        """
+        keys, stack = self._collision_stack()
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        rows = np.where(inside, rows, 0)
+        cols = np.where(inside, cols, 0)
+        wanted = (rows // self.chunk_size) * self._chunk_key_stride + cols // self.chunk_size
+        slots = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        slots = np.where(keys[slots] == wanted, slots, len(keys)) # Last slot: not resident
+        return stack[slots, rows % self.chunk_size, cols % self.chunk_size] & inside
+
+    def _collision_stack(self):
+        """Resident chunks' collision grids stacked into one array, plus their sorted chunk keys.
+        Rebuilt only after chunks were loaded, evicted or changed."""
+        if self._stack_version != self._version:
+            coords = sorted(self._chunks)
+            keys = np.array([r * self._chunk_key_stride + c for r, c in coords] or [-1], dtype=np.int64)
+            stack = np.ones((len(coords) + 1, self.chunk_size, self.chunk_size), dtype=bool)
+            for slot, coord in enumerate(coords):
+                tiles = self._chunks[coord]
+                stack[slot, :tiles.shape[0], :tiles.shape[1]] = COLLIDABLE_LOOKUP[tiles]
+            self._stack = (keys, stack)
+            self._stack_version = self._version
+        return self._stack
+
+    def walkable_cells(self):
+        """Returns (rows, cols) index arrays of the non-collidable tiles in resident chunks."""
+        all_rows, all_cols = [], []
+        for (chunk_row, chunk_col), tiles in self._chunks.items():
+            rows, cols = np.nonzero(~COLLIDABLE_LOOKUP[tiles])
+            all_rows.append(rows + chunk_row * self.chunk_size)
+            all_cols.append(cols + chunk_col * self.chunk_size)
+        if not all_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(all_rows), np.concatenate(all_cols)
+
+    def chunk_tiles(self, chunk_row, chunk_col):
+        return self._chunk(chunk_row, chunk_col)
+
+    def tiles_in_region(self, row, col, rows, cols):
+        """Tile ids of a rectangle of the world, copied out of its chunks (loading them if needed)."""
+        rows, cols = min(rows, self.rows - row), min(cols, self.cols - col)
+        size = self.chunk_size
+        tiles = np.empty((rows, cols), dtype=np.uint8)
+        for chunk_row in range(row // size, (row + rows - 1) // size + 1):
+            for chunk_col in range(col // size, (col + cols - 1) // size + 1):
+                chunk = self._chunk(chunk_row, chunk_col)
+                # Overlap of the chunk and the region, in world tiles
+                top, left = max(row, chunk_row * size), max(col, chunk_col * size)
+                bottom = min(row + rows, chunk_row * size + chunk.shape[0])
+                right = min(col + cols, chunk_col * size + chunk.shape[1])
+                tiles[top - row:bottom - row, left - col:right - col] = \
+                    chunk[top - chunk_row * size:bottom - chunk_row * size, left - chunk_col * size:right - chunk_col * size]
+        return tiles
+
+    def save_snapshot(self):
+        """Returns the map part of a save dict: only the chunks that differ from the seeded world.
+
+        Only resident modified chunks are copied here; ones already in the ChunkStore are
+        passed as coordinates and read by encode_save on the save worker, so the cost on the
+        game thread doesn't grow with how much of the world was explored. (A stored chunk that
+        is loaded, changed and evicted again before the worker gets to it is saved in that
+        newer state; ChunkStore.write swaps files in whole, so it's never torn.)
+        """
+        return {
+            'map_data': None,
+            'map_size': (self.rows, self.cols),
+            'chunks': {coords: self._chunks[coords].copy() for coords in self._dirty},
+            'chunk_store': self.chunk_store, # Keeps the store's directory alive until the save is written
+            'stored_chunks': sorted(self.chunk_store.coords() - self._dirty),
+            'chunk_size': self.chunk_size,
+            'seed': self.seed,
+            'generator': self.generator.name,
+        }
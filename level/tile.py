@@ -1,18 +1,44 @@
 # durango_wildlands_clone/level/tile.py
 
 import pygame
+import numpy as np
 from config import TILE_SIZE, TILE_TYPE_WATER, TILE_TYPE_GRASS, TILE_TYPE_DIRT, \
                    TILE_TYPE_MOUNTAIN, TILE_TYPE_TREE_COLLIDABLE, TILE_TYPE_ROCK_COLLIDABLE, \
                    COLLISION_TILES
+from assets import assets
+
+# Lookup table indexed by tile id (the map grid is uint8, so 256 entries cover every id).
+# Lets collision code test a tile id without going through a Tile object.
+COLLIDABLE_LOOKUP = np.zeros(256, dtype=bool)
+COLLIDABLE_LOOKUP[list(COLLISION_TILES)] = True
 
 class Tile:
-    def __init__(self, tile_id, x, y):
+    """A tile *type* (flyweight). The map stores only tile ids; one shared Tile per id
+    holds the sprite, color and collidability for every cell of that type.
+
+    Tiles are drawn from the 'tiles' atlas sheet; a tile id without an image in
+    SPRITE_FILES shows its flat color."""
+
+    _instances = {} # tile_id -> Tile
+
+    def __init__(self, tile_id):
         self.id = tile_id
-        self.rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
         self.is_collidable = self.id in COLLISION_TILES # Check if its ID is in our collision set
-        
-        # Basic visual representation (can be replaced by actual sprites later)
+
+        # Placeholder color, used when the tile has no sprite image
         self.color = self._get_color_from_id(tile_id)
+        self.sprite = f'tile_{tile_id}'
+        assets.declare('tiles', self.sprite, (TILE_SIZE, TILE_SIZE), self._placeholder, alpha=False)
+
+    @classmethod
+    def from_id(cls, tile_id):
+        """Returns the shared Tile for a tile id, creating it on first use."""
+        tile_id = int(tile_id)
+        tile = cls._instances.get(tile_id)
+        if tile is None:
+            tile = cls(tile_id)
+            cls._instances[tile_id] = tile
+        return tile
 
     def _get_color_from_id(self, tile_id):
         """Returns a color based on the tile ID for basic drawing."""
@@ -31,14 +57,20 @@ class Tile:
         else:
             return (200, 200, 200) # Default light grey
 
-    def draw(self, surface, offset_x, offset_y, zoom_level):
-        # Calculate scaled position and size
-        scaled_x = int((self.rect.x - offset_x) * zoom_level)
-        scaled_y = int((self.rect.y - offset_y) * zoom_level)
-        scaled_size = int(TILE_SIZE * zoom_level)
+    def _placeholder(self):
+        surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+        surface.fill(self.color)
+        return surface
+
+    def draw(self, surface, world_x, world_y, offset_x, offset_y, zoom_level):
+        """Draws this tile type at the given world position (top-left, in pixels)."""
+        # Calculate scaled position (the atlas holds the tile pre-scaled to this zoom)
+        scaled_x = int((world_x - offset_x) * zoom_level)
+        scaled_y = int((world_y - offset_y) * zoom_level)
+        assets.atlas('tiles', zoom_level).blit(surface, self.sprite, (scaled_x, scaled_y))
 
-        scaled_rect = pygame.Rect(scaled_x, scaled_y, scaled_size, scaled_size)
-        pygame.draw.rect(surface, self.color, scaled_rect)
 
-        # Optional: Draw a black outline for visibility
-        # pygame.draw.rect(surface, (0, 0, 0), scaled_rect, 1)
\ No newline at end of file
+# Declare every known tile type's sprite up front, so preloading packs the whole 'tiles' sheet
+for _tile_id in (TILE_TYPE_WATER, TILE_TYPE_GRASS, TILE_TYPE_DIRT, TILE_TYPE_MOUNTAIN,
+                 TILE_TYPE_TREE_COLLIDABLE, TILE_TYPE_ROCK_COLLIDABLE):
+    Tile.from_id(_tile_id)
@@ -1,15 +1,39 @@
 # durango_wildlands_clone/main.py
 
+import argparse
 import pygame
 import sys # sys is generally good to have for clean exit, but not strictly required for this simple example
 
 from game import Game # Import the Game class from game.py
+from replay import Recording
 
 if __name__ == '__main__':
-    pygame.init() # Initialize all the Pygame modules
-    
-    game = Game() # Create an instance of your Game class
-    game.run()    # Start the main game loop
+    parser = argparse.ArgumentParser(description='Durango Wildlands clone')
+    parser.add_argument('--headless', action='store_true', help='run the simulation without a window or rendering')
+    parser.add_argument('--ticks', type=int, default=None, help='headless only: stop after this many simulation ticks')
+    parser.add_argument('--seed', type=int, default=None, help='seed for world generation and spawn points')
+    parser.add_argument('--trace', metavar='FILE', default=None, help='trace the game loop and write a Chrome trace to FILE on exit')
+    parser.add_argument('--record', metavar='FILE', default=None, help='record the session\'s input to FILE on exit, for --replay')
+    parser.add_argument('--replay', metavar='FILE', default=None, help='replay a recorded session and report its frame timings')
+    parser.add_argument('--fast', action='store_true', help='replay only: run frames back to back instead of at the recorded pace')
+    args = parser.parse_args()
+
+    game = Game(headless=args.headless, seed=args.seed, trace_path=args.trace, record_path=args.record) # Create an instance of your Game class
+    if args.replay:
+        stats = game.run_replay(Recording.load(args.replay), realtime=not args.fast)
+        if args.trace:
+            game._export_trace()
+        print(stats.summary())
+    elif args.headless:
+        ticks = game.run_headless(args.ticks)
+        game.save_worker.shutdown()
+        if args.record:
+            game.recorder.save()
+        if args.trace:
+            game._export_trace()
+        print(f"Ran {ticks} ticks. Player at ({game.player.x:.2f}, {game.player.y:.2f}).")
+    else:
+        game.run()    # Start the main game loop
 
     pygame.quit() # Uninitialize Pygame modules when the game loop ends
-    sys.exit()    # Exit the Python program cleanly
\ No newline at end of file
+    sys.exit()    # Exit the Python program cleanly
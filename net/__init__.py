@@ -0,0 +1,4 @@
+# durango_wildlands_clone/net/__init__.py
+
+# Multiplayer: net.server hosts shared worlds for many player sessions, net.bot
+# drives simulated players against it, net.protocol is what they send each other.
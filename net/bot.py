@@ -0,0 +1,148 @@
+# durango_wildlands_clone/net/bot.py
+
+"""Load generator for net/server.py: hundreds of simulated players from one process.
+
+Each bot joins a world (round-robin), holds a random set of movement keys for a
+random while (BOT_KEY_HOLD_SECONDS), and decodes every snapshot against its baseline
+like a real client would, answering each with its input and an ack. Prints per-client
+bandwidth and any deltas that didn't decode to the size the server said.
+
+    python -m net.bot --clients 200 --seconds 30
+    python -m net.bot --unix /tmp/durango.sock
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import OrderedDict
+from config import *
+from net import protocol
+from net.protocol import ProtocolError
+
+
+class BotStats:
+    """Totals over every bot in the run."""
+
+    def __init__(self):
+        self.connected = 0
+        self.refused = 0 # Turned away or disconnected by the server
+        self.snapshots = 0
+        self.full_snapshots = 0 # Sent against no baseline
+        self.desyncs = 0 # Deltas that didn't decode to the advertised entity count
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def summary(self, clients, seconds):
+        scale = 1024.0 * max(1, self.connected) * seconds # Bytes -> KiB/s per client
+        return (f"{self.connected}/{clients} bots connected ({self.refused} refused or dropped) for {seconds:.1f} s: "
+                f"{self.snapshots} snapshots ({self.full_snapshots} full), {self.desyncs} desyncs | "
+                f"per client in {self.bytes_in / scale:.2f} KiB/s, out {self.bytes_out / scale:.2f} KiB/s")
+
+
+class Bot:
+    def __init__(self, world, rng, stats, view_size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.world = world
+        self.rng = rng
+        self.stats = stats
+        self.view_width, self.view_height = view_size
+        self.key_mask = 0
+        self.sequence = 0
+        self.states = OrderedDict() # tick -> decoded entity set, the baselines the server may pick
+        self.player = None # (x, y) from the newest snapshot
+
+    def _change_keys(self):
+        self.key_mask = self.rng.getrandbits(len(REPLAY_KEYS))
+        low, high = BOT_KEY_HOLD_SECONDS
+        return time.perf_counter() + self.rng.uniform(low, high)
+
+    def _apply(self, body):
+        """Decodes a snapshot and returns its tick."""
+        tick, baseline_tick, _, player_x, player_y, entity_count, removed, added, moved = protocol.decode_snapshot(body)
+        self.stats.snapshots += 1
+        if baseline_tick == 0:
+            self.stats.full_snapshots += 1
+            baseline = None
+        else:
+            baseline = self.states.get(baseline_tick)
+            if baseline is None:
+                raise ProtocolError(f"snapshot {tick} is against unknown baseline {baseline_tick}")
+        state = protocol.apply_delta(baseline, removed, added, moved)
+        if len(state) != entity_count:
+            self.stats.desyncs += 1
+        self.states[tick] = state
+        while len(self.states) > SERVER_SNAPSHOT_HISTORY:
+            self.states.popitem(last=False)
+        self.player = (player_x, player_y)
+        return tick
+
+    async def run(self, connect):
+        reader, writer = await connect()
+        try:
+            writer.write(protocol.encode_hello(self.world, self.view_width, self.view_height))
+            message_type, body = await protocol.read_message(reader)
+            if message_type != protocol.MSG_WELCOME:
+                raise ProtocolError(f"expected WELCOME, got message type {message_type}")
+            self.stats.bytes_in += protocol.HEADER_STRUCT.size + len(body)
+            self.stats.connected += 1
+            change_at = self._change_keys()
+            while True:
+                message_type, body = await protocol.read_message(reader)
+                self.stats.bytes_in += protocol.HEADER_STRUCT.size + len(body)
+                if message_type != protocol.MSG_SNAPSHOT:
+                    continue
+                tick = self._apply(body)
+                if time.perf_counter() >= change_at:
+                    change_at = self._change_keys()
+                # Every snapshot is answered: current keys, and the ack that lets the next one be a delta
+                self.sequence += 1
+                data = protocol.encode_input(self.sequence, self.key_mask, tick)
+                writer.write(data)
+                self.stats.bytes_out += len(data)
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            self.stats.refused += 1
+        finally:
+            writer.close()
+
+
+async def run_bots(clients, worlds=SERVER_WORLDS, host=SERVER_HOST, port=SERVER_PORT, unix_path=None,
+                   seconds=30.0, seed=None):
+    """Runs `clients` bots for `seconds`. Returns their BotStats."""
+    if unix_path:
+        connect = lambda: asyncio.open_unix_connection(unix_path)
+    else:
+        connect = lambda: asyncio.open_connection(host, port)
+    rng = random.Random(seed)
+    stats = BotStats()
+    bots = [Bot(index % worlds, random.Random(rng.getrandbits(63)), stats) for index in range(clients)]
+    tasks = [asyncio.create_task(bot.run(connect)) for bot in bots]
+    done, pending = await asyncio.wait(tasks, timeout=seconds)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for task in done:
+        if not task.cancelled() and isinstance(task.exception(), OSError):
+            stats.refused += 1 # Couldn't connect
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulated players for the multiplayer server')
+    parser.add_argument('--clients', type=int, default=100, help='bots to run')
+    parser.add_argument('--worlds', type=int, default=SERVER_WORLDS, help='worlds the server hosts (bots spread over them)')
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--unix', metavar='PATH', help='connect to a Unix socket instead of TCP')
+    parser.add_argument('--seconds', type=float, default=30.0, help='how long to run')
+    parser.add_argument('--seed', type=int, default=None, help='seed for the bots\' input')
+    options = parser.parse_args(argv)
+
+    stats = asyncio.run(run_bots(options.clients, options.worlds, options.host, options.port,
+                                 options.unix, options.seconds, options.seed))
+    print(stats.summary(options.clients, options.seconds))
+    return 0 if stats.connected and not stats.desyncs else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# durango_wildlands_clone/net/protocol.py
+
+# Wire protocol between net/server.py and its clients (net/bot.py).
+#
+# Every message is a header (body length u32, type u8) and a body, little-endian:
+#   HELLO    client -> server: world u16, view_width u16, view_height u16 (camera size, world pixels)
+#   WELCOME  server -> client: session u32, player_id u32, tick_rate u16, snapshot_interval u16,
+#                              rows u32, cols u32, seed i64, generator name (u8 length + UTF-8)
+#   INPUT    client -> server: sequence u32, held keys u32 (bit i = REPLAY_KEYS[i]),
+#                              ack u32 (tick of the newest snapshot received, 0 for none)
+#   SNAPSHOT server -> client: tick u32, baseline u32, input sequence u32, player x f64, player y f64,
+#                              entity_count u32, removed u32, added u32, moved u32, then the
+#                              removed ids (u32), added ENTITY_DTYPE and moved MOVE_DTYPE records
+#
+# Terrain is never sent: clients regenerate it from the seed and generator, like a delta
+# save. A snapshot holds the creatures and other players in the client's camera view, as
+# a delta against `baseline`, an earlier snapshot the client acknowledged (0: against
+# nothing, i.e. complete): ids that left the view, entities that entered it (in full) and
+# the position changes of the rest, as 16-bit offsets. entity_count is the size of the
+# resulting set, so a client can tell it applied the delta to the right baseline.
+
+import struct
+import numpy as np
+
+MSG_HELLO = 1
+MSG_WELCOME = 2
+MSG_INPUT = 3
+MSG_SNAPSHOT = 4
+
+HEADER_STRUCT = struct.Struct('<IB')
+HELLO_STRUCT = struct.Struct('<HHH')
+WELCOME_STRUCT = struct.Struct('<IIHHIIqB')
+INPUT_STRUCT = struct.Struct('<III')
+SNAPSHOT_STRUCT = struct.Struct('<IIIddIIII')
+
+# Entity positions are whole world pixels (top-left of the box)
+ENTITY_DTYPE = np.dtype([('id', '<u4'), ('kind', 'u1'), ('x', '<i4'), ('y', '<i4')])
+MOVE_DTYPE = np.dtype([('id', '<u4'), ('dx', '<i2'), ('dy', '<i2')])
+MAX_MOVE = 32767 # Bigger jumps are sent as a fresh entity
+
+PLAYER_ID_BASE = 1 << 31 # Players' entity ids are this plus their session; creature ids stay below
+PLAYER_KIND = 255 # Entity kind of players (creatures use their CREATURE_KINDS index)
+
+NO_IDS = np.empty(0, dtype='<u4')
+NO_ENTITIES = np.empty(0, dtype=ENTITY_DTYPE)
+NO_MOVES = np.empty(0, dtype=MOVE_DTYPE)
+
+
+class ProtocolError(ValueError):
+    """Raised for a malformed message, or a delta that doesn't fit its baseline."""
+
+
+def message(message_type, body):
+    return HEADER_STRUCT.pack(len(body), message_type) + body
+
+async def read_message(reader):
+    """(type, body) of the next message on an asyncio StreamReader. Raises
+    asyncio.IncompleteReadError when the connection closes."""
+    length, message_type = HEADER_STRUCT.unpack(await reader.readexactly(HEADER_STRUCT.size))
+    return message_type, await reader.readexactly(length)
+
+def _unpack(struct_, body, name):
+    if len(body) < struct_.size:
+        raise ProtocolError(f"{name} message too short")
+    return struct_.unpack_from(body)
+
+
+# --- Handshake and input ---
+def encode_hello(world, view_width, view_height):
+    return message(MSG_HELLO, HELLO_STRUCT.pack(world, view_width, view_height))
+
+def decode_hello(body):
+    return _unpack(HELLO_STRUCT, body, 'HELLO')
+
+def encode_welcome(session, player_id, tick_rate, snapshot_interval, rows, cols, seed, generator):
+    name = generator.encode('utf-8')
+    return message(MSG_WELCOME, WELCOME_STRUCT.pack(session, player_id, tick_rate, snapshot_interval,
+                                                    rows, cols, seed, len(name)) + name)
+
+def decode_welcome(body):
+    *fields, name_len = _unpack(WELCOME_STRUCT, body, 'WELCOME')
+    return tuple(fields) + (body[WELCOME_STRUCT.size:WELCOME_STRUCT.size + name_len].decode('utf-8'),)
+
+def encode_input(sequence, key_mask, ack):
+    return message(MSG_INPUT, INPUT_STRUCT.pack(sequence, key_mask, ack))
+
+def decode_input(body):
+    return _unpack(INPUT_STRUCT, body, 'INPUT')
+
+
+# --- Snapshots ---
+def entity_state(ids, kinds, x, y):
+    """A snapshot's entity set: ENTITY_DTYPE records, positions floored to pixels. `ids` must
+    be ascending (deltas match entity sets up by binary search)."""
+    state = np.empty(len(ids), dtype=ENTITY_DTYPE)
+    state['id'] = ids
+    state['kind'] = kinds
+    state['x'] = np.floor(x)
+    state['y'] = np.floor(y)
+    return state
+
+def _match(ids, sorted_ids):
+    """For each of `ids`, whether it is in `sorted_ids` and its index there (valid where found)."""
+    if not len(sorted_ids):
+        return np.zeros(len(ids), dtype=bool), np.zeros(len(ids), dtype=np.int64)
+    index = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+    return sorted_ids[index] == ids, index
+
+def encode_delta(state, baseline):
+    """(removed ids, added entities, moved records) taking `baseline` (None: nothing) to `state`."""
+    if baseline is None:
+        return NO_IDS, state, NO_MOVES
+    # Both sets are sorted by id, so matching them up is a binary search, not a set operation
+    found, base = _match(state['id'], baseline['id'])
+    current = np.nonzero(found)[0]
+    base = base[found]
+    gone = np.ones(len(baseline), dtype=bool)
+    gone[base] = False
+    dx = state['x'][current].astype(np.int64) - baseline['x'][base]
+    dy = state['y'][current].astype(np.int64) - baseline['y'][base]
+    fits = (np.abs(dx) <= MAX_MOVE) & (np.abs(dy) <= MAX_MOVE) & (state['kind'][current] == baseline['kind'][base])
+    changed = fits & ((dx != 0) | (dy != 0))
+    moved = np.empty(np.count_nonzero(changed), dtype=MOVE_DTYPE)
+    moved['id'] = state['id'][current[changed]]
+    moved['dx'] = dx[changed]
+    moved['dy'] = dy[changed]
+    # New in view, or changed too much to send as an offset
+    added = np.ones(len(state), dtype=bool)
+    added[current[fits]] = False
+    return baseline['id'][gone], state[added], moved
+
+def apply_delta(baseline, removed, added, moved):
+    """The entity set a delta takes `baseline` (None: nothing) to; the inverse of encode_delta."""
+    state = NO_ENTITIES if baseline is None else baseline
+    keep = np.ones(len(state), dtype=bool)
+    for ids in (removed, added['id']): # Added entities replace any old copy
+        found, index = _match(ids, state['id'])
+        keep[index[found]] = False
+    state = state[keep]
+    if len(moved):
+        found, index = _match(moved['id'], state['id'])
+        if not found.all():
+            raise ProtocolError("delta moves entities its baseline doesn't have")
+        state['x'][index] += moved['dx']
+        state['y'][index] += moved['dy']
+    state = np.concatenate([state, added])
+    state.sort(order='id')
+    return state
+
+def encode_snapshot(tick, baseline_tick, input_sequence, player_x, player_y, state, baseline):
+    removed, added, moved = encode_delta(state, baseline)
+    header = SNAPSHOT_STRUCT.pack(tick, baseline_tick, input_sequence, player_x, player_y,
+                                  len(state), len(removed), len(added), len(moved))
+    return message(MSG_SNAPSHOT, header + removed.tobytes() + added.tobytes() + moved.tobytes())
+
+def decode_snapshot(body):
+    """Returns (tick, baseline_tick, input_sequence, player_x, player_y, entity_count,
+    removed, added, moved); the arrays are views into `body`."""
+    tick, baseline_tick, input_sequence, player_x, player_y, entity_count, removed_count, added_count, moved_count = \
+        _unpack(SNAPSHOT_STRUCT, body, 'SNAPSHOT')
+    offset = SNAPSHOT_STRUCT.size
+    sizes = (removed_count * NO_IDS.itemsize, added_count * ENTITY_DTYPE.itemsize, moved_count * MOVE_DTYPE.itemsize)
+    if len(body) < offset + sum(sizes):
+        raise ProtocolError("SNAPSHOT message too short")
+    removed = np.frombuffer(body, dtype='<u4', count=removed_count, offset=offset)
+    added = np.frombuffer(body, dtype=ENTITY_DTYPE, count=added_count, offset=offset + sizes[0])
+    moved = np.frombuffer(body, dtype=MOVE_DTYPE, count=moved_count, offset=offset + sizes[0] + sizes[1])
+    return tick, baseline_tick, input_sequence, player_x, player_y, entity_count, removed, added, moved
@@ -0,0 +1,303 @@
+# durango_wildlands_clone/net/server.py
+
+"""Headless authoritative server: many player sessions in shared worlds.
+
+Each world is a Map (or StreamingMap), its creatures and one Player per connected
+session, advanced by World.step() -- Game.update for many players -- on a fixed-tick
+asyncio loop. Clients send their held keys (net/protocol.py INPUT); every
+SERVER_SNAPSHOT_INTERVAL_TICKS each gets a snapshot of what is in its camera view,
+delta-compressed against the last snapshot it acknowledged. Tick times and bandwidth
+per client are printed every SERVER_REPORT_SECONDS.
+
+    python -m net.server                            # TCP on SERVER_HOST:SERVER_PORT
+    python -m net.server --unix /tmp/durango.sock   # Unix socket
+    python -m net.bot --clients 200                 # load it with simulated players
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import OrderedDict
+import numpy as np
+from config import *
+from player import Player
+from entities import EntityPool
+from level.map import Map
+from level.streaming_map import StreamingMap
+from replay import HeldKeys
+from net import protocol
+from net.protocol import ProtocolError
+
+
+class Session:
+    """One connected client: its Player, latest input and the snapshots it may use as baselines."""
+
+    def __init__(self, session_id, writer, view_size):
+        self.session_id = session_id
+        self.entity_id = protocol.PLAYER_ID_BASE + session_id
+        self.writer = writer
+        self.view_width, self.view_height = view_size
+        self.view_rect = (0, 0, self.view_width, self.view_height) # Camera, world pixels, set by World.step
+        self.player = None
+        self.key_mask = 0
+        self.input_sequence = 0 # Newest input applied, echoed in snapshots
+        self.ack = 0 # Tick of the newest snapshot the client has
+        self.history = OrderedDict() # tick -> entity set sent, the client's possible baselines
+        # Since the last report
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.skipped = 0 # Snapshots not sent because the client wasn't reading fast enough
+
+    def held_keys(self):
+        """The Player's key_state: the keys the client last said it holds."""
+        return HeldKeys(REPLAY_KEYS, self.key_mask)
+
+    def apply_input(self, sequence, key_mask, ack):
+        if sequence > self.input_sequence: # Late (reordered) input is stale
+            self.input_sequence = sequence
+            self.key_mask = key_mask
+        self.ack = max(self.ack, ack)
+
+
+class World:
+    """A map, its creatures and the players of every session in it."""
+
+    def __init__(self, world_id, seed):
+        self.world_id = world_id
+        self.rng = random.Random(seed)
+        if WORLD_STREAMING:
+            self.map = StreamingMap(seed=self.rng.getrandbits(63))
+        else:
+            self.map = Map(seed=self.rng.getrandbits(63))
+        # Everyone spawns around one random walkable tile near the middle, like a new game
+        self.map.update_streaming(self.map.width // 2, self.map.height // 2)
+        rows, cols = self.map.walkable_cells()
+        index = self.rng.randrange(len(rows)) if len(rows) else None
+        self.spawn_x = int(cols[index]) * TILE_SIZE if index is not None else PLAYER_START_X
+        self.spawn_y = int(rows[index]) * TILE_SIZE if index is not None else PLAYER_START_Y
+        self.creatures = EntityPool(seed=self.rng.getrandbits(63))
+        self.creatures.spawn_random(self.map, CREATURE_COUNT, self.spawn_x, self.spawn_y,
+                                    CREATURE_SPAWN_RADIUS_TILES * TILE_SIZE)
+        self.sessions = {}
+        # Every player's entity id and position, refreshed each step for the snapshots
+        self._player_ids = np.empty(0, dtype=np.int64)
+        self._player_x = self._player_y = np.empty(0)
+
+    @property
+    def full(self):
+        return len(self.sessions) >= SERVER_SESSIONS_PER_WORLD
+
+    def join(self, session):
+        """Gives a session its Player, on a walkable tile near the world's spawn point."""
+        radius = CREATURE_SPAWN_RADIUS_TILES * TILE_SIZE
+        rows, cols = self.map.walkable_cells()
+        near = (np.abs(cols * TILE_SIZE - self.spawn_x) <= radius) & (np.abs(rows * TILE_SIZE - self.spawn_y) <= radius)
+        rows, cols = rows[near], cols[near]
+        x, y = self.spawn_x, self.spawn_y
+        if len(rows):
+            index = self.rng.randrange(len(rows))
+            x, y = int(cols[index]) * TILE_SIZE, int(rows[index]) * TILE_SIZE
+        session.player = Player(x, y, key_state=session.held_keys)
+        self.sessions[session.session_id] = session
+
+    def leave(self, session):
+        self.sessions.pop(session.session_id, None)
+
+    def step(self, dt):
+        """One tick: what Game.update does for its player, for every session's player."""
+        sessions = list(self.sessions.values())
+        for session in sessions:
+            session.player.update(dt, self.map)
+        centers = [session.player.center for session in sessions]
+        self.creatures.scare_many([x for x, _ in centers], [y for _, y in centers], CREATURE_FLEE_RADIUS)
+        self.creatures.update(dt, self.map)
+        self.map.pathfinder.process()
+
+        for (center_x, center_y), session in zip(centers, sessions):
+            camera_x, camera_y = self.map.camera_at(center_x, center_y, session.view_width, session.view_height)
+            session.view_rect = (camera_x, camera_y, session.view_width, session.view_height)
+        if sessions: # With nobody here, keep the spawn area loaded
+            self.map.update_streaming_around([center + (session.view_rect,) for center, session in zip(centers, sessions)])
+
+        self._player_ids = np.array([session.entity_id for session in sessions], dtype=np.int64)
+        self._player_x = np.array([session.player.x for session in sessions])
+        self._player_y = np.array([session.player.y for session in sessions])
+
+    def visible_states(self, sessions):
+        """The entity set in each session's camera view (plus SERVER_VIEW_MARGIN), itself excluded.
+
+        All sessions are tested against all entities in one broadcast comparison (sessions x
+        entities), which beats a spatial query per session: camera views are big, so each
+        query would walk hundreds of hash cells.
+        """
+        if not sessions:
+            return []
+        creatures = self.creatures
+        n = creatures.count
+        ids = np.concatenate([creatures.ids[:n], self._player_ids])
+        kinds = np.concatenate([creatures.kind[:n], np.full(len(self._player_ids), protocol.PLAYER_KIND, dtype=np.uint8)])
+        x = np.concatenate([creatures.x[:n], self._player_x])
+        y = np.concatenate([creatures.y[:n], self._player_y])
+        size = np.concatenate([creatures.size[:n], np.full(len(self._player_ids), PLAYER_SIZE)])
+        # Sorted by id once here, so every session's subset is already in protocol order
+        order = np.argsort(ids)
+        ids, kinds, x, y, size = ids[order], kinds[order], x[order], y[order], size[order]
+
+        views = np.array([session.view_rect for session in sessions], dtype=np.float64)
+        left = views[:, 0:1] - SERVER_VIEW_MARGIN
+        top = views[:, 1:2] - SERVER_VIEW_MARGIN
+        right = views[:, 0:1] + views[:, 2:3] + SERVER_VIEW_MARGIN
+        bottom = views[:, 1:2] + views[:, 3:4] + SERVER_VIEW_MARGIN
+        visible = (x + size > left) & (x < right) & (y + size > top) & (y < bottom)
+        visible &= ids != np.array([[session.entity_id] for session in sessions])
+        return [protocol.entity_state(ids[row], kinds[row], x[row], y[row]) for row in visible]
+
+
+class GameServer:
+    """Runs the worlds on a fixed tick and serves their sessions over TCP or a Unix socket."""
+
+    def __init__(self, worlds=SERVER_WORLDS, seed=None):
+        rng = random.Random(seed)
+        self.worlds = [World(world_id, rng.getrandbits(63)) for world_id in range(worlds)]
+        self.tick_dt = 1.0 / SIMULATION_TICK_RATE
+        self.tick = 0 # Snapshot ticks start at 1; 0 means "no snapshot"
+        self.running = True
+        self._next_session_id = 1
+        self._tick_ms = [] # Since the last report
+        self._snapshot_ms = []
+        self._departed = [] # (bytes_in, bytes_out, skipped) of sessions that left since the last report
+
+    # --- Connections ---
+    async def handle_client(self, reader, writer):
+        world = session = None
+        try:
+            message_type, body = await protocol.read_message(reader)
+            if message_type != protocol.MSG_HELLO:
+                raise ProtocolError(f"expected HELLO, got message type {message_type}")
+            world_id, view_width, view_height = protocol.decode_hello(body)
+            if world_id >= len(self.worlds) or self.worlds[world_id].full:
+                print(f"Turned a client away: world {world_id} is {'full' if world_id < len(self.worlds) else 'unknown'}")
+                return
+            world = self.worlds[world_id]
+            session = Session(self._next_session_id, writer, (max(1, view_width), max(1, view_height)))
+            self._next_session_id += 1
+            world.join(session)
+            writer.write(protocol.encode_welcome(session.session_id, session.entity_id, SIMULATION_TICK_RATE,
+                                                 SERVER_SNAPSHOT_INTERVAL_TICKS, world.map.rows, world.map.cols,
+                                                 world.map.seed, world.map.generator.name))
+            while True:
+                message_type, body = await protocol.read_message(reader)
+                session.bytes_in += protocol.HEADER_STRUCT.size + len(body)
+                if message_type == protocol.MSG_INPUT:
+                    session.apply_input(*protocol.decode_input(body))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass # Client went away
+        except ProtocolError as e:
+            print(f"Dropped a client: {e}")
+        finally:
+            if session is not None:
+                world.leave(session)
+                self._departed.append((session.bytes_in, session.bytes_out, session.skipped))
+            writer.close()
+
+    def _send_snapshots(self):
+        for world in self.worlds:
+            sessions = []
+            for session in world.sessions.values():
+                if session.writer.transport.get_write_buffer_size() > SERVER_MAX_SEND_BUFFER:
+                    session.skipped += 1
+                else:
+                    sessions.append(session)
+            for session, state in zip(sessions, world.visible_states(sessions)):
+                baseline = session.history.get(session.ack)
+                data = protocol.encode_snapshot(self.tick, session.ack if baseline is not None else 0,
+                                                session.input_sequence, session.player.x, session.player.y,
+                                                state, baseline)
+                session.writer.write(data)
+                session.bytes_out += len(data)
+                session.history[self.tick] = state
+                while len(session.history) > SERVER_SNAPSHOT_HISTORY:
+                    session.history.popitem(last=False)
+
+    # --- Tick loop ---
+    def step(self):
+        """One server tick: every world, then the snapshots if one is due."""
+        start = time.perf_counter()
+        for world in self.worlds:
+            world.step(self.tick_dt)
+        self.tick += 1
+        if self.tick % SERVER_SNAPSHOT_INTERVAL_TICKS == 0:
+            snapshot_start = time.perf_counter()
+            self._send_snapshots()
+            self._snapshot_ms.append((time.perf_counter() - snapshot_start) * 1000.0)
+        self._tick_ms.append((time.perf_counter() - start) * 1000.0)
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT, unix_path=None, seconds=None):
+        """Runs until stopped (or for `seconds`)."""
+        backlog = SERVER_SESSIONS_PER_WORLD * len(self.worlds) # Bots connect all at once
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, unix_path, backlog=backlog)
+            print(f"Serving {len(self.worlds)} world(s) on {unix_path}")
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port, backlog=backlog)
+            print(f"Serving {len(self.worlds)} world(s) on {host}:{port}")
+
+        loop = asyncio.get_running_loop()
+        started = last_report = next_tick = loop.time()
+        async with server:
+            while self.running and (seconds is None or loop.time() - started < seconds):
+                self.step()
+                now = loop.time()
+                if now - last_report >= SERVER_REPORT_SECONDS:
+                    print(self.report(now - last_report))
+                    last_report = now
+                next_tick += self.tick_dt
+                if now - next_tick > MAX_FRAME_TIME:
+                    next_tick = now # Too far behind to catch up: drop the backlog rather than spiral
+                # Readers get to run here even when a tick is late
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    def report(self, seconds):
+        """One line of tick times and per-client bandwidth since the last report (and resets them)."""
+        sessions = [session for world in self.worlds for session in world.sessions.values()]
+        traffic = [(session.bytes_in, session.bytes_out, session.skipped) for session in sessions] + self._departed
+        for session in sessions:
+            session.bytes_in = session.bytes_out = session.skipped = 0
+        self._departed = []
+        tick_ms, self._tick_ms = self._tick_ms or [0.0], []
+        snapshot_ms, self._snapshot_ms = self._snapshot_ms or [0.0], []
+
+        line = (f"tick {self.tick}: {len(sessions)} sessions | tick p50 {np.percentile(tick_ms, 50):.2f} "
+                f"p99 {np.percentile(tick_ms, 99):.2f} max {max(tick_ms):.2f} ms "
+                f"(budget {self.tick_dt * 1000.0:.2f}), snapshots p50 {np.percentile(snapshot_ms, 50):.2f} ms")
+        if traffic:
+            bytes_in = np.array([entry[0] for entry in traffic]) / seconds / 1024.0
+            bytes_out = np.array([entry[1] for entry in traffic]) / seconds / 1024.0
+            line += (f" | per client out avg {bytes_out.mean():.2f} max {bytes_out.max():.2f} KiB/s, "
+                     f"in avg {bytes_in.mean():.2f} KiB/s, {sum(entry[2] for entry in traffic)} snapshots skipped")
+        return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless multiplayer server')
+    parser.add_argument('--worlds', type=int, default=SERVER_WORLDS, help='worlds to host')
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--unix', metavar='PATH', help='listen on a Unix socket instead of TCP')
+    parser.add_argument('--seed', type=int, default=None, help='seed for the worlds')
+    parser.add_argument('--seconds', type=float, default=None, help='stop after this long')
+    options = parser.parse_args(argv)
+
+    server = GameServer(options.worlds, options.seed)
+    try:
+        asyncio.run(server.serve(options.host, options.port, options.unix, options.seconds))
+    except KeyboardInterrupt:
+        pass
+    print(f"Server stopped after {server.tick} ticks.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+# durango_wildlands_clone/profiler.py
+
+import json
+import time
+import functools
+import pygame
+from text_cache import text_cache
+from config import TRACE_BUFFER_SPANS, PROFILER_GRAPH_FRAMES, PROFILER_TOP_SPANS, WHITE, YELLOW, GREEN, RED
+
+class Tracer:
+    """Records nested timing spans of the game loop into a fixed-size ring buffer.
+
+    Disabled by default. While disabled, span() returns a shared no-op context and
+    @traced methods call straight through after one attribute check, so the
+    instrumentation can stay in place permanently. Once the buffer is full the
+    oldest spans are overwritten. Per-name totals for each of the last
+    PROFILER_GRAPH_FRAMES frames are kept alongside, so the overlay's top spans
+    don't have to walk the buffer.
+    """
+
+    def __init__(self, capacity=TRACE_BUFFER_SPANS):
+        self.enabled = False
+        self.capacity = capacity
+        # Ring buffer, one slot per span: name, start (ns), duration (ns), nesting depth, frame number
+        self._names = [None] * capacity
+        self._starts = [0] * capacity
+        self._durations = [0] * capacity
+        self._depths = [0] * capacity
+        self._frames = [0] * capacity
+        self._next = 0 # Total spans ever recorded; the slot is _next % capacity
+        self._depth = 0
+
+        self.frame = 0
+        self.draw_calls = 0 # Blits in the current frame (counted even while disabled; it's one add)
+        self.last_frame_draw_calls = 0
+        self._frame_start_ns = None
+        self.frame_times_ms = [0.0] * PROFILER_GRAPH_FRAMES # Ring of recent frame times, for the graph
+        # Ring of {name: total ns} per frame: the last PROFILER_GRAPH_FRAMES frames plus the current one
+        self._frame_totals = [{} for _ in range(PROFILER_GRAPH_FRAMES + 1)]
+        self._clock_origin_ns = time.perf_counter_ns()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self._depth = 0
+        self._frame_start_ns = None
+
+    def clear(self):
+        self._next = 0
+        for totals in self._frame_totals:
+            totals.clear()
+
+    # --- Recording ---
+    def span(self, name):
+        """Context manager timing a block as a span called `name`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def _record(self, name, start_ns, end_ns, depth):
+        slot = self._next % self.capacity
+        self._names[slot] = name
+        self._starts[slot] = start_ns
+        self._durations[slot] = end_ns - start_ns
+        self._depths[slot] = depth
+        self._frames[slot] = self.frame
+        self._next += 1
+        totals = self._frame_totals[self.frame % len(self._frame_totals)]
+        totals[name] = totals.get(name, 0) + end_ns - start_ns
+
+    def next_frame(self):
+        """Marks a frame boundary (call once per loop iteration, before any work)."""
+        self.last_frame_draw_calls = self.draw_calls
+        self.draw_calls = 0
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if self._frame_start_ns is not None:
+            self.frame_times_ms[self.frame % len(self.frame_times_ms)] = (now - self._frame_start_ns) / 1e6
+            self.frame += 1
+            self._frame_totals[self.frame % len(self._frame_totals)].clear() # Its slot last held the oldest frame
+        self._frame_start_ns = now
+
+    # --- Reading ---
+    def spans(self):
+        """Yields the buffered spans, oldest first, as (name, start_ns, duration_ns, depth, frame)."""
+        count = min(self._next, self.capacity)
+        for i in range(self._next - count, self._next):
+            slot = i % self.capacity
+            yield self._names[slot], self._starts[slot], self._durations[slot], self._depths[slot], self._frames[slot]
+
+    def top_spans(self, frames=PROFILER_GRAPH_FRAMES, limit=PROFILER_TOP_SPANS):
+        """Returns [(name, mean ms per frame)] of the most expensive spans over the last `frames`
+        frames (at most PROFILER_GRAPH_FRAMES)."""
+        frames = min(frames, len(self._frame_totals) - 1, self.frame)
+        totals = {}
+        for frame in range(self.frame - frames, self.frame):
+            for name, duration in self._frame_totals[frame % len(self._frame_totals)].items():
+                totals[name] = totals.get(name, 0) + duration
+        frame_count = max(1, frames)
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(name, total / 1e6 / frame_count) for name, total in ranked]
+
+    def export_chrome_trace(self, path):
+        """Writes the buffered spans as Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+        events = [{
+            'name': name,
+            'ph': 'X', # Complete event: start + duration; viewers rebuild nesting from the times
+            'ts': (start - self._clock_origin_ns) / 1000.0, # Microseconds
+            'dur': duration / 1000.0,
+            'pid': 1,
+            'tid': 1,
+            'args': {'frame': frame},
+        } for name, start, duration, _, frame in self.spans()]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'start', 'depth')
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.depth = self.tracer._depth
+        self.tracer._depth += 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        self.tracer._depth -= 1
+        self.tracer._record(self.name, self.start, end, self.depth)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+tracer = Tracer() # The game-wide tracer
+
+
+def traced(name):
+    """Decorator recording every call of a function as a span on the game-wide tracer."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with _Span(tracer, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class ProfilerOverlay:
+    """Draws the tracer's frame-time graph, top spans and draw-call count in a screen corner."""
+
+    GRAPH_HEIGHT = 60
+    GRAPH_MAX_MS = 50.0 # Frame time at the top of the graph
+    BUDGET_MS = 1000.0 / 60 # Reference line: one 60 FPS frame
+    PADDING = 6
+    FONT_SIZE = 20
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def draw(self, surface):
+        # Pooled font, but rendered directly: these lines change every frame and would only churn the text cache
+        font = text_cache.font(self.FONT_SIZE)
+        tracer = self.tracer
+        line_height = font.get_linesize()
+        top_spans = tracer.top_spans()
+        width = len(tracer.frame_times_ms) + 2 * self.PADDING
+        height = self.GRAPH_HEIGHT + (len(top_spans) + 2) * line_height + 3 * self.PADDING
+
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+
+        # Frame-time graph, oldest on the left, with the 60 FPS budget as a reference line
+        graph_bottom = self.PADDING + self.GRAPH_HEIGHT
+        budget_y = graph_bottom - int(self.GRAPH_HEIGHT * min(1.0, self.BUDGET_MS / self.GRAPH_MAX_MS))
+        pygame.draw.line(panel, YELLOW, (self.PADDING, budget_y), (width - self.PADDING, budget_y))
+        frame_times = tracer.frame_times_ms
+        for i in range(len(frame_times)):
+            frame_ms = frame_times[(tracer.frame + i) % len(frame_times)]
+            bar = int(self.GRAPH_HEIGHT * min(1.0, frame_ms / self.GRAPH_MAX_MS))
+            if bar:
+                color = GREEN if frame_ms <= self.BUDGET_MS else RED
+                pygame.draw.line(panel, color, (self.PADDING + i, graph_bottom), (self.PADDING + i, graph_bottom - bar))
+
+        last_ms = frame_times[(tracer.frame - 1) % len(frame_times)]
+        lines = [f"frame {last_ms:5.2f} ms   draw calls {tracer.last_frame_draw_calls}",
+                 "top spans (ms/frame):"]
+        lines += [f"  {ms:6.3f}  {name}" for name, ms in top_spans]
+        y = graph_bottom + self.PADDING
+        for line in lines:
+            panel.blit(font.render(line, True, WHITE), (self.PADDING, y))
+            y += line_height
+
+        surface.blit(panel, (surface.get_width() - width - self.PADDING, self.PADDING))
@@ -0,0 +1,333 @@
+# durango_wildlands_clone/replay.py
+
+# Input recordings, for replaying a session tick for tick (main.py --record / --replay).
+#
+# The simulation only depends on the seed, the length of each frame, the events Game
+# handled each frame, the keys Player saw held each tick and the save-worker results
+# applied each tick. A recording keeps exactly those, plus the save-slot names at the
+# start (menus lay out by them) and the player's position after every frame, to check
+# a replay against.
+#
+# Layout (little-endian):
+#   header  : magic b'DWRP', version u16, tick_rate u16, frame_count u32,
+#             key_tick_count u32, info_len u32, payload_len u32
+#   payload : zlib-compressed
+#             - frame_count frames of FRAME_DTYPE (frame time, ticks run, player x/y)
+#             - key_tick_count u32 masks of the held keys, one per tick Player read input
+#             - info_len bytes of UTF-8 JSON: seed, keys, slot names, events, worker results
+#             - the saves that loads returned, encoded with save_format.encode_save
+
+import json
+import struct
+import time
+import zlib
+from collections import deque
+import numpy as np
+import pygame
+from config import REPLAY_KEYS, REPLAY_EVENT_ATTRS, SIMULATION_TICK_RATE
+import save_format
+from save_format import SaveFormatError
+
+REPLAY_MAGIC = b'DWRP'
+REPLAY_VERSION = 1
+
+HEADER_STRUCT = struct.Struct('<4sHHIIII')
+FRAME_DTYPE = np.dtype([('time', '<f8'), ('ticks', '<u4'), ('x', '<f8'), ('y', '<f8')])
+
+# Load errors are replayed as these types, so Game reports them the same way
+ERROR_TYPES = {'FileNotFoundError': FileNotFoundError, 'SaveFormatError': SaveFormatError}
+
+
+class ReplayFormatError(ValueError):
+    """Raised when a recording is truncated, corrupted or from an unknown version."""
+
+
+def _slot_name_entry(name):
+    # JSON for a SlotIndex name: null for an empty slot, false for a corrupted one
+    return False if name is save_format.SlotIndex.CORRUPTED else name
+
+def _slot_name(entry):
+    return save_format.SlotIndex.CORRUPTED if entry is False else entry
+
+
+class Recording:
+    """One recorded session in memory.
+
+    frames: (frame time in seconds, ticks run, player x, player y) per frame; x and y
+        are NaN while there is no player.
+    key_masks: bit i set if keys[i] was held, one mask per Player input read.
+    events: (frame index, event type, attribute dict) for the events of REPLAY_EVENT_ATTRS.
+    results: (tick, kind, slot_number, result, error) as SaveWorker.poll() returned them;
+        a load's result is its save dict, an error is (type name, message).
+    starts_in_game: a new game was already running at the first frame (run_headless
+        starts one without any input), rather than the session starting on the start screen.
+    """
+
+    def __init__(self, seed, slot_names, keys=REPLAY_KEYS, tick_rate=SIMULATION_TICK_RATE):
+        self.seed = seed
+        self.slot_names = list(slot_names)
+        self.keys = tuple(keys)
+        self.tick_rate = tick_rate
+        self.frames = []
+        self.key_masks = []
+        self.events = []
+        self.results = []
+        self.starts_in_game = False
+
+    def save(self, path):
+        frames = np.array(self.frames, dtype=FRAME_DTYPE)
+        key_masks = np.array(self.key_masks, dtype='<u4')
+        saves = bytearray()
+        results = []
+        for tick, kind, slot_number, result, error in self.results:
+            if error is not None:
+                results.append((tick, kind, slot_number, None, (type(error).__name__, str(error))))
+            elif kind == 'load':
+                data = save_format.encode_save(result)
+                results.append((tick, kind, slot_number, {'save': (len(saves), len(data))}, None))
+                saves += data
+            else:
+                results.append((tick, kind, slot_number, result, None))
+        info = json.dumps({
+            'seed': self.seed,
+            'starts_in_game': self.starts_in_game,
+            'keys': self.keys,
+            'slot_names': [_slot_name_entry(name) for name in self.slot_names],
+            'events': self.events,
+            'results': results,
+        }, separators=(',', ':')).encode('utf-8')
+
+        payload = zlib.compress(frames.tobytes() + key_masks.tobytes() + info + bytes(saves))
+        header = HEADER_STRUCT.pack(REPLAY_MAGIC, REPLAY_VERSION, self.tick_rate,
+                                    len(frames), len(key_masks), len(info), len(payload))
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.write(payload)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            buffer = f.read()
+        if len(buffer) < HEADER_STRUCT.size:
+            raise ReplayFormatError(f"{path}: file too short for a recording header")
+        magic, version, tick_rate, frame_count, key_tick_count, info_len, payload_len = HEADER_STRUCT.unpack_from(buffer)
+        if magic != REPLAY_MAGIC:
+            raise ReplayFormatError(f"{path}: not a recording")
+        if version > REPLAY_VERSION:
+            raise ReplayFormatError(f"{path}: recording version {version} is newer than supported ({REPLAY_VERSION})")
+        try:
+            payload = zlib.decompress(buffer[HEADER_STRUCT.size:HEADER_STRUCT.size + payload_len])
+        except zlib.error as e:
+            raise ReplayFormatError(f"{path}: corrupted recording ({e})") from e
+        saves_start = frame_count * FRAME_DTYPE.itemsize + key_tick_count * 4 + info_len
+        if len(payload) < saves_start:
+            raise ReplayFormatError(f"{path}: recording is truncated")
+
+        frames = np.frombuffer(payload, dtype=FRAME_DTYPE, count=frame_count)
+        offset = frames.nbytes
+        key_masks = np.frombuffer(payload, dtype='<u4', count=key_tick_count, offset=offset)
+        offset += key_masks.nbytes
+        info = json.loads(payload[offset:offset + info_len].decode('utf-8'))
+
+        recording = cls(info['seed'], [_slot_name(entry) for entry in info['slot_names']], info['keys'], tick_rate)
+        recording.starts_in_game = info.get('starts_in_game', False)
+        recording.frames = [tuple(frame) for frame in frames.tolist()]
+        recording.key_masks = key_masks.tolist()
+        recording.events = [(frame, event_type, attrs) for frame, event_type, attrs in info['events']]
+        for tick, kind, slot_number, result, error in info['results']:
+            if error is not None:
+                error_type, message = error
+                error = ERROR_TYPES.get(error_type, RuntimeError)(message)
+            elif kind == 'load':
+                start, length = result['save']
+                result = save_format.decode_save(payload[saves_start + start:saves_start + start + length], path)
+            recording.results.append((tick, kind, slot_number, result, error))
+        return recording
+
+
+class InputRecorder:
+    """Records a Game's input as it runs. Create it before the first game starts (Game
+    does, for record_path); Game calls begin_frame/end_frame around each frame and
+    record_results with each tick's save-worker results."""
+
+    def __init__(self, game, path):
+        self.game = game
+        self.path = path
+        self.recording = Recording(game.seed, [game.slot_index.name(slot_number)
+                                               for slot_number in range(1, game.num_save_slots + 1)])
+        # Wrap the input source, so every read Player makes is logged
+        self._key_source = game.key_state
+        game.key_state = self._read_keys
+        self._frame_time = 0.0
+        self._frame_start_tick = 0
+
+    def _read_keys(self):
+        keys = self._key_source()
+        mask = 0
+        for bit, key in enumerate(self.recording.keys):
+            if keys[key]:
+                mask |= 1 << bit
+        self.recording.key_masks.append(mask)
+        return keys
+
+    def begin_frame(self, frame_time, events):
+        frame = len(self.recording.frames)
+        if frame == 0:
+            self.recording.starts_in_game = self.game.player is not None
+        for event in events:
+            attrs = REPLAY_EVENT_ATTRS.get(event.type)
+            if attrs is not None:
+                self.recording.events.append((frame, event.type, {name: getattr(event, name) for name in attrs}))
+        self._frame_time = frame_time
+        self._frame_start_tick = self.game.tick_count
+
+    def end_frame(self):
+        player = self.game.player
+        x, y = (player.x, player.y) if player else (float('nan'), float('nan'))
+        self.recording.frames.append((self._frame_time, self.game.tick_count - self._frame_start_tick, x, y))
+
+    def record_results(self, tick, results):
+        for kind, slot_number, result, error in results:
+            self.recording.results.append((tick, kind, slot_number, result, error))
+
+    def save(self):
+        self.recording.save(self.path)
+        print(f"Wrote a recording of {len(self.recording.frames)} frames to {self.path}")
+
+
+class HeldKeys:
+    """The pressed-keys sequence Player reads, rebuilt from one recorded mask."""
+
+    def __init__(self, keys, mask):
+        self._held = {key for bit, key in enumerate(keys) if mask >> bit & 1}
+
+    def __getitem__(self, key):
+        return key in self._held
+
+
+class ReplaySlotIndex(save_format.SlotIndex):
+    """SlotIndex over the slot names a recording started with, instead of the files on disk."""
+
+    def __init__(self, names):
+        super().__init__(len(names))
+        self._names = dict(enumerate(names, 1))
+
+    def refresh(self, slot_numbers=None):
+        return False
+
+    def name(self, slot_number):
+        return self._names.get(slot_number, self.EMPTY)
+
+    def set_name(self, slot_number, name):
+        self._names[slot_number] = name
+        self.version += 1
+
+
+class ReplaySaveWorker:
+    """Stands in for SaveWorker during a replay, without touching any save file.
+
+    Jobs are dropped; poll() hands back the results the recorded session got, on the
+    tick it got them (loads with the recorded save data).
+    """
+
+    busy = False
+
+    def __init__(self, game, results, slot_index):
+        self.game = game
+        self.slot_index = slot_index
+        self._results = deque(results)
+        self._names = {} # slot_number -> name its last save or rename would write
+
+    def save(self, slot_number, save_data):
+        self._names[slot_number] = save_data.get('save_name', '')
+        return True
+
+    def rename(self, slot_number, new_name):
+        self._names[slot_number] = new_name
+
+    def load(self, slot_number):
+        pass
+
+    def poll(self):
+        finished = []
+        while self._results and self._results[0][0] <= self.game.tick_count:
+            _, kind, slot_number, result, error = self._results.popleft()
+            if kind in ('save', 'rename') and error is None:
+                self.slot_index.set_name(slot_number, self._names.get(slot_number, ''))
+            finished.append((kind, slot_number, result, error))
+        return finished
+
+    def shutdown(self):
+        pass
+
+
+class Playback:
+    """Feeds a Recording back into a Game. attach() before the first game starts, then
+    pass events(frame) to each frame's step_frame and check(frame) after it."""
+
+    def __init__(self, recording):
+        self.recording = recording
+        self._events = {}
+        for frame, event_type, attrs in recording.events:
+            # JSON turned tuples (mouse positions) into lists
+            attrs = {name: tuple(value) if isinstance(value, list) else value for name, value in attrs.items()}
+            self._events.setdefault(frame, []).append(pygame.event.Event(event_type, attrs))
+        self._key_reads = 0
+
+    def attach(self, game):
+        recording = self.recording
+        if recording.tick_rate != SIMULATION_TICK_RATE:
+            print(f"Warning: recorded at {recording.tick_rate} ticks/s, simulating at {SIMULATION_TICK_RATE}; "
+                  f"the replay will not match.")
+        game.seed = recording.seed
+        game.rng.seed(recording.seed)
+        game.key_state = self._read_keys
+        game.save_worker.shutdown()
+        game.slot_index = ReplaySlotIndex(recording.slot_names)
+        game.save_worker = ReplaySaveWorker(game, recording.results, game.slot_index)
+
+    def _read_keys(self):
+        masks = self.recording.key_masks
+        mask = masks[self._key_reads] if self._key_reads < len(masks) else 0
+        self._key_reads += 1
+        return HeldKeys(self.recording.keys, mask)
+
+    def events(self, frame):
+        return self._events.get(frame, [])
+
+    def check(self, frame, game):
+        """True if the player is where the recorded session had it after `frame`."""
+        _, _, x, y = self.recording.frames[frame]
+        if game.player is None:
+            return np.isnan(x) and np.isnan(y)
+        return game.player.x == x and game.player.y == y
+
+
+class ReplayStats:
+    """Frame timings of one replay, against the frame times of the recorded session."""
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.frame_ms = [] # Time spent on each replayed frame (simulation and draw)
+        self.ticks = 0
+        self.wall_seconds = 0.0
+        self.diverged_frame = None # First frame whose player position differs from the recording
+
+    def _percentiles(self, values):
+        return ', '.join(f"p{p} {np.percentile(values, p):.2f}" for p in self.PERCENTILES) + f", max {max(values):.2f} ms"
+
+    def summary(self):
+        recorded_seconds = sum(frame[0] for frame in self.recording.frames)
+        lines = [f"Replayed {len(self.frame_ms)}/{len(self.recording.frames)} frames, {self.ticks} ticks "
+                 f"({recorded_seconds:.1f} s recorded) in {self.wall_seconds:.2f} s"]
+        if self.frame_ms:
+            lines.append(f"  replay frame times:   {self._percentiles(self.frame_ms)}")
+            lines.append(f"  recorded frame times: {self._percentiles([frame[0] * 1000.0 for frame in self.recording.frames])}")
+        if self.diverged_frame is None:
+            lines.append("  trajectory matches the recording")
+        else:
+            lines.append(f"  trajectory diverged from the recording at frame {self.diverged_frame}")
+        return '\n'.join(lines)
+
@@ -0,0 +1,356 @@
+# durango_wildlands_clone/save_format.py
+
+# Binary save-slot format.
+#
+# Layout (little-endian):
+#   header   : magic b'DWSV', version u16, flags u16, player_x i32, player_y i32,
+#              rows u32, cols u32, seed u64, name_len u16, payload_len u32
+#   world    : (version >= 2) generator_id u8, generator_version u16, delta_count u32
+#   name     : name_len bytes of UTF-8
+#   payload  : raw or zlib-compressed (FLAG_ZLIB), either
+#              - the rows*cols uint8 tile-id grid, or
+#              - with FLAG_DELTA, only the tiles that differ from the world regenerated
+#                from (seed, generator): delta_count u32 index gaps, then delta_count
+#                uint8 tile ids. An unmodified world saves as an empty payload.
+#              - with FLAG_CHUNKED (streamed worlds), only the modified chunks:
+#                delta_count entries of (chunk_row i32, chunk_col i32, rows u16, cols u16),
+#                then each chunk's rows*cols uint8 tile ids in the same order.
+#
+# Older slots written as JSON (save_slot_N.json) are still readable; read_save
+# returns the same dict shape for both formats, and the next save or rename of
+# such a slot rewrites it in the binary format.
+
+import json
+import os
+import struct
+import zlib
+import numpy as np
+from level.generator import GENERATORS_BY_ID, get_generator
+
+SAVE_MAGIC = b'DWSV'
+SAVE_VERSION = 3 # 3: FLAG_CHUNKED streamed worlds; 2: world block and FLAG_DELTA
+SAVE_EXTENSION = '.dws'
+LEGACY_SAVE_EXTENSION = '.json'
+
+ZLIB_LEVEL = 1 # Fastest level; level 6 is ~10x slower to save for only ~20% smaller files
+
+FLAG_ZLIB = 1 << 0     # Payload is zlib-compressed
+FLAG_HAS_SEED = 1 << 1 # Header seed field is meaningful
+FLAG_DELTA = 1 << 2    # Payload holds only tiles that differ from the seeded world
+FLAG_CHUNKED = 1 << 3  # Streamed world: payload holds only modified chunks
+
+HEADER_STRUCT = struct.Struct('<4sHHiiIIQHI')
+WORLD_STRUCT = struct.Struct('<BHI')
+CHUNK_ENTRY_DTYPE = np.dtype([('row', '<i4'), ('col', '<i4'), ('rows', '<u2'), ('cols', '<u2')])
+
+
+class SaveFormatError(ValueError):
+    """Raised when a save file is truncated, corrupted or from an unknown version."""
+
+
+def slot_path(slot_number):
+    return f'save_slot_{slot_number}{SAVE_EXTENSION}'
+
+def legacy_slot_path(slot_number):
+    return f'save_slot_{slot_number}{LEGACY_SAVE_EXTENSION}'
+
+def find_slot_file(slot_number):
+    """Returns the path of the save file for a slot (binary preferred), or None if empty."""
+    for path in (slot_path(slot_number), legacy_slot_path(slot_number)):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _encode_delta(grid, generator, seed):
+    """Returns (delta_count, payload) for the tiles that differ from the regenerated world,
+    or None if storing the full grid would be smaller."""
+    base = generator.generate(seed, *grid.shape)
+    changed = np.flatnonzero(base.ravel() != grid.ravel())
+    if changed.size * 5 >= grid.size: # 4-byte gap + 1-byte id per changed tile
+        return None
+    gaps = np.diff(changed, prepend=0).astype('<u4') # Small numbers, so they compress well
+    return changed.size, gaps.tobytes() + grid.ravel()[changed].tobytes()
+
+
+def _encode_chunks(chunks):
+    """Returns (chunk_count, payload) for a {(chunk_row, chunk_col): tiles} dict."""
+    coords = sorted(chunks)
+    entries = np.array([(r, c) + chunks[(r, c)].shape for r, c in coords], dtype=CHUNK_ENTRY_DTYPE)
+    tiles = b''.join(np.ascontiguousarray(chunks[key], dtype=np.uint8).tobytes() for key in coords)
+    return len(coords), entries.tobytes() + tiles
+
+
+def encode_save(save_data, compress=True):
+    """Encodes a save dict (player_x, player_y, map_data, save_name, optional seed and generator)
+    into the bytes of a save file.
+
+    With a seed and generator name only the modified tiles are stored; the rest of the
+    world is regenerated on load. A streamed world passes map_data=None, its size as
+    `map_size` and its modified chunks as `chunks`, plus any more as `stored_chunks`
+    coordinates to read from `chunk_store` (a ChunkStore) here, off the game thread.
+    """
+    chunks = save_data.get('chunks')
+    if chunks is not None:
+        if save_data.get('stored_chunks'):
+            chunks = dict(chunks)
+            for coords in save_data['stored_chunks']:
+                chunks[coords] = save_data['chunk_store'].read(coords)
+        grid = None
+        rows, cols = save_data['map_size']
+    else:
+        grid = np.ascontiguousarray(save_data['map_data'], dtype=np.uint8)
+        rows, cols = grid.shape
+    name = save_data.get('save_name', '').encode('utf-8')
+
+    flags = 0
+    seed = save_data.get('seed')
+    generator_id = generator_version = delta_count = 0
+    delta = None
+    if seed is not None:
+        flags |= FLAG_HAS_SEED
+        if save_data.get('generator'):
+            generator = get_generator(save_data['generator'])
+            generator_id, generator_version = generator.generator_id, generator.version
+            if grid is not None:
+                delta = _encode_delta(grid, generator, seed)
+    if chunks is not None and not generator_id:
+        raise ValueError("A streamed world can only be saved with its seed and generator")
+
+    if chunks is not None:
+        delta_count, payload = _encode_chunks(chunks)
+        flags |= FLAG_CHUNKED
+    elif delta is not None:
+        delta_count, payload = delta
+        flags |= FLAG_DELTA
+    else:
+        payload = grid.tobytes()
+    if compress:
+        payload = zlib.compress(payload, ZLIB_LEVEL)
+        flags |= FLAG_ZLIB
+
+    header = HEADER_STRUCT.pack(
+        SAVE_MAGIC, SAVE_VERSION, flags,
+        int(save_data['player_x']), int(save_data['player_y']),
+        rows, cols, seed or 0, len(name), len(payload)
+    ) + WORLD_STRUCT.pack(generator_id, generator_version, delta_count)
+    return header + name + payload
+
+
+def write_save(path, save_data, compress=True):
+    """Writes a save dict to `path` (see encode_save)."""
+    data = encode_save(save_data, compress)
+    # Write to a temp file and swap it in, so a crash mid-write never leaves a half-written slot
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _unpack_header(buffer, path):
+    """Returns (header fields, world fields, header size). Version 1 files have no world block."""
+    if len(buffer) < HEADER_STRUCT.size:
+        raise SaveFormatError(f"{path}: file too short for a save header")
+    fields = HEADER_STRUCT.unpack_from(buffer)
+    if fields[0] != SAVE_MAGIC:
+        raise SaveFormatError(f"{path}: not a binary save file")
+    if fields[1] > SAVE_VERSION:
+        raise SaveFormatError(f"{path}: save version {fields[1]} is newer than supported ({SAVE_VERSION})")
+    if fields[1] < 2:
+        return fields, (0, 0, 0), HEADER_STRUCT.size
+    if len(buffer) < HEADER_STRUCT.size + WORLD_STRUCT.size:
+        raise SaveFormatError(f"{path}: file too short for a save header")
+    return fields, WORLD_STRUCT.unpack_from(buffer, HEADER_STRUCT.size), HEADER_STRUCT.size + WORLD_STRUCT.size
+
+
+def read_save(path):
+    """Reads a binary or legacy JSON save into a dict. map_data is a (rows, cols) uint8 array."""
+    if path.endswith(LEGACY_SAVE_EXTENSION):
+        return _read_legacy_save(path)
+
+    with open(path, 'rb') as f:
+        buffer = bytearray(f.read()) # bytearray so the grid view below is writable
+    return decode_save(buffer, path)
+
+
+def decode_save(buffer, path='<memory>'):
+    """Decodes the bytes of a binary save (see encode_save). `path` only labels errors."""
+    if not isinstance(buffer, bytearray):
+        buffer = bytearray(buffer) # The grid may be a view into the buffer, and must be writable
+    fields, world, name_start = _unpack_header(buffer, path)
+    _, _, flags, player_x, player_y, rows, cols, seed, name_len, payload_len = fields
+    generator_id, generator_version, delta_count = world
+
+    payload_start = name_start + name_len
+    if len(buffer) < payload_start + payload_len:
+        raise SaveFormatError(f"{path}: file is truncated")
+    save_name = buffer[name_start:payload_start].decode('utf-8', errors='replace')
+
+    if flags & FLAG_ZLIB:
+        try:
+            payload = bytearray(zlib.decompress(memoryview(buffer)[payload_start:payload_start + payload_len]))
+        except zlib.error as e:
+            raise SaveFormatError(f"{path}: corrupted tile data ({e})") from e
+        payload_start = 0
+    else:
+        # Raw payload: numpy views straight into the file buffer, no copy
+        payload = buffer
+
+    generator = GENERATORS_BY_ID.get(generator_id)
+    save_data = {
+        'player_x': player_x,
+        'player_y': player_y,
+        'save_name': save_name,
+        'seed': seed if flags & FLAG_HAS_SEED else None,
+        'generator': generator.name if generator else None,
+    }
+    if flags & FLAG_CHUNKED:
+        _check_generator(path, generator, generator_version)
+        save_data['map_data'] = None
+        save_data['map_size'] = (rows, cols)
+        save_data['chunks'] = _decode_chunks(path, payload, payload_start, delta_count)
+        return save_data
+
+    if flags & FLAG_DELTA:
+        grid = _decode_delta(path, payload, payload_start, delta_count, generator, generator_version, seed, rows, cols)
+    else:
+        grid_size = len(payload) - payload_start if flags & FLAG_ZLIB else payload_len
+        if grid_size != rows * cols:
+            raise SaveFormatError(f"{path}: tile data does not match {rows}x{cols} map")
+        grid = np.frombuffer(payload, dtype=np.uint8, count=rows * cols, offset=payload_start).reshape(rows, cols)
+    save_data['map_data'] = grid
+    return save_data
+
+
+def _check_generator(path, generator, generator_version):
+    if generator is None:
+        raise SaveFormatError(f"{path}: saved with an unknown world generator")
+    if generator.version != generator_version:
+        raise SaveFormatError(f"{path}: world generator '{generator.name}' v{generator_version} "
+                              f"is not available (current is v{generator.version})")
+
+
+def _decode_chunks(path, payload, offset, chunk_count):
+    """Returns the {(chunk_row, chunk_col): tiles} dict of a streamed world's modified chunks."""
+    entries_size = chunk_count * CHUNK_ENTRY_DTYPE.itemsize
+    if len(payload) - offset < entries_size:
+        raise SaveFormatError(f"{path}: chunk table is truncated")
+    entries = np.frombuffer(payload, dtype=CHUNK_ENTRY_DTYPE, count=chunk_count, offset=offset)
+    tile_offset = offset + entries_size
+    if len(payload) - tile_offset < int((entries['rows'].astype(np.int64) * entries['cols']).sum()):
+        raise SaveFormatError(f"{path}: chunk tiles are truncated")
+
+    chunks = {}
+    for chunk_row, chunk_col, rows, cols in entries.tolist():
+        chunks[(chunk_row, chunk_col)] = np.frombuffer(payload, dtype=np.uint8, count=rows * cols,
+                                                       offset=tile_offset).reshape(rows, cols)
+        tile_offset += rows * cols
+    return chunks
+
+
+def _decode_delta(path, payload, offset, delta_count, generator, generator_version, seed, rows, cols):
+    """Regenerates the seeded world and applies the stored tile changes (all vectorized)."""
+    _check_generator(path, generator, generator_version)
+    if len(payload) - offset < delta_count * 5:
+        raise SaveFormatError(f"{path}: tile changes are truncated")
+
+    gaps = np.frombuffer(payload, dtype='<u4', count=delta_count, offset=offset)
+    values = np.frombuffer(payload, dtype=np.uint8, count=delta_count, offset=offset + delta_count * 4)
+    indices = np.cumsum(gaps, dtype=np.uint64)
+    if delta_count and indices[-1] >= rows * cols:
+        raise SaveFormatError(f"{path}: tile changes fall outside the {rows}x{cols} map")
+
+    grid = generator.generate(seed, rows, cols)
+    grid.ravel()[indices] = values
+    return grid
+
+
+def _read_legacy_save(path):
+    with open(path, 'r') as f:
+        try:
+            save_data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise SaveFormatError(f"{path}: corrupted JSON save ({e})") from e
+    try:
+        save_data['map_data'] = np.array(save_data['map_data'], dtype=np.uint8)
+    except (KeyError, TypeError, ValueError) as e:
+        raise SaveFormatError(f"{path}: missing or malformed map_data") from e
+    save_data.setdefault('seed', None)
+    save_data.setdefault('generator', None)
+    return save_data
+
+
+def read_save_name(path):
+    """Reads only the save name. Binary saves need just the header, not the tile data."""
+    if path.endswith(LEGACY_SAVE_EXTENSION):
+        return _read_legacy_save(path).get('save_name', '')
+    with open(path, 'rb') as f:
+        buffer = f.read(HEADER_STRUCT.size + WORLD_STRUCT.size)
+        fields, _, name_start = _unpack_header(buffer, path)
+        f.seek(name_start)
+        return f.read(fields[8]).decode('utf-8', errors='replace')
+
+
+class SlotIndex:
+    """In-memory index of save-slot names, so menus don't re-read save files every frame.
+
+    Each entry remembers the file's path, mtime and size; refresh() only re-reads the
+    header of a slot whose file changed on disk. `version` increases whenever any
+    entry changes, so callers can tell when UI built from the index is stale.
+    """
+
+    # Entry name values for slots that have no readable save
+    EMPTY = None
+    CORRUPTED = object()
+
+    def __init__(self, num_slots):
+        self.num_slots = num_slots
+        self.version = 0
+        self._entries = {} # slot_number -> (path, mtime_ns, size, name)
+
+    def refresh(self, slot_numbers=None):
+        """Re-stats the given slots (all by default) and re-reads any whose file changed."""
+        changed = False
+        for slot_number in slot_numbers or range(1, self.num_slots + 1):
+            path = find_slot_file(slot_number)
+            stat_key = None
+            if path:
+                try:
+                    st = os.stat(path)
+                    stat_key = (path, st.st_mtime_ns, st.st_size)
+                except OSError:
+                    path = None
+
+            entry = self._entries.get(slot_number)
+            if entry is not None and entry[:3] == (stat_key or (None, None, None)):
+                continue
+
+            if stat_key is None:
+                name = self.EMPTY
+                stat_key = (None, None, None)
+            else:
+                try:
+                    name = read_save_name(path)
+                except (SaveFormatError, OSError, UnicodeDecodeError):
+                    name = self.CORRUPTED
+            self._entries[slot_number] = stat_key + (name,)
+            changed = True
+
+        if changed:
+            self.version += 1
+        return changed
+
+    def invalidate(self, slot_number):
+        """Call after writing, renaming or deleting a slot's file."""
+        self.refresh([slot_number])
+
+    def name(self, slot_number):
+        """Returns the save name, '' if unnamed, EMPTY or CORRUPTED."""
+        if slot_number not in self._entries:
+            self.refresh([slot_number])
+        return self._entries[slot_number][3]
@@ -0,0 +1,110 @@
+# durango_wildlands_clone/save_worker.py
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import save_format
+
+class SaveWorker:
+    """Runs save-slot reads and writes on a single background thread.
+
+    The game thread hands over an already-snapshotted save dict (or a slot number
+    to load) and gets results back through poll(), which it calls once per frame.
+    Results are never applied on the worker thread.
+
+    Ordering policy: jobs run one at a time, in the order they were requested, so
+    a load always sees every save requested before it. If a save is requested for
+    a slot that already has a save *waiting* (not yet started), the waiting
+    snapshot is replaced by the newer one instead of writing the slot twice; a
+    save requested while that slot is being written is queued behind the write.
+    """
+
+    def __init__(self, on_result=None):
+        self.on_result = on_result # Called on the worker thread after each result is queued (e.g. to wake the game loop)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='save-worker')
+        self._lock = threading.Lock()
+        self._pending_saves = {} # slot_number -> newest save dict not yet picked up by the worker
+        self._results = queue.Queue() # (kind, slot_number, result, error)
+        self._jobs_in_flight = 0
+
+    @property
+    def busy(self):
+        return self._jobs_in_flight > 0
+
+    def _submit(self, fn, *args):
+        self._jobs_in_flight += 1
+        self._executor.submit(fn, *args)
+
+    def save(self, slot_number, save_data):
+        """Queues a save. Returns False if it was merged into a save already waiting for this slot."""
+        with self._lock:
+            already_waiting = slot_number in self._pending_saves
+            self._pending_saves[slot_number] = save_data
+        if not already_waiting:
+            self._submit(self._run_save, slot_number)
+        return not already_waiting
+
+    def rename(self, slot_number, new_name):
+        self._submit(self._run_rename, slot_number, new_name)
+
+    def load(self, slot_number):
+        self._submit(self._run_load, slot_number)
+
+    def poll(self):
+        """Returns finished jobs as (kind, slot_number, result, error) tuples. Game thread only."""
+        finished = []
+        while True:
+            try:
+                finished.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        self._jobs_in_flight -= len(finished)
+        return finished
+
+    def shutdown(self):
+        """Waits for queued jobs (so no save is lost on exit) and stops the thread."""
+        self._executor.shutdown(wait=True)
+
+    # --- Worker-thread side ---
+    def _run_save(self, slot_number):
+        with self._lock:
+            save_data = self._pending_saves.pop(slot_number)
+        self._run_job('save', slot_number, self._write_slot, slot_number, save_data)
+
+    def _run_rename(self, slot_number, new_name):
+        def rename():
+            filename_path = save_format.find_slot_file(slot_number)
+            if filename_path is None:
+                raise FileNotFoundError(f"No save file found for slot {slot_number}.")
+            save_data = save_format.read_save(filename_path)
+            save_data['save_name'] = new_name
+            self._write_slot(slot_number, save_data)
+            return new_name
+        self._run_job('rename', slot_number, rename)
+
+    def _run_load(self, slot_number):
+        def load():
+            filename_path = save_format.find_slot_file(slot_number)
+            if filename_path is None:
+                raise FileNotFoundError(f"No save file found for slot {slot_number}.")
+            return save_format.read_save(filename_path)
+        self._run_job('load', slot_number, load)
+
+    def _run_job(self, kind, slot_number, fn, *args):
+        try:
+            self._results.put((kind, slot_number, fn(*args), None))
+        except Exception as e:
+            self._results.put((kind, slot_number, None, e))
+        if self.on_result:
+            self.on_result()
+
+    @staticmethod
+    def _write_slot(slot_number, save_data):
+        """Writes a slot in the binary format, replacing any legacy JSON file for it."""
+        filename_path = save_format.slot_path(slot_number)
+        save_format.write_save(filename_path, save_data)
+        legacy_path = save_format.legacy_slot_path(slot_number)
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+        return filename_path
@@ -0,0 +1,200 @@
+# durango_wildlands_clone/spatial_hash.py
+
+import math
+import numpy as np
+from config import TILE_SIZE, SPATIAL_HASH_CELL_TILES
+
+_KEY_STRIDE = 1 << 32 # cell key = cell_row * _KEY_STRIDE + cell_col
+
+class SpatialHash:
+    """Uniform-grid broadphase for axis-aligned boxes in world pixels.
+
+    Cells are SPATIAL_HASH_CELL_TILES tiles square. Each box is filed under the one
+    cell holding its top-left corner (a "loose" grid), so moving a box only touches
+    the hash when that corner crosses into another cell. Boxes may not be larger than
+    a cell; queries look one cell up and left to catch boxes reaching into the area.
+
+    Boxes are identified by integer handles from insert(). Their coordinates are kept
+    in NumPy arrays indexed by handle, so batch moves and the all-pairs query are
+    vectorized; the per-cell buckets (sets of handles) serve rect and radius queries.
+    """
+
+    def __init__(self, cell_size=TILE_SIZE * SPATIAL_HASH_CELL_TILES, capacity=256):
+        self.cell_size = cell_size
+        self.capacity = 0
+        self.x = self.y = self.w = self.h = np.zeros(0)
+        self.cell = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        self._buckets = {} # cell key -> set of handles
+        self._free = [] # Released handles, reused by insert
+        self._next_handle = 0
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        def grown(array, dtype):
+            new = np.zeros(capacity, dtype=dtype)
+            new[:len(array)] = array
+            return new
+        self.x, self.y = grown(self.x, np.float64), grown(self.y, np.float64)
+        self.w, self.h = grown(self.w, np.float64), grown(self.h, np.float64)
+        self.cell = grown(self.cell, np.int64)
+        self.alive = grown(self.alive, bool)
+        self.capacity = capacity
+
+    def _cell_keys(self, x, y):
+        # floor(a / size) rather than a // size: much faster on float arrays, and
+        # _candidates uses the same formula, so both always agree on a box's cell
+        size = self.cell_size
+        return (np.floor(np.divide(y, size)).astype(np.int64) * _KEY_STRIDE
+                + np.floor(np.divide(x, size)).astype(np.int64))
+
+    def __len__(self):
+        return self._next_handle - len(self._free)
+
+    # --- Insert / move / remove ---
+    def insert(self, x, y, w, h):
+        """Adds a box and returns its handle."""
+        return int(self.insert_many([x], [y], [w], [h])[0])
+
+    def insert_many(self, x, y, w, h):
+        """Adds boxes from arrays; returns their handles."""
+        x, y, w, h = (np.asarray(a, dtype=np.float64) for a in (x, y, w, h))
+        if len(w) and max(w.max(), h.max()) > self.cell_size:
+            raise ValueError(f"Boxes can't be larger than a cell ({self.cell_size} pixels)")
+        n = len(x)
+        reused = [self._free.pop() for _ in range(min(n, len(self._free)))]
+        fresh = n - len(reused)
+        if self._next_handle + fresh > self.capacity:
+            self._grow(max(self.capacity * 2, self._next_handle + fresh))
+        handles = np.array(reused + list(range(self._next_handle, self._next_handle + fresh)), dtype=np.int64)
+        self._next_handle += fresh
+
+        keys = self._cell_keys(x, y)
+        self.x[handles], self.y[handles], self.w[handles], self.h[handles] = x, y, w, h
+        self.cell[handles] = keys
+        self.alive[handles] = True
+        for handle, key in zip(handles.tolist(), keys.tolist()):
+            self._buckets.setdefault(key, set()).add(handle)
+        return handles
+
+    def move(self, handle, x, y, w=None, h=None):
+        """Moves (and optionally resizes) one box."""
+        self.move_many(np.array([handle]), [x], [y], None if w is None else [w], None if h is None else [h])
+
+    def move_many(self, handles, x, y, w=None, h=None):
+        """Moves many boxes at once. Only boxes whose corner changed cell touch the buckets."""
+        handles = np.asarray(handles, dtype=np.int64)
+        self.x[handles] = x
+        self.y[handles] = y
+        if w is not None:
+            self.w[handles] = w
+        if h is not None:
+            self.h[handles] = h
+        keys = self._cell_keys(self.x[handles], self.y[handles])
+        changed = np.flatnonzero(keys != self.cell[handles])
+        if len(changed):
+            buckets = self._buckets
+            for handle, old, new in zip(handles[changed].tolist(), self.cell[handles[changed]].tolist(), keys[changed].tolist()):
+                bucket = buckets[old]
+                bucket.discard(handle)
+                if not bucket:
+                    del buckets[old]
+                buckets.setdefault(new, set()).add(handle)
+            self.cell[handles[changed]] = keys[changed]
+
+    def remove(self, handle):
+        handle = int(handle)
+        key = int(self.cell[handle])
+        bucket = self._buckets[key]
+        bucket.discard(handle)
+        if not bucket:
+            del self._buckets[key]
+        self.alive[handle] = False
+        self._free.append(handle)
+
+    def clear(self):
+        self._buckets.clear()
+        self.alive[:] = False
+        self._free = []
+        self._next_handle = 0
+
+    # --- Queries ---
+    def _candidates(self, left, top, right, bottom):
+        """Handles filed in the cells a box overlapping [left, right) x [top, bottom) could be in."""
+        size = self.cell_size
+        # One extra cell up and left: a box filed there can reach into the area
+        first_row, last_row = math.floor(top / size) - 1, math.floor(bottom / size)
+        first_col, last_col = math.floor(left / size) - 1, math.floor(right / size)
+        found = []
+        buckets = self._buckets
+        if (last_row - first_row + 1) * (last_col - first_col + 1) > len(buckets):
+            # Huge area: cheaper to walk the occupied cells than the covered ones
+            for key, bucket in buckets.items():
+                row, col = divmod(key, _KEY_STRIDE)
+                if first_row <= row <= last_row and first_col <= col <= last_col:
+                    found.extend(bucket)
+        else:
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    bucket = buckets.get(row * _KEY_STRIDE + col)
+                    if bucket:
+                        found.extend(bucket)
+        return np.array(found, dtype=np.int64)
+
+    def query_rect(self, left, top, width, height):
+        """Handles of the boxes overlapping a world-pixel rect."""
+        right, bottom = left + width, top + height
+        handles = self._candidates(left, top, right, bottom)
+        x, y, w, h = self.x[handles], self.y[handles], self.w[handles], self.h[handles]
+        return handles[(x < right) & (x + w > left) & (y < bottom) & (y + h > top)]
+
+    def query_radius(self, center_x, center_y, radius):
+        """Handles of the boxes that come within `radius` pixels of a point."""
+        handles = self._candidates(center_x - radius, center_y - radius, center_x + radius, center_y + radius)
+        x, y, w, h = self.x[handles], self.y[handles], self.w[handles], self.h[handles]
+        # Distance from the point to the nearest point of each box
+        dx = np.maximum(np.maximum(x - center_x, center_x - (x + w)), 0)
+        dy = np.maximum(np.maximum(y - center_y, center_y - (y + h)), 0)
+        return handles[dx * dx + dy * dy <= radius * radius]
+
+    def overlapping_pairs(self):
+        """Returns an (n, 2) array of handle pairs (a < b) whose boxes overlap.
+
+        Fully vectorized: boxes are sorted by cell, and each occupied cell is paired with
+        itself and its four "forward" neighbours (right, down-left, down, down-right),
+        which covers every pair exactly once because boxes are at most a cell in size.
+        """
+        handles = np.flatnonzero(self.alive[:self._next_handle])
+        if len(handles) < 2:
+            return np.empty((0, 2), dtype=np.int64)
+        keys = self.cell[handles]
+        order = np.argsort(keys, kind='stable')
+        handles, keys = handles[order], keys[order]
+        cell_keys, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+
+        pairs = []
+        for d_row, d_col in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+            neighbour = cell_keys + d_row * _KEY_STRIDE + d_col
+            position = np.minimum(np.searchsorted(cell_keys, neighbour), len(cell_keys) - 1)
+            present = np.flatnonzero(cell_keys[position] == neighbour)
+            if not len(present):
+                continue
+            a_start, a_count = starts[present], counts[present]
+            b_start, b_count = starts[position[present]], counts[position[present]]
+            # Every (member of cell A, member of cell B) combination, without a Python loop
+            sizes = a_count * b_count
+            group = np.repeat(np.arange(len(present)), sizes)
+            local = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            a = handles[a_start[group] + local // b_count[group]]
+            b = handles[b_start[group] + local % b_count[group]]
+            if d_row == 0 and d_col == 0:
+                keep = a < b # Same cell: each unordered pair once, no self-pairs
+                a, b = a[keep], b[keep]
+            pairs.append(np.stack([a, b], axis=1))
+
+        pairs = np.concatenate(pairs)
+        a, b = pairs[:, 0], pairs[:, 1]
+        overlap = ((self.x[a] < self.x[b] + self.w[b]) & (self.x[b] < self.x[a] + self.w[a]) &
+                   (self.y[a] < self.y[b] + self.h[b]) & (self.y[b] < self.y[a] + self.h[a]))
+        pairs = pairs[overlap]
+        return np.sort(pairs, axis=1)
@@ -0,0 +1,8 @@
+# durango_wildlands_clone/tests/conftest.py
+
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # Before pygame opens a display
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # The game's modules live at the top level
@@ -0,0 +1,92 @@
+# durango_wildlands_clone/tests/test_player_kinematics.py
+
+"""The player walks the same distance for the same simulated time, whatever the frame or tick rate."""
+
+import os
+import numpy as np
+import pygame
+import pytest
+from config import PLAYER_SPEED, SIMULATION_TICK_RATE, TILE_SIZE, TILE_TYPE_GRASS
+from entities import EntityPool
+from game import Game, GameState
+from level.map import Map
+from player import Player
+
+SECONDS = 2.0 # Simulated time walked in every run
+RATES = (30, 60, 144, 240)
+START = 2 * TILE_SIZE
+
+
+class HoldRight:
+    """Stands in for pygame.key.get_pressed with only D held."""
+
+    def __getitem__(self, key):
+        return key == pygame.K_d
+
+
+@pytest.fixture(scope='module')
+def game(tmp_path_factory):
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('saves')) # Save slots are read relative to the working directory
+    game = Game(headless=True, seed=1)
+    size = int(PLAYER_SPEED * SECONDS / TILE_SIZE) + 8
+    game.map = Map(data=np.full((size, size), TILE_TYPE_GRASS, dtype=np.uint8)) # Open ground, nothing to bump into
+    game.creatures = EntityPool(seed=1)
+    game.game_state = GameState.PLAYING
+    yield game
+    game.save_worker.shutdown()
+    os.chdir(old_cwd)
+
+
+def walk(game, frame_times, tick_rate=SIMULATION_TICK_RATE):
+    """Feeds frame_times through step_frame; returns the distance walked at exactly the time fed in
+    (the simulated position plus the velocity over the time that hasn't made a whole tick yet)."""
+    game.player = Player(START, START, key_state=HoldRight)
+    game.tick_dt = 1.0 / tick_rate
+    game._accumulator = 0.0
+    game._reset_interpolation()
+    for frame_time in frame_times:
+        game.step_frame(frame_time, events=[])
+    return game.player.x + game.player.vx * game._accumulator - START
+
+
+def fixed_frames(rate):
+    return [1.0 / rate] * round(SECONDS * rate)
+
+
+def uncapped_frames(seed=0):
+    """Jittery 0.2-3 ms frames adding up to exactly SECONDS."""
+    times = np.random.default_rng(seed).uniform(0.0002, 0.003, int(SECONDS / 0.0002) + 1)
+    times = times[:np.searchsorted(np.cumsum(times), SECONDS) + 1]
+    times[-1] -= times.sum() - SECONDS
+    return times.tolist()
+
+
+@pytest.mark.parametrize('rate', RATES + (None,), ids=lambda rate: f'{rate}fps' if rate else 'uncapped')
+def test_distance_is_the_same_at_every_frame_rate(game, rate):
+    times = fixed_frames(rate) if rate else uncapped_frames()
+    assert walk(game, times) == pytest.approx(PLAYER_SPEED * SECONDS, abs=1e-6)
+
+
+@pytest.mark.parametrize('rate', RATES)
+def test_distance_is_the_same_at_every_tick_rate(game, rate):
+    assert walk(game, fixed_frames(rate), tick_rate=rate) == pytest.approx(PLAYER_SPEED * SECONDS, abs=1e-6)
+
+
+def test_distances_agree_across_all_runs(game):
+    distances = [walk(game, fixed_frames(rate)) for rate in RATES]
+    distances.append(walk(game, uncapped_frames()))
+    distances += [walk(game, fixed_frames(rate), tick_rate=rate) for rate in RATES]
+    assert max(distances) - min(distances) < 1e-6
+
+
+def test_240hz_tick_moves_the_player(game):
+    # A 240 Hz tick at PLAYER_SPEED is under a pixel; integer positions used to truncate it to nothing
+    assert PLAYER_SPEED / 240 < 1
+    game.player = Player(START, START, key_state=HoldRight)
+    game.player.update(1.0 / 240, game.map)
+    assert game.player.x == pytest.approx(START + PLAYER_SPEED / 240)
+    for _ in range(239):
+        game.player.update(1.0 / 240, game.map)
+    assert game.player.x == pytest.approx(START + PLAYER_SPEED)
+    assert game.player.rect.x >= START + PLAYER_SPEED - 1 # The drawn rect is floored, but keeps up too
@@ -0,0 +1,51 @@
+# durango_wildlands_clone/text_cache.py
+
+import pygame
+from collections import OrderedDict
+from config import TEXT_CACHE_MAX_ENTRIES
+
+class TextCache:
+    """Shared font pool and LRU cache of rendered text surfaces for the UI.
+
+    Fonts are loaded once per (font name, size). Rendered strings are cached by
+    (font name, size, text, color, antialias), so a menu label is rasterized once
+    instead of every frame. The returned surfaces are shared: blit them, never draw
+    onto them.
+    """
+
+    def __init__(self, max_entries=TEXT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._fonts = {} # (font name, size) -> pygame.font.Font
+        self._surfaces = OrderedDict() # (font name, size, text, color, antialias) -> Surface
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size, name=None):
+        """Returns the pooled Font for a size (name None = pygame's default font)."""
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = pygame.font.Font(name, size)
+        return font
+
+    def render(self, text, size, color, antialias=True, name=None):
+        """Returns a (cached) surface with `text` rendered in the pooled font."""
+        key = (name, size, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.font(size, name).render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Drops the rendered surfaces (the fonts stay pooled)."""
+        self._surfaces.clear()
+
+
+text_cache = TextCache() # Shared by every UI widget